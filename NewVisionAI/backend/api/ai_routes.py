@@ -7,18 +7,18 @@ client-side model loading and inference.
 """
 
 import os
-import base64
-import numpy as np
-import cv2
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from utils.ai_processor import (
     predict_face_shape, 
+    FACE_SHAPE_INPUT_SIZE,
     recommend_eyewear, 
     virtual_try_on, 
     unload_model
 )
+from utils.result_cache import cached_result, KIND_DETECTION, KIND_FACE_SHAPE
+from utils.image_decode import decode_data_url
 from utils.error_handlers import (
     api_route, 
     ValidationError, 
@@ -45,40 +45,34 @@ def process_face():
     
     image_data = request.json['image']
     
-    # Handle base64 image
-    if isinstance(image_data, str) and image_data.startswith('data:image'):
-        try:
-            # Extract the base64 data
-            encoded_data = image_data.split(',')[1]
-            nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None or image.size == 0:
-                raise ValidationError('Invalid image data')
-            
-            # Convert to RGB (from BGR)
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        except Exception as e:
-            raise ValidationError(f'Failed to decode image: {str(e)}')
-    else:
-        raise ValidationError('Invalid image format. Must be a base64 encoded image.')
+    # Decode the base64 image straight to RGB; measurements need full resolution
+    image = decode_data_url(image_data, rgb=True,
+                            max_side=current_app.config.get('AI_PROCESS_FACE_MAX_SIDE')).image
     
     # Call backend processing functions
-    from utils.face_detection import detect_face_from_array, extract_measurements
+    from utils.detection_executor import submit_detection, wait_for_detection
     
-    # Detect the face
-    face_detected, face_data = detect_face_from_array(image)
+    # Detect the face and extract measurements (image was already converted
+    # to RGB above); images the user re-submits unchanged are served from the
+    # result cache
+    face_detected, face_data, measurements = cached_result(
+        image, KIND_DETECTION,
+        lambda: wait_for_detection(submit_detection(image, is_rgb=True)),
+        is_rgb=True, scope=current_user_id, exact=True
+    )
     
     if not face_detected:
         raise ValidationError('No face detected in the image')
     
-    # Extract measurements from face data
-    measurements = extract_measurements(face_data)
+    # Copy so the cached measurements are not modified
+    measurements = dict(measurements)
     
     # Predict face shape if not provided in measurements
     if not measurements.get('face_shape'):
         try:
-            face_shape_result = predict_face_shape(image)
+            face_shape_result = cached_result(
+                image, KIND_FACE_SHAPE, lambda: predict_face_shape(image), is_rgb=True,
+                scope=current_user_id, exact=True)
             measurements['face_shape'] = face_shape_result['face_shape']
             measurements['face_shape_confidence'] = face_shape_result['confidence']
         except Exception as e:
@@ -123,6 +117,7 @@ def recommend_eyewear_route():
         raise AIProcessingError(f'Failed to generate recommendations: {str(e)}')
 
 @ai_routes.route('/face-shape', methods=['POST'])
+@jwt_required(optional=True)
 @api_route
 def face_shape_detection():
     """
@@ -139,27 +134,15 @@ def face_shape_detection():
     
     image_data = data['image']
     
-    # Handle base64 image
-    if isinstance(image_data, str) and image_data.startswith('data:image'):
-        try:
-            # Extract the base64 data
-            encoded_data = image_data.split(',')[1]
-            nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None or image.size == 0:
-                raise ValidationError('Invalid image data')
-            
-            # Convert to RGB (from BGR)
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        except Exception as e:
-            raise ValidationError(f'Failed to decode image: {str(e)}')
-    else:
-        raise ValidationError('Invalid image format. Must be a base64 encoded image.')
+    # Decode the base64 image straight to RGB, at a reduced scale when the
+    # image is much larger than the classifier input
+    image = decode_data_url(image_data, target_side=FACE_SHAPE_INPUT_SIZE, rgb=True,
+                            max_side=current_app.config.get('AI_FACE_SHAPE_MAX_SIDE')).image
     
     # Use backend AI to predict face shape
     try:
-        result = predict_face_shape(image)
+        result = cached_result(image, KIND_FACE_SHAPE, lambda: predict_face_shape(image), is_rgb=True,
+                               scope=get_jwt_identity(), exact=True)
         return jsonify({
             'success': True,
             'face_shape': result['face_shape'],
@@ -195,20 +178,8 @@ def virtual_try_on_route():
     except ValueError:
         raise ValidationError('Invalid frame ID, must be an integer')
     
-    # Handle base64 image
-    if isinstance(image_data, str) and image_data.startswith('data:image'):
-        try:
-            # Extract the base64 data
-            encoded_data = image_data.split(',')[1]
-            nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None or image.size == 0:
-                raise ValidationError('Invalid image data')
-        except Exception as e:
-            raise ValidationError(f'Failed to decode image: {str(e)}')
-    else:
-        raise ValidationError('Invalid image format. Must be a base64 encoded image.')
+    # Decode the base64 image
+    image = decode_data_url(image_data, max_side=current_app.config.get('AI_VIRTUAL_TRY_ON_MAX_SIDE')).image
     
     # Use backend AI to process virtual try-on
     try:
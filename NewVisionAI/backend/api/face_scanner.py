@@ -2,75 +2,47 @@ import os
 import uuid
 import json
 import numpy as np
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.utils import secure_filename
-from app import socketio
 
-from models import User, Measurement, FaceAnalysis
+from models import User, Measurement, FaceAnalysis, ScanJob
 from config.database import db
-from utils.face_detection import detect_face, extract_measurements
-from utils.face_analysis import analyze_face
+from utils.error_handlers import ValidationError
+from utils.progress_events import emit_progress, emit_progress_error
+from utils.scan_processing import (
+    scan_path, process_scan, process_scans_batch, analyze_measurement_record, delete_measurement_record
+)
+from utils.job_queue import enqueue_scan_job, job_status, JobQueueUnavailable
+from utils.upload_ingest import ingest_upload
+from utils.scan_store import get_scan_store
 
 face_scanner = Blueprint('face_scanner', __name__, url_prefix='/api/face-scanner')
 
+# Bytes of multipart framing and form fields allowed on top of the file size
+UPLOAD_FORM_OVERHEAD = 16 * 1024
+
 def allowed_file(filename):
     """Check if file has an allowed extension."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
-def validate_file_type(file):
-    """
-    Validate file content type for security.
-    
-    Args:
-        file: The uploaded file object
-        
-    Returns:
-        bool: True if file type is valid, False otherwise
-    """
-    # List of allowed content types
-    allowed_content_types = [
-        'image/jpeg', 
-        'image/jpg', 
-        'image/png',
-        'image/webp'
-    ]
-    
-    # Check MIME type
-    if file.content_type not in allowed_content_types:
-        return False
-    
-    # Additional validation - read first few bytes and check file signature
-    # This helps prevent content-type spoofing
-    file_signature = file.read(12)  # Read first 12 bytes for signature check
-    file.seek(0)  # Reset file pointer
-    
-    # JPEG signature check: starts with bytes FF D8 FF
-    jpeg_signature = b'\xFF\xD8\xFF'
-    
-    # PNG signature check: starts with bytes 89 50 4E 47 0D 0A 1A 0A
-    png_signature = b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A'
-    
-    # WebP signature check: starts with RIFF and contains WEBP
-    webp_signature_start = b'RIFF'
-    webp_signature_content = b'WEBP'
-    
-    if file.content_type.startswith('image/jp') and not file_signature.startswith(jpeg_signature):
-        return False
-    elif file.content_type == 'image/png' and not file_signature.startswith(png_signature):
-        return False
-    elif file.content_type == 'image/webp' and (not file_signature.startswith(webp_signature_start) or webp_signature_content not in file.read(20)):
-        file.seek(0)  # Reset file pointer again
-        return False
-    
-    return True
+def valid_scan_id(scan_id):
+    """Check that a scan ID is a stored file name (hex UUID and extension)."""
+    name, _, ext = scan_id.partition('.')
+    return name.isalnum() and ext.isalnum() and '..' not in scan_id
 
 @face_scanner.route('/upload', methods=['POST'])
 @jwt_required()
 def upload_face_scan():
     """Upload a face scan image for processing."""
     current_user_id = get_jwt_identity()
+    max_bytes = current_app.config.get('UPLOAD_MAX_BYTES', 5 * 1024 * 1024)
+    
+    # Reject oversized uploads from the declared length, before the body is
+    # read (the margin covers the multipart framing)
+    if request.content_length and request.content_length > max_bytes + UPLOAD_FORM_OVERHEAD:
+        return jsonify({'error': f'File too large. Maximum size is {max_bytes // (1024 * 1024)}MB.'}), 400
     
     # Check if face scan file is provided
     if 'face_scan' not in request.files:
@@ -82,10 +54,6 @@ def upload_face_scan():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    # Check if file has valid content type
-    if not validate_file_type(file):
-        return jsonify({'error': 'Invalid file type. Only JPEG, PNG and WebP images are allowed.'}), 400
-    
     # Check if file has allowed extension
     if not allowed_file(file.filename):
         return jsonify({'error': 'File type not allowed. Only JPEG, PNG and WebP extensions are permitted.'}), 400
@@ -95,46 +63,64 @@ def upload_face_scan():
     file_ext = filename.rsplit('.', 1)[1].lower()
     unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
     
-    # Set file size limit (5MB)
-    file_size_limit = 5 * 1024 * 1024  # 5MB in bytes
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
-    
-    if file_size > file_size_limit:
-        return jsonify({'error': f'File too large. Maximum size is 5MB.'}), 400
-    
-    # Save file to uploads directory
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    os.makedirs(os.path.join(upload_folder, 'face_scans'), exist_ok=True)
-    file_path = os.path.join(upload_folder, 'face_scans', unique_filename)
-    
+    # Write the file to the scan store's staging area in one pass, checking
+    # its signature against the content type, its size and its header
+    # dimensions on the way, then store it by content hash
+    store = get_scan_store()
+    staging_path = store.staging_path(unique_filename)
     try:
-        file.save(file_path)
+        upload = ingest_upload(file.stream, staging_path, max_bytes,
+                               declared_type=file.content_type,
+                               max_side=current_app.config.get('UPLOAD_MAX_IMAGE_SIDE'))
+        scan, duplicate = store.add(current_user_id, unique_filename, upload)
+    except ValidationError as e:
+        return jsonify({'error': e.message}), 400
     except Exception as e:
         return jsonify({'error': f'Error saving file: {str(e)}'}), 500
+    finally:
+        # The store consumes the staged file; remove it if storing failed
+        try:
+            os.remove(staging_path)
+        except FileNotFoundError:
+            pass
+    upload_info = dict(upload.to_dict(), duplicate=duplicate)
     
     # Emit status update to the client
-    socketio.emit('processing_update', 
-                  {'status': 'upload_complete', 'scan_id': unique_filename},
-                  room=f"user_{current_user_id}")
+    emit_progress(current_user_id, unique_filename, 'upload_complete')
+    
+    # Process the face scan in a background job when the job queue is
+    # enabled; otherwise the client processes it with /process/<scan_id>
+    if current_app.config.get('JOB_QUEUE_ENABLED'):
+        analyze = request.form.get('analyze', '').lower() in ('1', 'true', 'yes')
+        try:
+            job = enqueue_scan_job(current_user_id, unique_filename, analyze=analyze)
+        except JobQueueUnavailable as e:
+            print(f"Error queueing face scan: {str(e)}")
+            emit_progress_error(current_user_id, unique_filename, 'Error queueing face scan')
+            return jsonify({'error': 'Face scan processing is temporarily unavailable'}), 503
+        
+        return jsonify({
+            'message': 'Face scan uploaded successfully',
+            'scan_id': unique_filename,
+            'upload': upload_info,
+            'status': job.state if job.finished else 'processing',
+            'job': job_status(job),
+            'status_url': url_for('face_scanner.get_scan_job', scan_id=unique_filename)
+        }), 202
     
-    # Process the face scan in the background
-    # In a real application, this would be a Celery task
     try:
         # Return immediate response with processing status
         return jsonify({
             'message': 'Face scan uploaded successfully',
             'scan_id': unique_filename,
+            'upload': upload_info,
             'status': 'processing'
         }), 202
     except Exception as e:
         # Log the error
         print(f"Error uploading face scan: {str(e)}")
         # Emit error event to the client
-        socketio.emit('processing_error', 
-                     {'error': 'Error uploading face scan'},
-                     room=f"user_{current_user_id}")
+        emit_progress_error(current_user_id, unique_filename, 'Error uploading face scan')
         return jsonify({'error': 'Error processing face scan'}), 500
 
 @face_scanner.route('/process/<scan_id>', methods=['GET'])
@@ -144,76 +130,36 @@ def process_face_scan(scan_id):
     current_user_id = get_jwt_identity()
     
     # Validate scan_id to prevent path traversal
-    if not scan_id.isalnum() or '..' in scan_id:
+    if not valid_scan_id(scan_id):
         return jsonify({'error': 'Invalid scan ID format'}), 400
     
-    # Check if scan exists
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'face_scans', scan_id)
-    if not os.path.exists(file_path):
+    # Check if scan exists and belongs to the user
+    scan = get_scan_store().get(scan_id)
+    if scan is not None and scan.user_id != current_user_id:
+        return jsonify({'error': 'Face scan not found'}), 404
+    if not os.path.exists(scan_path(scan_id)):
         return jsonify({'error': 'Face scan not found'}), 404
     
+    # Scans handed to the job queue are not processed a second time
+    job = ScanJob.query.filter_by(scan_id=scan_id).first()
+    if job is not None and job.state == ScanJob.COMPLETED and job.measurement_id:
+        measurement = Measurement.query.get(job.measurement_id)
+        return jsonify({
+            'message': 'Face scan processed successfully',
+            'measurement_id': measurement.id,
+            'measurements': measurement.to_dict(),
+            'status': 'completed'
+        }), 200
+    if job is not None and not job.finished:
+        return jsonify({
+            'message': 'Face scan is being processed',
+            'status': 'processing',
+            'job': job_status(job),
+            'status_url': url_for('face_scanner.get_scan_job', scan_id=scan_id)
+        }), 202
+    
     try:
-        # Emit status update to the client
-        socketio.emit('processing_update', 
-                     {'status': 'processing_started', 'scan_id': scan_id},
-                     room=f"user_{current_user_id}")
-        
-        # Detect face and extract measurements
-        face_detected, face_data = detect_face(file_path)
-        
-        if not face_detected:
-            # Emit face detection failure to the client
-            socketio.emit('processing_update', 
-                         {'status': 'face_detection_failed', 'scan_id': scan_id},
-                         room=f"user_{current_user_id}")
-            return jsonify({
-                'error': 'No face detected in the image',
-                'status': 'failed'
-            }), 400
-        
-        # Emit status update to the client
-        socketio.emit('processing_update', 
-                     {'status': 'face_detected', 'scan_id': scan_id},
-                     room=f"user_{current_user_id}")
-        
-        # Extract measurements from face data
-        measurements = extract_measurements(face_data)
-        
-        # Emit measurements to the client
-        socketio.emit('processing_update', 
-                     {
-                         'status': 'measurements_extracted', 
-                         'scan_id': scan_id,
-                         'measurements': measurements
-                     },
-                     room=f"user_{current_user_id}")
-        
-        # Create a new measurement record
-        new_measurement = Measurement(
-            user_id=current_user_id,
-            pupillary_distance=measurements.get('pupillary_distance'),
-            temple_length=measurements.get('temple_length'),
-            bridge_width=measurements.get('bridge_width'),
-            lens_width=measurements.get('lens_width'),
-            lens_height=measurements.get('lens_height'),
-            frame_width=measurements.get('frame_width'),
-            face_width=measurements.get('face_width'),
-            face_height=measurements.get('face_height'),
-            scan_data_url=scan_id,
-            notes='Processed from face scan'
-        )
-        
-        db.session.add(new_measurement)
-        db.session.commit()
-        
-        # Emit processing complete to the client
-        socketio.emit('processing_update', 
-                     {
-                         'status': 'processing_complete', 
-                         'scan_id': scan_id,
-                         'measurement_id': new_measurement.id
-                     },
-                     room=f"user_{current_user_id}")
+        new_measurement, measurements = process_scan(current_user_id, scan_id)
         
         # Return measurements
         return jsonify({
@@ -222,15 +168,67 @@ def process_face_scan(scan_id):
             'measurements': measurements,
             'status': 'completed'
         }), 200
+    except ValidationError as e:
+        return jsonify({
+            'error': e.message,
+            'status': 'failed'
+        }), 400
     except Exception as e:
         # Log the error
         print(f"Error processing face scan: {str(e)}")
         # Emit error event to the client
-        socketio.emit('processing_error', 
-                     {'error': 'Error processing face scan', 'scan_id': scan_id},
-                     room=f"user_{current_user_id}")
+        emit_progress_error(current_user_id, scan_id, 'Error processing face scan')
         return jsonify({'error': 'Error processing face scan'}), 500
 
+@face_scanner.route('/process-batch', methods=['POST'])
+@jwt_required()
+def process_face_scans_batch():
+    """Process many previously uploaded face scans in one request."""
+    current_user_id = get_jwt_identity()
+    
+    data = request.get_json() or {}
+    scan_ids = data.get('scan_ids')
+    if not isinstance(scan_ids, list) or not scan_ids:
+        return jsonify({'error': 'scan_ids must be a non-empty list'}), 400
+    
+    max_scans = current_app.config.get('BATCH_PROCESS_MAX_SCANS', 100)
+    if len(scan_ids) > max_scans:
+        return jsonify({'error': f'At most {max_scans} scans can be processed per batch'}), 400
+    
+    # Validate scan_ids to prevent path traversal; duplicates are processed once
+    if not all(isinstance(scan_id, str) and valid_scan_id(scan_id) for scan_id in scan_ids):
+        return jsonify({'error': 'Invalid scan ID format'}), 400
+    scan_ids = list(dict.fromkeys(scan_ids))
+    
+    try:
+        results = process_scans_batch(current_user_id, scan_ids)
+    except Exception as e:
+        # Log the error
+        print(f"Error processing face scan batch: {str(e)}")
+        return jsonify({'error': 'Error processing face scans'}), 500
+    
+    completed = sum(1 for result in results if result['status'] == 'completed')
+    return jsonify({
+        'message': f'Processed {completed} of {len(results)} face scans',
+        'completed': completed,
+        'failed': len(results) - completed,
+        'results': results
+    }), 200
+
+@face_scanner.route('/jobs/<scan_id>', methods=['GET'])
+@jwt_required()
+def get_scan_job(scan_id):
+    """Get the status of a face scan's background processing job."""
+    current_user_id = get_jwt_identity()
+    
+    job = ScanJob.query.filter_by(scan_id=scan_id).first()
+    
+    # Jobs of other users are reported as missing
+    if not job or job.user_id != current_user_id:
+        return jsonify({'error': 'Scan job not found'}), 404
+    
+    return jsonify(job_status(job)), 200
+
 @face_scanner.route('/analyze/<int:measurement_id>', methods=['POST'])
 @jwt_required()
 def analyze_measurement(measurement_id):
@@ -251,36 +249,8 @@ def analyze_measurement(measurement_id):
         # Get additional analysis parameters from request
         data = request.get_json() or {}
         
-        # Convert measurement to dictionary for analysis
-        measurement_dict = {
-            'pupillary_distance': measurement.pupillary_distance,
-            'temple_length': measurement.temple_length,
-            'bridge_width': measurement.bridge_width,
-            'lens_width': measurement.lens_width,
-            'lens_height': measurement.lens_height,
-            'frame_width': measurement.frame_width,
-            'face_width': measurement.face_width,
-            'face_height': measurement.face_height
-        }
-        
         # Analyze face to get face shape and recommendations
-        analysis_results = analyze_face(measurement_dict, data)
-        
-        # Create or update face analysis record
-        face_analysis = measurement.face_analysis or FaceAnalysis(measurement_id=measurement.id)
-        
-        face_analysis.face_shape = analysis_results.get('face_shape')
-        face_analysis.face_symmetry = analysis_results.get('face_symmetry')
-        face_analysis.skin_tone = analysis_results.get('skin_tone', data.get('skin_tone'))
-        face_analysis.recommended_styles = json.dumps(analysis_results.get('recommended_styles', []))
-        face_analysis.recommended_colors = json.dumps(analysis_results.get('recommended_colors', []))
-        face_analysis.confidence_score = analysis_results.get('confidence_score')
-        face_analysis.analysis_version = '1.0'  # Example version
-        
-        if not measurement.face_analysis:
-            db.session.add(face_analysis)
-        
-        db.session.commit()
+        face_analysis = analyze_measurement_record(measurement, data)
         
         # Return analysis results
         return jsonify({
@@ -363,13 +333,8 @@ def delete_measurement(measurement_id):
     if measurement.user_id != current_user_id:
         return jsonify({'error': 'Unauthorized access to measurement'}), 403
     
-    # Delete associated face analysis
-    if measurement.face_analysis:
-        db.session.delete(measurement.face_analysis)
-    
-    # Delete measurement
-    db.session.delete(measurement)
-    db.session.commit()
+    # Delete the measurement with its face analysis, releasing its face scan
+    delete_measurement_record(measurement)
     
     return jsonify({'message': 'Measurement deleted successfully'}), 200
 
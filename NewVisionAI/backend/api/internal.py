@@ -0,0 +1,45 @@
+"""
+Internal Routes
+
+This module contains the operational endpoints reporting the state of the
+scan pipeline (timing histograms, frame gate and result cache counters).
+They are restricted to admin users.
+"""
+
+from flask import Blueprint, jsonify, current_app
+
+from utils.error_handlers import admin_required
+
+internal = Blueprint('internal', __name__, url_prefix='/api/internal')
+
+@internal.route('/timings')
+@admin_required
+def timing_stats():
+    """Per-route, per-stage timing histograms of sampled requests and events."""
+    from utils.timing import stage_timings
+    return jsonify({
+        "sample_rate": current_app.config.get('TIMING_SAMPLE_RATE', 0.0),
+        "routes": stage_timings.stats()
+    })
+
+@internal.route('/frame-gate')
+@admin_required
+def frame_gate_stats():
+    """Frame gate counters (how many frames were rejected before the mesh)."""
+    from utils.frame_gate import get_frame_gate
+    gate = get_frame_gate()
+    return jsonify({
+        "enabled": gate is not None,
+        "stats": gate.stats() if gate is not None else {}
+    })
+
+@internal.route('/result-cache')
+@admin_required
+def result_cache_stats():
+    """Result cache counters (hits, misses, evictions, memory use)."""
+    from utils.result_cache import get_result_cache
+    cache = get_result_cache()
+    return jsonify({
+        "enabled": cache is not None,
+        "stats": cache.stats() if cache is not None else {}
+    })
@@ -9,6 +9,7 @@ from models import Measurement, FaceAnalysis
 from config.database import db
 from utils.face_detection import detect_face, extract_measurements
 from utils.face_analysis import analyze_face
+from utils.scan_processing import delete_measurement_record
 
 measurements = Blueprint('measurements', __name__, url_prefix='/api/measurements')
 
@@ -155,13 +156,8 @@ def delete_measurement(measurement_id):
     if measurement.user_id != current_user_id:
         return jsonify({'error': 'Unauthorized access to measurement'}), 403
     
-    # Delete associated face analysis
-    if measurement.face_analysis:
-        db.session.delete(measurement.face_analysis)
-    
-    # Delete measurement
-    db.session.delete(measurement)
-    db.session.commit()
+    # Delete the measurement with its face analysis, releasing its face scan
+    delete_measurement_record(measurement)
     
     return jsonify({'message': 'Measurement deleted successfully'}), 200
 
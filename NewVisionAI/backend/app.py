@@ -1,5 +1,5 @@
 import os
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
@@ -18,9 +18,13 @@ from api.user import user_bp
 from api.products import products_bp
 from api.face_scanner import face_scanner_bp
 from api.ai_routes import ai_routes
+from api.internal import internal
 
 # Import utilities
 from utils.error_handlers import setup_error_handlers
+from utils.timing import init_timing, traced_event
+from utils.offload import init_offload, run_blocking
+from utils.job_queue import init_job_queue
 
 # Import database configuration
 from config.database import db, migrate
@@ -72,8 +76,28 @@ def create_app(test_config=None):
     db.init_app(app)
     migrate.init_app(app, db)
     
-    # Initialize Socket.IO with the app
-    socketio.init_app(app)
+    # Initialize Socket.IO with the app. With a message queue, emits from any
+    # web or worker process reach clients connected to any other process
+    socketio.init_app(app,
+                      message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'),
+                      channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'))
+    
+    # Run CPU-bound scan work in native threads when serving with eventlet
+    init_offload(socketio.async_mode,
+                 enabled=app.config.get('SCAN_OFFLOAD', True),
+                 threads=app.config.get('SCAN_OFFLOAD_THREADS'))
+    
+    # Per-stage timing of sampled requests (TIMING_SAMPLE_RATE)
+    init_timing(app)
+    
+    # Background scan processing jobs (Celery)
+    init_job_queue(app)
+    
+    # Preload dlib models so the first dlib scan doesn't pay for loading them
+    if app.config.get('DLIB_PRELOAD'):
+        from utils.dlib_models import preload_dlib_models
+        with app.app_context():
+            preload_dlib_models()
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -82,6 +106,7 @@ def create_app(test_config=None):
     app.register_blueprint(products_bp, url_prefix='/api/products')
     app.register_blueprint(face_scanner_bp, url_prefix='/api/face-scanner')
     app.register_blueprint(ai_routes)
+    app.register_blueprint(internal)
     
     # Apply rate limits to specific routes
     # Authentication endpoints - more permissive
@@ -101,6 +126,9 @@ def create_app(test_config=None):
     def catch_all(path):
         return app.send_static_file('index.html')
     
+    # JSON responses for APIError exceptions (validation, authorization...)
+    setup_error_handlers(app)
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(e):
@@ -133,6 +161,19 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
+    from utils.face_detection import get_face_mesh_sessions
+    from utils.measurement_aggregator import get_measurement_sessions
+    from utils.frame_mailbox import get_frame_mailboxes
+    
+    # Release the live scan session's tracking FaceMesh, measurements and
+    # pending frame
+    get_face_mesh_sessions().release(request.sid)
+    measurement_sessions = get_measurement_sessions()
+    if measurement_sessions is not None:
+        measurement_sessions.release(request.sid)
+    mailboxes = get_frame_mailboxes()
+    if mailboxes is not None:
+        mailboxes.release(request.sid)
     print('Client disconnected')
 
 @socketio.on('join')
@@ -159,15 +200,71 @@ def handle_face_analysis_request(data):
     # Emit result back to the client
     emit('face_analysis_result', analysis_result)
 
+@socketio.on('reset_scan')
+def handle_reset_scan(data=None):
+    """Start a new live scan, discarding the converged estimate"""
+    from utils.measurement_aggregator import get_measurement_sessions
+    
+    measurement_sessions = get_measurement_sessions()
+    if measurement_sessions is not None:
+        measurement_sessions.release(request.sid)
+    emit('scan_reset', {'message': 'Scan reset'})
+
 @socketio.on('scan_face')
 def handle_scan_face(data):
+    """Receive a face scan frame, processing only the newest frame of a session"""
+    from utils.frame_mailbox import get_frame_mailboxes
+    
+    mailboxes = get_frame_mailboxes()
+    if mailboxes is None:
+        process_scan_frame(data)
+        return
+    
+    # While a frame of this session is being processed, this frame just
+    # replaces the pending one; the consumer below picks it up
+    mailbox = mailboxes.get(request.sid)
+    if not mailbox.put(data):
+        return
+    
+    reported_drops = mailbox.dropped
+    try:
+        while data is not None:
+            process_scan_frame(data)
+            
+            # Yield so queued events of this session can deliver newer frames
+            socketio.sleep(0)
+            data = mailbox.take()
+            
+            # Tell the client about dropped frames so it can slow down capture
+            if mailbox.dropped != reported_drops:
+                reported_drops = mailbox.dropped
+                emit('frame_stats', mailbox.stats())
+    except Exception:
+        mailbox.abandon()
+        raise
+
+@traced_event('socket:scan_face')
+def process_scan_frame(data):
     """Process face scan from webcam or uploaded image frame"""
     try:
         # Import process_frame here to avoid circular imports
-        from face_scanner import process_frame
+        from face_scanner import process_frame, process_frame_multi
+        from utils.measurement_aggregator import get_measurement_sessions
+        from utils.result_cache import cached_result, KIND_MULTI_FACE
+        from utils.frame_protocol import is_binary_frame, decode_binary_frame, MAX_FRAME_SIDE
+        from utils.image_decode import decode_data_url
+        from utils.image_header import check_dimensions
+        from utils.error_handlers import ValidationError
+        from flask import current_app
         import numpy as np
-        import base64
-        import cv2
+        import warnings
+        
+        # Stop accepting frames once the session's measurements have converged
+        measurement_sessions = get_measurement_sessions()
+        if (measurement_sessions is not None and not data.get('multi_face')
+                and measurement_sessions.is_converged(request.sid)):
+            emit('converged', measurement_sessions.get(request.sid).estimate())
+            return
         
         # Check if frame data is provided
         if 'frame' not in data:
@@ -176,42 +273,43 @@ def handle_scan_face(data):
             
         # Validate input
         frame = data['frame']
+        max_side = current_app.config.get('SCAN_FRAME_MAX_SIDE', MAX_FRAME_SIDE)
         
         # Input validation for base64 image
         if isinstance(frame, str) and frame.startswith('data:image'):
-            # Extract MIME type
-            mime_type = frame.split(',')[0].split(':')[1].split(';')[0]
-            
-            # Check if it's an allowed image type
-            if mime_type not in ['image/jpeg', 'image/png', 'image/webp']:
-                emit('error', {'message': 'Invalid image format. Only JPEG, PNG and WebP are allowed'})
-                return
-                
-            # Convert base64 image to numpy array
+            # Convert base64 image to numpy array; the JPEG, PNG or WebP
+            # content must match the declared type and oversized images are
+            # rejected from their header, before decoding
             try:
-                encoded_data = frame.split(',')[1]
-                nparr = np.frombuffer(base64.b64decode(encoded_data), np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                # Verify the image was properly decoded
-                if frame is None or frame.size == 0:
-                    emit('error', {'message': 'Invalid image data'})
-                    return
-                    
-                # Check if image size is reasonable
-                if frame.shape[0] > 4000 or frame.shape[1] > 4000:
-                    emit('error', {'message': 'Image dimensions too large'})
-                    return
+                frame = run_blocking(decode_data_url, frame, max_side=max_side).image
+            except ValidationError as e:
+                emit('error', {'message': e.message})
+                return
             except Exception as e:
                 emit('error', {'message': f'Error processing image: {str(e)}'})
                 return
+        elif is_binary_frame(frame):
+            # Binary attachment: encoded image bytes or raw pixels with a
+            # small header, wrapped without copying
+            try:
+                frame = run_blocking(decode_binary_frame, data, max_side=max_side)
+            except ValidationError as e:
+                emit('error', {'message': e.message})
+                return
         elif isinstance(frame, list):
-            # Validate array data
+            # Nested list of pixels (height x width x channels); deprecated,
+            # accepted until the next release
+            warnings.warn('scan_face frames sent as pixel lists are deprecated; '
+                          'send them as binary attachments', FutureWarning)
             try:
-                frame = np.array(frame, dtype=np.uint8)
+                frame = run_blocking(np.array, frame, dtype=np.uint8)
                 if frame.size == 0 or frame.ndim != 3:
                     emit('error', {'message': 'Invalid image array format'})
                     return
+                check_dimensions((frame.shape[1], frame.shape[0]), max_side)
+            except ValidationError as e:
+                emit('error', {'message': e.message})
+                return
             except Exception as e:
                 emit('error', {'message': f'Error processing image array: {str(e)}'})
                 return
@@ -225,10 +323,36 @@ def handle_scan_face(data):
             emit('error', {'message': 'Invalid detection method'})
             return
             
-        measurements = process_frame(frame, method)
+        # Detection runs off the event loop (see utils.offload); results are
+        # emitted from this green thread, i.e. to the originating sid
+        
+        # Multi-face mode: measure everyone in front of the camera at once
+        if data.get('multi_face'):
+            # Cached per connection, so only this session's recent frames match
+            faces = run_blocking(cached_result, frame, KIND_MULTI_FACE,
+                                 lambda: process_frame_multi(frame, method), method=method,
+                                 scope=request.sid)
+            if faces:
+                emit('measurements', {'faces': faces, 'face_count': len(faces)})
+            else:
+                emit('error', {'message': 'No face detected in the image'})
+            return
+        
+        # Live frames of this connection are tracked across calls. They are
+        # always measured: a cached result of a near-identical frame would be
+        # added to the running estimate again and again, making a still
+        # stream converge on what is really a single sample
+        session_id = request.sid
+        measurements = run_blocking(process_frame, frame, method, session_id=session_id)
         
         if measurements:
             emit('measurements', measurements)
+            
+            # Update the session's running estimate and signal convergence
+            if measurement_sessions is not None:
+                aggregator = measurement_sessions.get(request.sid)
+                if aggregator.add(measurements):
+                    emit('converged', aggregator.estimate())
         else:
             emit('error', {'message': 'No face detected in the image'})
     except Exception as e:
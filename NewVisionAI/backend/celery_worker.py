@@ -0,0 +1,12 @@
+"""
+Celery worker entry point.
+
+Creates the Flask app so jobs run with its configuration, database and
+Socket.IO message queue:
+    celery -A celery_worker.celery worker --loglevel=info
+"""
+
+from app import app
+from utils.job_queue import celery
+
+__all__ = ['app', 'celery']
@@ -19,21 +19,125 @@ JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+# Face scan uploads: largest file size in bytes and largest width or height
+# in pixels (read from the image header while the upload is stored)
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 5 * 1024 * 1024))
+UPLOAD_MAX_IMAGE_SIDE = int(os.getenv('UPLOAD_MAX_IMAGE_SIDE', 4000))
+# Largest width or height in pixels of images sent to the scan_face socket
+# event and the AI endpoints, checked from the image header before decoding
+SCAN_FRAME_MAX_SIDE = int(os.getenv('SCAN_FRAME_MAX_SIDE', 4000))
+AI_PROCESS_FACE_MAX_SIDE = int(os.getenv('AI_PROCESS_FACE_MAX_SIDE', 4000))
+AI_FACE_SHAPE_MAX_SIDE = int(os.getenv('AI_FACE_SHAPE_MAX_SIDE', 4000))
+AI_VIRTUAL_TRY_ON_MAX_SIDE = int(os.getenv('AI_VIRTUAL_TRY_ON_MAX_SIDE', 4000))
+# Content-addressed face scan store: backend ('local'), root directory
+# (defaults to UPLOAD_FOLDER/face_scans) and nested shard directory levels
+SCAN_STORE_BACKEND = os.getenv('SCAN_STORE_BACKEND', 'local')
+SCAN_STORE_ROOT = os.getenv('SCAN_STORE_ROOT') or None
+SCAN_STORE_SHARD_DEPTH = int(os.getenv('SCAN_STORE_SHARD_DEPTH', 2))
 
 # AI model configuration
 AI_MODELS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'ai')
 FACE_DETECTION_MODEL = os.path.join(AI_MODELS_PATH, 'face_detection')
 FACE_MESH_MODEL = os.path.join(AI_MODELS_PATH, 'face_mesh')
 EYEWEAR_RECOMMENDATION_MODEL = os.path.join(AI_MODELS_PATH, 'eyewear_recommendation')
+DLIB_SHAPE_PREDICTOR_PATH = os.getenv('DLIB_SHAPE_PREDICTOR_PATH',
+                                      os.path.join(AI_MODELS_PATH, 'shape_predictor_68_face_landmarks.dat'))
+# Load the dlib models at startup instead of on the first dlib request
+DLIB_PRELOAD = os.getenv('DLIB_PRELOAD', 'False') == 'True'
+
+# Face detection configuration
+# Number of FaceMesh instances per worker process (0 = one per CPU core)
+FACE_MESH_POOL_SIZE = int(os.getenv('FACE_MESH_POOL_SIZE', 0))
+FACE_MESH_POOL_TIMEOUT = float(os.getenv('FACE_MESH_POOL_TIMEOUT', 30))
+# Seconds before an idle live scan session's tracking FaceMesh is released
+FACE_MESH_SESSION_IDLE_TIMEOUT = float(os.getenv('FACE_MESH_SESSION_IDLE_TIMEOUT', 60))
+# Maximum number of tracking FaceMesh sessions per worker process; the least
+# recently used idle session is evicted beyond it (0 = no limit)
+FACE_MESH_MAX_SESSIONS = int(os.getenv('FACE_MESH_MAX_SESSIONS', 32))
+# Coarse-to-fine detection for large images: find the face box on a copy
+# downscaled to COARSE_DETECTION_MAX_SIDE, then mesh a crop padded by
+# FACE_CROP_PADDING and resized to FACE_CROP_RESOLUTION
+COARSE_TO_FINE_DETECTION = os.getenv('COARSE_TO_FINE_DETECTION', 'True') == 'True'
+COARSE_TO_FINE_MIN_SIDE = int(os.getenv('COARSE_TO_FINE_MIN_SIDE', 1280))
+COARSE_DETECTION_MAX_SIDE = int(os.getenv('COARSE_DETECTION_MAX_SIDE', 640))
+FACE_CROP_PADDING = float(os.getenv('FACE_CROP_PADDING', 0.35))
+FACE_CROP_RESOLUTION = int(os.getenv('FACE_CROP_RESOLUTION', 512))
+# Live scan convergence: stop a session once the median of the last
+# SCAN_CONVERGENCE_WINDOW frames has a standard error below the tolerance
+SCAN_CONVERGENCE_ENABLED = os.getenv('SCAN_CONVERGENCE_ENABLED', 'True') == 'True'
+SCAN_CONVERGENCE_WINDOW = int(os.getenv('SCAN_CONVERGENCE_WINDOW', 15))
+SCAN_CONVERGENCE_MIN_FRAMES = int(os.getenv('SCAN_CONVERGENCE_MIN_FRAMES', 5))
+SCAN_CONVERGENCE_TOLERANCE_MM = float(os.getenv('SCAN_CONVERGENCE_TOLERANCE_MM', 0.5))
+# Maximum number of faces measured by multi-face detection
+MULTI_FACE_MAX_FACES = int(os.getenv('MULTI_FACE_MAX_FACES', 6))
+# Live scan backpressure: keep only the newest pending frame of a session
+LIVE_SCAN_LATEST_FRAME_ONLY = os.getenv('LIVE_SCAN_LATEST_FRAME_ONLY', 'True') == 'True'
+# Frame gate: rejects blurred, badly exposed or face-less frames before the mesh
+FRAME_GATE_ENABLED = os.getenv('FRAME_GATE_ENABLED', 'True') == 'True'
+FRAME_GATE_MAX_SIDE = int(os.getenv('FRAME_GATE_MAX_SIDE', 320))
+FRAME_GATE_MIN_SHARPNESS = float(os.getenv('FRAME_GATE_MIN_SHARPNESS', 50))
+FRAME_GATE_MIN_BRIGHTNESS = float(os.getenv('FRAME_GATE_MIN_BRIGHTNESS', 40))
+FRAME_GATE_MAX_BRIGHTNESS = float(os.getenv('FRAME_GATE_MAX_BRIGHTNESS', 220))
+FRAME_GATE_DETECTOR = os.getenv('FRAME_GATE_DETECTOR', 'True') == 'True'
+FRAME_GATE_MIN_FACE_FRACTION = float(os.getenv('FRAME_GATE_MIN_FACE_FRACTION', 0.05))
+# Result cache for re-submitted images, keyed by user or session and an
+# image hash (perceptual hashes match the session's recent frames inexactly)
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True') == 'True'
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 256))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 300))
+RESULT_CACHE_HASH_SIZE = int(os.getenv('RESULT_CACHE_HASH_SIZE', 16))
+RESULT_CACHE_MAX_DISTANCE = int(os.getenv('RESULT_CACHE_MAX_DISTANCE', 8))
+RESULT_CACHE_NEAREST_CANDIDATES = int(os.getenv('RESULT_CACHE_NEAREST_CANDIDATES', 4))
+# Per-stage timing: fraction of requests traced (0 = off) and whether
+# traced responses carry a Server-Timing header
+TIMING_SAMPLE_RATE = float(os.getenv('TIMING_SAMPLE_RATE', 0))
+TIMING_SERVER_TIMING_HEADER = os.getenv('TIMING_SERVER_TIMING_HEADER', 'False') == 'True'
+# Run CPU-bound scan work in eventlet's native thread pool instead of the
+# green thread (optional pool size, defaults to eventlet's 20 threads)
+SCAN_OFFLOAD = os.getenv('SCAN_OFFLOAD', 'True') == 'True'
+SCAN_OFFLOAD_THREADS = int(os.getenv('SCAN_OFFLOAD_THREADS', 0)) or None
+# Worker processes for detection (0 = run detection in the web worker).
+# Not started when the server runs as `python app.py`; use a WSGI server.
+DETECTION_WORKERS = int(os.getenv('DETECTION_WORKERS', 0))
+DETECTION_TIMEOUT = float(os.getenv('DETECTION_TIMEOUT', 60))
+# Batch scan processing: most scans per request and decode/detect threads
+# (0 = one per CPU core)
+BATCH_PROCESS_MAX_SCANS = int(os.getenv('BATCH_PROCESS_MAX_SCANS', 100))
+BATCH_PROCESS_THREADS = int(os.getenv('BATCH_PROCESS_THREADS', 0))
 
 # Cache configuration
 CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
 CACHE_DEFAULT_TIMEOUT = 300
 
+# Socket.IO message queue shared by all web and worker processes so room
+# emits reach clients connected to any process, e.g. redis://localhost:6379/1
+# or memory:// (kombu, in-process only) to exercise the queue without Redis.
+# Unset = events stay in-process (required for the Socket.IO test client).
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'flask-socketio')
+
+# Scan progress events: protocol 2 coalesces a scan's processing_update
+# events within the flush interval (seconds) into one message; terminal
+# updates are sent immediately. Protocol 1 emits every update on its own and
+# is the default: clients handling each status as its own event (the web
+# client's RealtimeFaceAnalysis and SocketContext) miss coalesced steps.
+PROGRESS_EVENTS_PROTOCOL = int(os.getenv('PROGRESS_EVENTS_PROTOCOL', '1'))
+PROGRESS_FLUSH_INTERVAL = float(os.getenv('PROGRESS_FLUSH_INTERVAL', '0.25'))
+
 # Celery configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 
+# Scan job queue: uploads are processed by Celery workers
+# (celery -A celery_worker.celery worker). Off by default since uploads are
+# rejected while the broker is unreachable; clients then process scans with
+# /process/<scan_id>. JOB_QUEUE_EAGER runs jobs inline in the web process,
+# e.g. for tests or development without a broker.
+JOB_QUEUE_ENABLED = os.getenv('JOB_QUEUE_ENABLED', 'False') == 'True'
+JOB_QUEUE_EAGER = os.getenv('JOB_QUEUE_EAGER', 'False') == 'True'
+JOB_QUEUE_NAME = os.getenv('JOB_QUEUE_NAME', 'scans')
+
 # API Rate limiting
 RATELIMIT_DEFAULT = "200 per day, 50 per hour"
 RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
@@ -1,11 +1,16 @@
 from models.user import User
 from models.measurement import Measurement, FaceAnalysis
+from models.scan import Scan, ScanContent
+from models.scan_job import ScanJob
 from models.product import Product, Order, OrderItem, FrameShape, FrameMaterial, LensType, OrderStatus
 
 __all__ = [
     'User', 
     'Measurement', 
     'FaceAnalysis',
+    'Scan',
+    'ScanContent',
+    'ScanJob',
     'Product', 
     'Order', 
     'OrderItem',
@@ -0,0 +1,49 @@
+import json
+from models.base import BaseModel
+from config.database import db
+
+class ScanContent(BaseModel):
+    """Model for a stored face scan image, shared by every scan with the same content."""
+    
+    __tablename__ = 'scan_contents'
+    
+    sha256 = db.Column(db.String(64), unique=True, index=True, nullable=False)
+    format = db.Column(db.String(10))
+    size = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)  # Scans referencing the content
+    detection_result = db.Column(db.Text)  # JSON string of the face detection result
+    
+    # Relationships
+    scans = db.relationship('Scan', back_populates='content', lazy='dynamic')
+    
+    @property
+    def detection_result_dict(self):
+        """Convert JSON string to dictionary."""
+        if self.detection_result:
+            return json.loads(self.detection_result)
+        return None
+    
+    @detection_result_dict.setter
+    def detection_result_dict(self, result):
+        """Convert dictionary to JSON string."""
+        self.detection_result = json.dumps(result, default=float)
+    
+    def __repr__(self):
+        return f'<ScanContent {self.sha256[:12]} ({self.ref_count} refs)>'
+
+class Scan(BaseModel):
+    """Model indexing an uploaded face scan by its scan ID."""
+    
+    __tablename__ = 'scans'
+    
+    scan_id = db.Column(db.String(64), unique=True, index=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    content_id = db.Column(db.Integer, db.ForeignKey('scan_contents.id'), nullable=False)
+    
+    # Relationships
+    content = db.relationship('ScanContent', back_populates='scans')
+    
+    def __repr__(self):
+        return f'<Scan {self.scan_id} for User {self.user_id}>'
@@ -0,0 +1,31 @@
+from models.base import BaseModel
+from config.database import db
+
+class ScanJob(BaseModel):
+    """Model tracking the background processing of an uploaded face scan."""
+    
+    __tablename__ = 'scan_jobs'
+    
+    # Job states
+    QUEUED = 'queued'
+    PROCESSING = 'processing'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    scan_id = db.Column(db.String(64), unique=True, index=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    task_id = db.Column(db.String(64))
+    state = db.Column(db.String(20), default=QUEUED, nullable=False)
+    step = db.Column(db.String(50))  # Latest processing_update status
+    analyze = db.Column(db.Boolean, default=False)
+    measurement_id = db.Column(db.Integer, db.ForeignKey('measurements.id'))
+    analysis_id = db.Column(db.Integer, db.ForeignKey('face_analyses.id'))
+    error = db.Column(db.Text)
+    
+    @property
+    def finished(self):
+        """Whether the job completed or failed."""
+        return self.state in (self.COMPLETED, self.FAILED)
+    
+    def __repr__(self):
+        return f'<ScanJob {self.scan_id} ({self.state}) for User {self.user_id}>'
@@ -1,9 +1,10 @@
-from utils.face_detection import detect_face, extract_measurements
+from utils.face_detection import detect_face, extract_measurements, extract_measurements_batch
 from utils.face_analysis import analyze_face, determine_face_shape, predict_face_shape_from_image
 
 __all__ = [
     'detect_face', 
     'extract_measurements', 
+    'extract_measurements_batch',
     'analyze_face', 
     'determine_face_shape',
     'predict_face_shape_from_image'
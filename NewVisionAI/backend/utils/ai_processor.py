@@ -14,12 +14,17 @@ import logging
 from functools import lru_cache
 from flask import current_app
 
+from utils.timing import timed
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Global model registry
 _models = {}
 
+# Side of the square input of the face shape classifier
+FACE_SHAPE_INPUT_SIZE = 224
+
 def get_model_path(model_name):
     """
     Get the path to an AI model based on configuration.
@@ -97,6 +102,7 @@ def unload_model(model_name=None):
     # Clear TF memory
     tf.keras.backend.clear_session()
 
+@timed('predict_face_shape')
 def predict_face_shape(image_data):
     """
     Predict face shape from an image.
@@ -127,7 +133,7 @@ def predict_face_shape(image_data):
             image = image_data
         
         # Resize to model input size
-        preprocessed_image = cv2.resize(image, (224, 224))
+        preprocessed_image = cv2.resize(image, (FACE_SHAPE_INPUT_SIZE, FACE_SHAPE_INPUT_SIZE))
         preprocessed_image = preprocessed_image / 255.0  # Normalize
         preprocessed_image = np.expand_dims(preprocessed_image, axis=0)  # Add batch dimension
         
@@ -0,0 +1,273 @@
+"""
+Detection Executor
+
+This module runs face detection and measurement extraction in a pool of
+worker processes so a single web worker can use every core. Frames are
+handed to the workers through multiprocessing shared memory instead of
+being pickled, and callers get a concurrent.futures.Future back.
+
+Workers are spawned, not forked, and have no Flask app: the detection
+settings of the app config are passed to them explicitly when the pool
+starts. Spawned workers re-import the parent's __main__ module, so the pool
+is not started when the server runs as `python app.py`, which creates the
+app at import time; detection then runs inline. Run the server under a
+WSGI server (e.g. gunicorn app:app) to use detection workers.
+"""
+
+import os
+import sys
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from flask import current_app
+
+from utils.timing import span
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Per-process executor, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+# App config entries used by face detection in the worker processes
+WORKER_SETTINGS = (
+    'COARSE_TO_FINE_DETECTION',
+    'COARSE_TO_FINE_MIN_SIDE',
+    'COARSE_DETECTION_MAX_SIDE',
+    'FACE_CROP_PADDING',
+    'FACE_CROP_RESOLUTION',
+    'FACE_MESH_POOL_TIMEOUT'
+)
+
+# Module creating the app at import time; spawned workers must not import it
+APP_MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# Whether the pool was skipped because app.py runs as __main__
+_skipped_for_main = False
+
+def _init_worker(settings):
+    """
+    Initialize a detection worker process.
+    
+    Args:
+        settings: Face detection settings of the app config
+    """
+    from utils.face_detection import configure_settings
+    
+    # Each worker process runs one frame at a time, so one graph is enough
+    configure_settings(dict(settings, FACE_MESH_POOL_SIZE=1))
+
+def _main_is_app_module():
+    """Check whether app.py runs as __main__ (spawned workers would re-run it)."""
+    main_path = getattr(sys.modules.get('__main__'), '__file__', None)
+    return main_path is not None and os.path.abspath(main_path) == APP_MODULE_PATH
+
+def _detect_in_worker(shm_name, shape, dtype, is_rgb, measure=True, face_box=None):
+    """
+    Run detection on a frame stored in shared memory (worker side).
+    
+    Args:
+        shm_name: Name of the shared memory block holding the frame
+        shape: Shape of the frame array
+        dtype: Data type of the frame array
+        is_rgb: True if the frame is in RGB order
+        measure: Extract the measurements (None is returned otherwise)
+        face_box: Optional face box already found in the frame
+    
+    Returns:
+        Tuple (face_detected, face_data, measurements)
+    """
+    from utils.face_detection import detect_face_from_array, extract_measurements
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame = None
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        face_detected, face_data = detect_face_from_array(frame, is_rgb=is_rgb, face_box=face_box)
+    finally:
+        # Drop the view before the buffer is closed
+        frame = None
+        shm.close()
+    
+    if not face_detected:
+        return False, None, None
+    
+    return True, face_data, extract_measurements(face_data) if measure else None
+
+def _detect_inline(frame, is_rgb, measure=True, face_box=None):
+    """Run detection in the calling thread."""
+    from utils.face_detection import detect_face_from_array, extract_measurements
+    
+    face_detected, face_data = detect_face_from_array(frame, is_rgb=is_rgb, face_box=face_box)
+    if not face_detected:
+        return False, None, None
+    
+    return True, face_data, extract_measurements(face_data) if measure else None
+
+def _release_shared_memory(shm):
+    """Close and unlink a shared memory block once its job is done."""
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to release shared memory {shm.name}: {str(e)}")
+
+class DetectionExecutor:
+    """Process pool that runs face detection on shared memory frames."""
+    
+    def __init__(self, max_workers=None, settings=None):
+        """
+        Create an executor.
+        
+        Args:
+            max_workers: Number of worker processes (defaults to the CPU count)
+            settings: Face detection settings passed to the workers, e.g.
+                the WORKER_SETTINGS entries of the app config
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Spawn rather than fork: the parent may be running eventlet or threads
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(dict(settings or {}),)
+        )
+    
+    def submit(self, frame, is_rgb=False, measure=True, face_box=None):
+        """
+        Submit a frame for detection and measurement extraction.
+        
+        Args:
+            frame: Image as numpy array (BGR unless is_rgb is set)
+            is_rgb: True if the frame is already in RGB order
+            measure: Extract the measurements; callers measuring many faces
+                at once with extract_measurements_batch can skip it
+            face_box: Optional face box already found in the frame, e.g. by
+                the frame gate (see detect_face_from_array)
+        
+        Returns:
+            Future resolving to (face_detected, face_data, measurements)
+        """
+        frame = np.ascontiguousarray(frame)
+        shm = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+        try:
+            # Single copy into shared memory; the worker reads it in place
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[...] = frame
+            future = self._pool.submit(
+                _detect_in_worker, shm.name, frame.shape, frame.dtype.str, is_rgb, measure, face_box
+            )
+        except Exception:
+            _release_shared_memory(shm)
+            raise
+        
+        future.add_done_callback(lambda _: _release_shared_memory(shm))
+        return future
+    
+    def shutdown(self, wait=True):
+        """
+        Shut down the worker processes.
+        
+        Args:
+            wait: Wait for pending jobs to finish
+        """
+        self._pool.shutdown(wait=wait)
+
+def get_detection_executor():
+    """
+    Get the detection executor for this process, creating it on first use.
+    
+    Returns:
+        DetectionExecutor, or None if DETECTION_WORKERS is 0 or app.py runs
+        as __main__ (run inline)
+    """
+    global _executor, _skipped_for_main
+    
+    if _executor is None:
+        if current_app:
+            workers = current_app.config.get('DETECTION_WORKERS', 0)
+            settings = {name: current_app.config[name] for name in WORKER_SETTINGS
+                        if name in current_app.config}
+        else:
+            # Fallback for testing or non-Flask environments
+            workers = int(os.getenv('DETECTION_WORKERS', 0))
+            settings = {}
+        
+        if workers <= 0 or _skipped_for_main:
+            return None
+        
+        with _executor_lock:
+            if _executor is None:
+                if _main_is_app_module():
+                    logger.error("Detection workers are not started when app.py runs as __main__; "
+                                 "running detection inline. Run the app under a WSGI server instead.")
+                    _skipped_for_main = True
+                    return None
+                
+                logger.info(f"Starting detection executor with {workers} workers")
+                _executor = DetectionExecutor(max_workers=workers, settings=settings)
+    
+    return _executor
+
+def shutdown_detection_executor(wait=True):
+    """
+    Shut down the process executor if it was started.
+    
+    Args:
+        wait: Wait for pending jobs to finish
+    """
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+def submit_detection(frame, is_rgb=False, measure=True, face_box=None):
+    """
+    Detect a face and extract measurements, in a worker process if enabled.
+    
+    When no executor is configured the work runs inline and an already
+    completed future is returned, so callers can always wait on the result.
+    
+    Args:
+        frame: Image as numpy array (BGR unless is_rgb is set)
+        is_rgb: True if the frame is already in RGB order
+        measure: Extract the measurements (the future's measurements are
+            None otherwise)
+        face_box: Optional face box already found in the frame, e.g. by
+            the frame gate (see detect_face_from_array)
+    
+    Returns:
+        Future resolving to (face_detected, face_data, measurements)
+    """
+    executor = get_detection_executor()
+    if executor is not None:
+        return executor.submit(frame, is_rgb=is_rgb, measure=measure, face_box=face_box)
+    
+    future = Future()
+    try:
+        future.set_result(_detect_inline(frame, is_rgb, measure, face_box))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def wait_for_detection(future):
+    """
+    Wait for a detection job, timing the wait as the detection stage.
+    
+    Args:
+        future: Future returned by submit_detection(), or of a thread
+            running a detection
+    
+    Returns:
+        The detection result, e.g. tuple (face_detected, face_data, measurements)
+    """
+    with span('detection'):
+        return future.result(timeout=current_app.config.get('DETECTION_TIMEOUT'))
@@ -0,0 +1,145 @@
+"""
+dlib Model Registry
+
+This module loads the dlib face detector and shape predictor once per
+process and shares them between requests. Models are loaded lazily on first
+use, or up front with preload_dlib_models() at startup.
+
+dlib does not document its models as thread-safe, and detection runs in
+offload, batch and executor threads. Every thread therefore gets its own
+frontal face detector (cheap to create, its model is built into dlib),
+while the shape predictor, loaded from a large file, is shared and called
+through predict_shape(), which serializes its calls.
+"""
+
+import os
+import logging
+import threading
+import dlib
+from flask import current_app
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default shape predictor file name (68 point model)
+SHAPE_PREDICTOR_FILENAME = 'shape_predictor_68_face_landmarks.dat'
+
+# Global model registry
+_models = {}
+_models_lock = threading.Lock()
+
+# Serializes calls to the shared shape predictor
+_predictor_lock = threading.Lock()
+
+# Per-thread face detectors, tagged with the registry generation so
+# unload_dlib_models() also drops them
+_thread_models = threading.local()
+_generation = 0
+
+def get_shape_predictor_path():
+    """
+    Get the path to the dlib shape predictor model based on configuration.
+    
+    Returns:
+        Path to the shape predictor .dat file
+    """
+    if current_app:
+        path = current_app.config.get('DLIB_SHAPE_PREDICTOR_PATH')
+    else:
+        # Fallback for testing or non-Flask environments
+        path = os.getenv('DLIB_SHAPE_PREDICTOR_PATH')
+    
+    return path or SHAPE_PREDICTOR_FILENAME
+
+def _load(key, loader):
+    """Load a model once per key, guarding against concurrent loads."""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            logger.info(f"Loading dlib model: {key}")
+            model = loader()
+            _models[key] = model
+    
+    return model
+
+def get_face_detector():
+    """
+    Get the calling thread's dlib frontal face detector.
+    
+    Returns:
+        dlib frontal face detector, only to be used by the calling thread
+    """
+    detector = getattr(_thread_models, 'face_detector', None)
+    if detector is None or _thread_models.generation != _generation:
+        detector = dlib.get_frontal_face_detector()
+        _thread_models.face_detector = detector
+        _thread_models.generation = _generation
+    return detector
+
+def get_shape_predictor():
+    """
+    Get the shared dlib 68 point shape predictor.
+    
+    Predictors are cached by the absolute path of their model file, so a
+    changed DLIB_SHAPE_PREDICTOR_PATH loads the new model.
+    
+    Returns:
+        dlib shape predictor
+    
+    Raises:
+        FileNotFoundError: If the model file doesn't exist
+    """
+    model_path = get_shape_predictor_path()
+    
+    def loader():
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Shape predictor model not found at {model_path}")
+        return dlib.shape_predictor(model_path)
+    
+    return _load(os.path.abspath(model_path), loader)
+
+def predict_shape(image, face):
+    """
+    Run the shared shape predictor on a face.
+    
+    Args:
+        image: Image as numpy array
+        face: dlib face rectangle
+    
+    Returns:
+        dlib full_object_detection with the 68 landmarks
+    
+    Raises:
+        FileNotFoundError: If the model file doesn't exist
+    """
+    predictor = get_shape_predictor()
+    with _predictor_lock:
+        return predictor(image, face)
+
+def preload_dlib_models():
+    """
+    Load the dlib models up front so the first request doesn't pay for it.
+    
+    Returns:
+        True if both models were loaded, False if the shape predictor is missing
+    """
+    get_face_detector()
+    try:
+        get_shape_predictor()
+    except FileNotFoundError as e:
+        logger.warning(f"dlib shape predictor not preloaded: {str(e)}")
+        return False
+    return True
+
+def unload_dlib_models():
+    """Unload the dlib models to free up resources."""
+    global _models, _generation
+    
+    with _models_lock:
+        _models = {}
+        _generation += 1
+    logger.info("Unloaded dlib models")
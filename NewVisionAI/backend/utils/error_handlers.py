@@ -139,4 +139,31 @@ def api_route(route_function):
                 extra_data=extra_data
             )
     
-    return wrapper 
\ No newline at end of file
+    return wrapper 
+
+def admin_required(route_function):
+    """
+    Decorator restricting a route to authenticated admin users.
+    
+    Args:
+        route_function: The route handler function to wrap
+    
+    Returns:
+        Wrapped function requiring a valid JWT of a user with is_admin set
+    
+    Raises:
+        AuthorizationError: If the user is not an admin
+    """
+    @functools.wraps(route_function)
+    def wrapper(*args, **kwargs):
+        # Imported here to keep this module free of app dependencies
+        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        from models import User
+        
+        verify_jwt_in_request()
+        user = User.query.get(get_jwt_identity())
+        if user is None or not user.is_admin:
+            raise AuthorizationError('Admin access required')
+        return route_function(*args, **kwargs)
+    
+    return wrapper
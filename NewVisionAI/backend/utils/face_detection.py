@@ -2,18 +2,62 @@ import os
 import numpy as np
 import cv2
 import math
+from collections.abc import Mapping
 from flask import current_app
 import mediapipe as mp
 import dlib  # Added for alternative implementation
+import threading
+from functools import partial
+from utils.face_mesh_pool import FaceMeshPool
+from utils.face_mesh_sessions import FaceMeshSessions
+from utils.dlib_models import get_face_detector, predict_shape
+from utils.timing import span, timed
 
-# Initialize MediaPipe Face Mesh
+# MediaPipe Face Mesh and (lightweight) Face Detection
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=True,
-    max_num_faces=1,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+mp_face_detection = mp.solutions.face_detection
+
+# Options for the pooled (static image) FaceMesh instances
+FACE_MESH_OPTIONS = {
+    'static_image_mode': True,
+    'max_num_faces': 1,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5
+}
+
+# Options for per-session FaceMesh instances used by live scans. Tracking
+# mode reuses the previous frame's landmarks instead of detecting again.
+TRACKING_FACE_MESH_OPTIONS = {
+    **FACE_MESH_OPTIONS,
+    'static_image_mode': False
+}
+
+# Default number of faces found by multi-face detection
+MULTI_FACE_MAX_FACES = 6
+
+# Options for the face box detector used by coarse-to-fine detection.
+# The full-range model also finds faces that are small in the frame.
+FACE_BOX_DETECTION_OPTIONS = {
+    'model_selection': 1,
+    'min_detection_confidence': 0.5
+}
+
+# Per-worker pool of FaceMesh instances, created on first use
+_face_mesh_pool = None
+_face_mesh_pool_lock = threading.Lock()
+
+# Per-worker pool of face box detectors, created on first use
+_face_box_detector_pool = None
+
+# Per-worker pool of multi-face FaceMesh instances, created on first use
+_multi_face_mesh_pool = None
+
+# Per-worker registry of tracking FaceMesh sessions, created on first use
+_face_mesh_sessions = None
+
+# Settings given explicitly to processes without a Flask app, e.g. the
+# detection worker processes (see configure_settings)
+_settings = {}
 
 # Key landmarks for measurements
 # These indices are based on the MediaPipe Face Mesh landmarks
@@ -33,45 +77,302 @@ RIGHT_EYEBROW = 334
 TOP_SKULL = 10
 FOREHEAD_CENTER = 151
 
-def detect_face(image_path):
+# Number of landmarks produced by MediaPipe Face Mesh
+NUM_LANDMARKS = 468
+
+# Landmark index pairs for every distance used by extract_measurements.
+# All of them are evaluated together in a single vectorized pass.
+MEASUREMENT_PAIRS = np.array([
+    (LEFT_TEMPLE, RIGHT_TEMPLE),         # 0: face width (temple to temple)
+    (LEFT_EYE_INNER, RIGHT_EYE_INNER),   # 1: pupillary distance / bridge width
+    (LEFT_EYE_OUTER, LEFT_TEMPLE),       # 2: left temple length
+    (RIGHT_EYE_OUTER, RIGHT_TEMPLE),     # 3: right temple length
+    (LEFT_EYE_INNER, LEFT_EYE_OUTER),    # 4: left lens width
+    (RIGHT_EYE_INNER, RIGHT_EYE_OUTER),  # 5: right lens width
+    (LEFT_EYEBROW, LEFT_CHEEK),          # 6: left lens height
+    (RIGHT_EYEBROW, RIGHT_CHEEK),        # 7: right lens height
+    (FOREHEAD_CENTER, CHIN_BOTTOM),      # 8: face height
+], dtype=np.intp)
+
+# Names of the measurements returned by extract_measurements, in order
+MEASUREMENT_NAMES = (
+    'pupillary_distance',
+    'bridge_width',
+    'temple_length',
+    'lens_width',
+    'lens_height',
+    'frame_width',
+    'face_width',
+    'face_height'
+)
+
+# Average adult face width (temple to temple) used for pixel to mm conversion
+AVERAGE_FACE_WIDTH_MM = 140
+
+class LandmarkView(Mapping):
     """
-    Detect face in an image and extract landmarks.
+    Read-only ``{idx: (x, y, z)}`` view over a landmark array.
+    
+    Keeps the dictionary interface callers relied on while the landmarks
+    themselves stay in a contiguous (468, 3) float32 array. Entries are only
+    materialized when they are accessed.
+    """
+    
+    __slots__ = ('points',)
+    
+    def __init__(self, points):
+        self.points = points
+    
+    def __getitem__(self, idx):
+        if not isinstance(idx, (int, np.integer)) or not 0 <= idx < len(self.points):
+            raise KeyError(idx)
+        x, y, z = self.points[idx]
+        return (int(x), int(y), float(z))
+    
+    def __iter__(self):
+        return iter(range(len(self.points)))
+    
+    def __len__(self):
+        return len(self.points)
+
+def landmarks_to_array(face_landmarks, width, height):
+    """
+    Convert MediaPipe normalized landmarks to a pixel coordinate array.
     
     Args:
-        image_path: Path to the image file
+        face_landmarks: MediaPipe NormalizedLandmarkList for one face
+        width: Width of the image in pixels
+        height: Height of the image in pixels
         
     Returns:
-        Tuple (face_detected, face_data)
-            face_detected: Boolean indicating if a face was detected
-            face_data: Dictionary with face landmark coordinates if face detected
+        Contiguous (468, 3) float32 array of (x, y, z); x and y are in pixels,
+        z keeps MediaPipe's normalized depth
     """
-    # Read image
-    image = cv2.imread(image_path)
-    if image is None:
-        return False, None
+    with span('landmarks'):
+        landmark_list = face_landmarks.landmark
+        points = np.fromiter(
+            (value for landmark in landmark_list
+             for value in (landmark.x, landmark.y, landmark.z)),
+            dtype=np.float32,
+            count=len(landmark_list) * 3
+        ).reshape(-1, 3)
+        
+        # Normalized to pixel coordinates in one operation
+        points *= np.array([width, height, 1], dtype=np.float32)
+    return points
+
+def configure_settings(settings):
+    """
+    Set face detection settings for a process without a Flask app.
     
-    # Convert to RGB
-    image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    Args:
+        settings: Dictionary of setting names and values; they take
+            precedence over the environment
+    """
+    _settings.update(settings)
+
+def _get_setting(name, default):
+    """
+    Get a face detection setting from the app config, the settings given to
+    configure_settings() or the environment.
     
-    # Process with MediaPipe
-    results = face_mesh.process(image_rgb)
+    Args:
+        name: Name of the setting
+        default: Default value, also used to convert environment values
+        
+    Returns:
+        The configured value
+    """
+    if current_app:
+        return current_app.config.get(name, default)
+    if name in _settings:
+        return _settings[name]
+    
+    # Fallback for testing or non-Flask environments
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value == 'True'
+    return type(default)(value)
+
+def get_face_mesh_pool():
+    """
+    Get the worker's FaceMesh pool, creating it on first use.
     
-    if not results.multi_face_landmarks:
-        return False, None
+    The pool size and checkout timeout come from the FACE_MESH_POOL_SIZE and
+    FACE_MESH_POOL_TIMEOUT settings.
     
-    # Get image dimensions
-    height, width, _ = image.shape
+    Returns:
+        FaceMeshPool instance shared by this worker process
+    """
+    global _face_mesh_pool
+    
+    if _face_mesh_pool is None:
+        with _face_mesh_pool_lock:
+            if _face_mesh_pool is None:
+                _face_mesh_pool = FaceMeshPool(
+                    partial(mp_face_mesh.FaceMesh, **FACE_MESH_OPTIONS),
+                    size=_get_setting('FACE_MESH_POOL_SIZE', 0) or os.cpu_count() or 1,
+                    timeout=_get_setting('FACE_MESH_POOL_TIMEOUT', 30.0)
+                )
+    
+    return _face_mesh_pool
+
+def get_face_box_detector_pool():
+    """
+    Get the worker's pool of MediaPipe face box detectors.
+    
+    Sized like the FaceMesh pool since every pooled mesh pass may be
+    preceded by a face box detection.
     
-    # Extract face landmarks
-    face_landmarks = results.multi_face_landmarks[0]
-    landmarks = {}
+    Returns:
+        FaceMeshPool instance holding FaceDetection graphs
+    """
+    global _face_box_detector_pool
+    
+    if _face_box_detector_pool is None:
+        with _face_mesh_pool_lock:
+            if _face_box_detector_pool is None:
+                _face_box_detector_pool = FaceMeshPool(
+                    partial(mp_face_detection.FaceDetection, **FACE_BOX_DETECTION_OPTIONS),
+                    size=_get_setting('FACE_MESH_POOL_SIZE', 0) or os.cpu_count() or 1,
+                    timeout=_get_setting('FACE_MESH_POOL_TIMEOUT', 30.0)
+                )
+    
+    return _face_box_detector_pool
+
+def get_multi_face_mesh_pool():
+    """
+    Get the worker's pool of FaceMesh instances that find several faces.
     
-    for idx, landmark in enumerate(face_landmarks.landmark):
-        # Convert normalized coordinates to pixel coordinates
-        x = int(landmark.x * width)
-        y = int(landmark.y * height)
-        z = landmark.z
-        landmarks[idx] = (x, y, z)
+    The number of faces per pass comes from the MULTI_FACE_MAX_FACES setting.
+    
+    Returns:
+        FaceMeshPool instance shared by this worker process
+    """
+    global _multi_face_mesh_pool
+    
+    if _multi_face_mesh_pool is None:
+        with _face_mesh_pool_lock:
+            if _multi_face_mesh_pool is None:
+                options = {
+                    **FACE_MESH_OPTIONS,
+                    'max_num_faces': _get_setting('MULTI_FACE_MAX_FACES', MULTI_FACE_MAX_FACES)
+                }
+                _multi_face_mesh_pool = FaceMeshPool(
+                    partial(mp_face_mesh.FaceMesh, **options),
+                    size=_get_setting('FACE_MESH_POOL_SIZE', 0) or os.cpu_count() or 1,
+                    timeout=_get_setting('FACE_MESH_POOL_TIMEOUT', 30.0)
+                )
+    
+    return _multi_face_mesh_pool
+
+def get_face_mesh_sessions():
+    """
+    Get the worker's registry of tracking FaceMesh sessions.
+    
+    Idle sessions are released after FACE_MESH_SESSION_IDLE_TIMEOUT seconds,
+    and at most FACE_MESH_MAX_SESSIONS sessions are kept.
+    
+    Returns:
+        FaceMeshSessions instance shared by this worker process
+    """
+    global _face_mesh_sessions
+    
+    if _face_mesh_sessions is None:
+        with _face_mesh_pool_lock:
+            if _face_mesh_sessions is None:
+                _face_mesh_sessions = FaceMeshSessions(
+                    partial(mp_face_mesh.FaceMesh, **TRACKING_FACE_MESH_OPTIONS),
+                    idle_timeout=_get_setting('FACE_MESH_SESSION_IDLE_TIMEOUT', 60.0),
+                    max_sessions=_get_setting('FACE_MESH_MAX_SESSIONS', 32)
+                )
+    
+    return _face_mesh_sessions
+
+def load_image(source):
+    """
+    Decode an image source into a BGR numpy array.
+    
+    The source is decoded exactly once and never re-encoded, so frames that
+    are already in memory (socket frames, upload buffers) skip the disk
+    round trip entirely.
+    
+    Args:
+        source: Image as a numpy array, raw encoded bytes (bytes, bytearray
+            or memoryview), a file-like object, or a path to an image file
+        
+    Returns:
+        Image as numpy array (BGR format), or None if it could not be decoded
+    """
+    if source is None:
+        return None
+    
+    # Already decoded - use as-is
+    if isinstance(source, np.ndarray):
+        return source
+    
+    # Raw encoded buffer - decode straight from memory without copying
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = np.frombuffer(source, dtype=np.uint8)
+        if buffer.size == 0:
+            return None
+        with span('imdecode'):
+            return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    
+    # File-like object such as an uploaded file stream
+    if hasattr(source, 'read'):
+        return load_image(source.read())
+    
+    # Fall back to reading from a path on disk
+    with span('imdecode'):
+        return cv2.imread(os.fspath(source))
+
+def _to_rgb(image, is_rgb=False):
+    """Convert an OpenCV BGR image to RGB unless it already is RGB."""
+    if not is_rgb and image.dtype == np.uint8:
+        with span('color_conversion'):
+            return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return image
+
+def _run_face_mesh(image_rgb, session_id=None):
+    """
+    Run MediaPipe Face Mesh on an RGB image.
+    
+    Args:
+        image_rgb: Image as numpy array (RGB format)
+        session_id: Optional live scan session id; uses the session's
+            tracking FaceMesh instead of a pooled one
+        
+    Returns:
+        MediaPipe Face Mesh results
+    """
+    if session_id is not None:
+        # Process with the session's tracking FaceMesh
+        with get_face_mesh_sessions().acquire(session_id) as face_mesh:
+            if face_mesh is not None:
+                with span('face_mesh'):
+                    return face_mesh.process(image_rgb)
+        # Every tracking session is busy: process this frame without tracking
+    
+    # Process with a FaceMesh instance checked out from the pool
+    with get_face_mesh_pool().acquire() as face_mesh, span('face_mesh'):
+        return face_mesh.process(image_rgb)
+
+def _build_face_data(points, width, height):
+    """
+    Build the face data dictionary from a landmark pixel array.
+    
+    Args:
+        points: (468, 3) landmark array in full image pixel coordinates
+        width: Width of the image in pixels
+        height: Height of the image in pixels
+        
+    Returns:
+        Dictionary with face landmark data
+    """
+    landmarks = LandmarkView(points)
     
     # Calculate face orientation from landmarks
     orientation = calculate_face_orientation(landmarks)
@@ -79,14 +380,266 @@ def detect_face(image_path):
     # Calculate face center
     face_center = calculate_face_center(landmarks)
     
-    return True, {
+    return {
         'landmarks': landmarks,
+        'landmark_array': points,
         'image_width': width,
         'image_height': height,
         'orientation': orientation,
         'face_center': face_center
     }
 
+def _process_face_mesh(image_rgb, width, height, session_id=None):
+    """
+    Run MediaPipe Face Mesh on an RGB image and build the face data.
+    
+    Args:
+        image_rgb: Image as numpy array (RGB format)
+        width: Width of the image in pixels
+        height: Height of the image in pixels
+        session_id: Optional live scan session id; uses the session's
+            tracking FaceMesh instead of a pooled one
+        
+    Returns:
+        Tuple (face_detected, face_data)
+    """
+    results = _run_face_mesh(image_rgb, session_id=session_id)
+    
+    if not results.multi_face_landmarks:
+        return False, None
+    
+    # Extract face landmarks as a (468, 3) pixel coordinate array
+    points = landmarks_to_array(results.multi_face_landmarks[0], width, height)
+    
+    return True, _build_face_data(points, width, height)
+
+def _resize_to_max_side(image, max_side):
+    """
+    Downscale an image so its longest side is at most max_side.
+    
+    Returns:
+        Tuple (resized_image, scale); images that are already small enough
+        are returned unchanged with a scale of 1.0
+    """
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return image, 1.0
+    
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+def detect_face_boxes(image_array, is_rgb=False, max_side=None):
+    """
+    Find face bounding boxes with the lightweight MediaPipe face detector.
+    
+    Detection runs on a downscaled copy; the boxes are returned in the
+    coordinates of the full resolution image.
+    
+    Args:
+        image_array: Image as numpy array (BGR unless is_rgb is set)
+        is_rgb: True if the array is already in RGB order
+        max_side: Longest side of the downscaled copy, defaults to the
+            COARSE_DETECTION_MAX_SIDE setting
+        
+    Returns:
+        List of (x, y, width, height, score) tuples sorted by score, highest
+        first; coordinates are clamped to the image
+    """
+    if max_side is None:
+        max_side = _get_setting('COARSE_DETECTION_MAX_SIDE', 640)
+    
+    height, width = image_array.shape[:2]
+    
+    # Downscale before converting so the color conversion is cheap too
+    small, _ = _resize_to_max_side(image_array, max_side)
+    small_rgb = _to_rgb(small, is_rgb)
+    
+    with get_face_box_detector_pool().acquire() as detector:
+        results = detector.process(small_rgb)
+    
+    if not results.detections:
+        return []
+    
+    boxes = []
+    for detection in results.detections:
+        box = detection.location_data.relative_bounding_box
+        x0 = min(max(box.xmin * width, 0), width)
+        y0 = min(max(box.ymin * height, 0), height)
+        x1 = min(max((box.xmin + box.width) * width, 0), width)
+        y1 = min(max((box.ymin + box.height) * height, 0), height)
+        if x1 > x0 and y1 > y0:
+            boxes.append((int(x0), int(y0), int(x1 - x0), int(y1 - y0), float(detection.score[0])))
+    
+    boxes.sort(key=lambda box: box[4], reverse=True)
+    return boxes
+
+def _crop_region(box, width, height, padding):
+    """
+    Get a padded, square crop region around a face box.
+    
+    Args:
+        box: (x, y, width, height, ...) face box in pixels
+        width: Width of the image in pixels
+        height: Height of the image in pixels
+        padding: Padding on each side as a fraction of the box size
+        
+    Returns:
+        Tuple (x0, y0, x1, y1) clamped to the image
+    """
+    x, y, box_width, box_height = box[:4]
+    center_x = x + box_width / 2
+    center_y = y + box_height / 2
+    half_side = max(box_width, box_height) * (1 + 2 * padding) / 2
+    
+    x0 = int(max(0, center_x - half_side))
+    y0 = int(max(0, center_y - half_side))
+    x1 = int(min(width, center_x + half_side))
+    y1 = int(min(height, center_y + half_side))
+    return x0, y0, x1, y1
+
+def _mesh_face_region(image_array, region, is_rgb=False, resolution=None):
+    """
+    Run Face Mesh on a crop of the image and map landmarks back.
+    
+    Args:
+        image_array: Full resolution image as numpy array
+        region: (x0, y0, x1, y1) crop region in pixels
+        is_rgb: True if the array is already in RGB order
+        resolution: Longest side of the crop passed to Face Mesh, defaults
+            to the FACE_CROP_RESOLUTION setting
+        
+    Returns:
+        (468, 3) landmark array in full resolution pixel coordinates, or
+        None if no face was found in the crop
+    """
+    if resolution is None:
+        resolution = _get_setting('FACE_CROP_RESOLUTION', 512)
+    
+    height, width = image_array.shape[:2]
+    x0, y0, x1, y1 = region
+    crop, _ = _resize_to_max_side(image_array[y0:y1, x0:x1], resolution)
+    
+    results = _run_face_mesh(_to_rgb(crop, is_rgb))
+    if not results.multi_face_landmarks:
+        return None
+    
+    # Landmarks are normalized to the crop: scale to the crop's full
+    # resolution size, then shift by the crop origin. Depth is normalized
+    # to the crop width, so rescale it to the image width.
+    crop_width = x1 - x0
+    points = landmarks_to_array(results.multi_face_landmarks[0], crop_width, y1 - y0)
+    points += np.array([x0, y0, 0], dtype=np.float32)
+    points[:, 2] *= crop_width / width
+    return points
+
+def _detect_face_coarse_to_fine(image_array, is_rgb=False, face_box=None):
+    """
+    Two-stage detection for large images.
+    
+    First finds the face box on a downscaled copy, then runs Face Mesh on a
+    padded crop around it at a fixed working resolution.
+    
+    Args:
+        image_array: Full resolution image as numpy array
+        is_rgb: True if the array is already in RGB order
+        face_box: Optional face box already found in the image; skips the
+            first stage
+        
+    Returns:
+        Tuple (face_detected, face_data)
+    """
+    height, width = image_array.shape[:2]
+    
+    if face_box is None:
+        boxes = detect_face_boxes(image_array, is_rgb=is_rgb)
+        if not boxes:
+            return False, None
+        face_box = boxes[0]
+    
+    region = _crop_region(face_box, width, height, _get_setting('FACE_CROP_PADDING', 0.35))
+    points = _mesh_face_region(image_array, region, is_rgb=is_rgb)
+    if points is None:
+        return False, None
+    
+    return True, _build_face_data(points, width, height)
+
+def detect_faces_from_array(image_array, is_rgb=False):
+    """
+    Detect every face in an image array and measure them all.
+    
+    Runs one multi-face Face Mesh pass, then extracts the measurements of
+    all faces in a single vectorized call. Faces are indexed left to right
+    so the same person keeps the same index across frames of a static group.
+    
+    Args:
+        image_array: Numpy array containing the image
+        is_rgb: True if the array is already in RGB order
+        
+    Returns:
+        List of dictionaries, one per face, each with 'index',
+        'bounding_box' (x, y, width, height in pixels) and 'measurements'
+    """
+    if image_array is None or len(image_array.shape) != 3 or image_array.shape[2] != 3:
+        return []
+    
+    height, width = image_array.shape[:2]
+    
+    with get_multi_face_mesh_pool().acquire() as face_mesh:
+        results = face_mesh.process(_to_rgb(image_array, is_rgb))
+    
+    if not results.multi_face_landmarks:
+        return []
+    
+    # (N, 468, 3) landmark tensor in pixel coordinates
+    points = np.stack([landmarks_to_array(face_landmarks, width, height)
+                       for face_landmarks in results.multi_face_landmarks])
+    
+    # Order faces left to right for stable indices
+    mins = points[:, :, :2].min(axis=1)
+    maxs = points[:, :, :2].max(axis=1)
+    order = np.argsort((mins[:, 0] + maxs[:, 0]) / 2, kind='stable')
+    points, mins, maxs = points[order], mins[order], maxs[order]
+    
+    measurements = measurement_rows(extract_measurements_batch(points))
+    
+    faces = []
+    for index in range(len(points)):
+        x0, y0 = np.clip(mins[index], 0, (width, height))
+        x1, y1 = np.clip(maxs[index], 0, (width, height))
+        faces.append({
+            'index': index,
+            'bounding_box': {
+                'x': int(x0),
+                'y': int(y0),
+                'width': int(x1 - x0),
+                'height': int(y1 - y0)
+            },
+            'measurements': measurements[index]
+        })
+    
+    return faces
+
+def detect_face(image_source):
+    """
+    Detect face in an image and extract landmarks.
+    
+    Args:
+        image_source: Path to the image file, raw encoded image bytes,
+            a file-like object or an already decoded BGR numpy array
+        
+    Returns:
+        Tuple (face_detected, face_data)
+            face_detected: Boolean indicating if a face was detected
+            face_data: Dictionary with face landmark coordinates if face detected
+    """
+    # Decode image (once)
+    image = load_image(image_source)
+    if image is None or image.size == 0:
+        return False, None
+    
+    return detect_face_from_array(image)
+
 # Alternative implementation using dlib
 def detect_face_dlib(image):
     """
@@ -98,7 +651,8 @@ def detect_face_dlib(image):
     Returns:
         List of detected face rectangles
     """
-    detector = dlib.get_frontal_face_detector()
+    # The calling thread's own detector (dlib models are not shared across threads)
+    detector = get_face_detector()
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     faces = detector(gray)
     return faces
@@ -171,6 +725,100 @@ def calculate_face_center(landmarks):
     
     return (int(x), int(y))
 
+def _landmark_points(face_data):
+    """
+    Get the landmark array for face data, building it from a dict if needed.
+    
+    Landmarks missing from a plain dictionary are filled with NaN so the
+    measurements that depend on them come out as None.
+    """
+    points = face_data.get('landmark_array')
+    if points is not None:
+        return points
+    
+    landmarks = face_data['landmarks']
+    if isinstance(landmarks, LandmarkView):
+        return landmarks.points
+    
+    size = max(NUM_LANDMARKS, max(landmarks, default=-1) + 1)
+    points = np.full((size, 3), np.nan, dtype=np.float32)
+    for idx, point in landmarks.items():
+        points[idx, :len(point)] = point[:3]
+    return points
+
+def _pair_mean(left, right):
+    """Average left/right values, falling back to whichever side is available."""
+    return np.where(np.isnan(left), right,
+                    np.where(np.isnan(right), left, (left + right) / 2))
+
+def compute_measurement_arrays(points, scale=None):
+    """
+    Compute eyewear measurements from landmark pixel coordinates.
+    
+    Works on a single face (468, 3) or on any leading batch dimensions
+    (..., 468, 3). Every distance is computed from MEASUREMENT_PAIRS in one
+    NumPy pass.
+    
+    Args:
+        points: Array of landmark coordinates with shape (..., L, >=2)
+        scale: Optional (..., 2) array of (width, height) used to convert
+            normalized coordinates to pixels. Only the landmarks that are
+            actually measured get scaled.
+        
+    Returns:
+        Dictionary mapping measurement name to a float64 array of shape (...)
+        in millimeters; NaN where a measurement is unavailable
+    """
+    points = np.asarray(points)
+    start = points[..., MEASUREMENT_PAIRS[:, 0], :2].astype(np.float64)
+    end = points[..., MEASUREMENT_PAIRS[:, 1], :2].astype(np.float64)
+    if scale is not None:
+        scale = np.asarray(scale, dtype=np.float64)[..., np.newaxis, :]
+        start *= scale
+        end *= scale
+    distances = np.sqrt(np.sum((end - start) ** 2, axis=-1))
+    
+    # Approximate conversion factor (pixels to mm) based on average face width.
+    # This is a critical part that needs calibration in a real application
+    face_width_pixels = distances[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pixel_to_mm = np.where(face_width_pixels > 0,
+                               AVERAGE_FACE_WIDTH_MM / face_width_pixels, np.nan)
+    distances_mm = distances * pixel_to_mm[..., np.newaxis]
+    
+    # Pupillary distance and bridge width both use the inner eye corners
+    pupillary_distance = distances_mm[..., 1]
+    bridge_width = distances_mm[..., 1]
+    
+    # Use average of left and right if both are available
+    temple_length = _pair_mean(distances_mm[..., 2], distances_mm[..., 3])
+    lens_width = _pair_mean(distances_mm[..., 4], distances_mm[..., 5])
+    # Scale factor for lens height (eyebrow to cheek)
+    lens_height = _pair_mean(distances_mm[..., 6], distances_mm[..., 7]) * 0.7
+    
+    # Usually PD + lens width + bridge width, falling back to temple to temple
+    frame_width = pupillary_distance + lens_width + bridge_width
+    frame_width = np.where(np.isnan(frame_width), distances_mm[..., 0] * 0.9, frame_width)
+    
+    return {
+        'pupillary_distance': pupillary_distance,
+        'bridge_width': bridge_width,
+        'temple_length': temple_length,
+        'lens_width': lens_width,
+        'lens_height': lens_height,
+        'frame_width': frame_width,
+        'face_width': distances_mm[..., 0],
+        'face_height': distances_mm[..., 8]
+    }
+
+def _round_measurement(value):
+    """Round a measurement to 0.1mm, mapping missing values to None."""
+    value = float(value)
+    if math.isnan(value) or not value:
+        return None
+    return round(value, 1)
+
+@timed('extract_measurements')
 def extract_measurements(face_data):
     """
     Extract eyewear measurements from face data.
@@ -184,159 +832,71 @@ def extract_measurements(face_data):
     if not face_data or 'landmarks' not in face_data:
         return {}
     
-    landmarks = face_data['landmarks']
+    points = _landmark_points(face_data)
+    if len(points) <= MEASUREMENT_PAIRS.max():
+        return {}
     
-    # Get pixel to mm conversion factor
-    # This would ideally be calibrated based on a reference object
-    # For now, we'll use an approximate factor based on average face width
-    # Average adult male face width is around 140mm
-    left_temple = landmarks.get(LEFT_TEMPLE)
-    right_temple = landmarks.get(RIGHT_TEMPLE)
+    measurements = compute_measurement_arrays(points)
     
-    if not left_temple or not right_temple:
+    # Temples are required for the pixel to mm conversion
+    if math.isnan(measurements['face_width']):
         return {}
     
-    face_width_pixels = math.sqrt((right_temple[0] - left_temple[0])**2 + 
-                                 (right_temple[1] - left_temple[1])**2)
-    
-    # Approximate conversion factor (pixels to mm)
-    # This is a critical part that needs calibration in a real application
-    pixel_to_mm = 140 / face_width_pixels
-    
-    # Calculate pupillary distance (PD)
-    left_eye_inner = landmarks.get(LEFT_EYE_INNER)
-    right_eye_inner = landmarks.get(RIGHT_EYE_INNER)
-    
-    if left_eye_inner and right_eye_inner:
-        pd_pixels = math.sqrt((right_eye_inner[0] - left_eye_inner[0])**2 + 
-                             (right_eye_inner[1] - left_eye_inner[1])**2)
-        pupillary_distance = pd_pixels * pixel_to_mm
-    else:
-        pupillary_distance = None
-    
-    # Calculate bridge width
-    # Distance between inner eyes
-    if left_eye_inner and right_eye_inner:
-        bridge_pixels = math.sqrt((right_eye_inner[0] - left_eye_inner[0])**2 + 
-                                 (right_eye_inner[1] - left_eye_inner[1])**2)
-        bridge_width = bridge_pixels * pixel_to_mm
-    else:
-        bridge_width = None
-    
-    # Calculate temple length (approximate)
-    # From eye outer corner to ear (approximated)
-    left_eye_outer = landmarks.get(LEFT_EYE_OUTER)
-    right_eye_outer = landmarks.get(RIGHT_EYE_OUTER)
-    
-    if left_eye_outer and left_temple:
-        left_temple_pixels = math.sqrt((left_temple[0] - left_eye_outer[0])**2 + 
-                                      (left_temple[1] - left_eye_outer[1])**2)
-        left_temple_length = left_temple_pixels * pixel_to_mm
-    else:
-        left_temple_length = None
-    
-    if right_eye_outer and right_temple:
-        right_temple_pixels = math.sqrt((right_temple[0] - right_eye_outer[0])**2 + 
-                                       (right_temple[1] - right_eye_outer[1])**2)
-        right_temple_length = right_temple_pixels * pixel_to_mm
-    else:
-        right_temple_length = None
+    return {name: _round_measurement(measurements[name]) for name in MEASUREMENT_NAMES}
+
+def extract_measurements_batch(landmarks, image_sizes=None):
+    """
+    Extract eyewear measurements for many faces in one vectorized call.
     
-    # Use average of left and right if both are available
-    if left_temple_length and right_temple_length:
-        temple_length = (left_temple_length + right_temple_length) / 2
-    else:
-        temple_length = left_temple_length or right_temple_length
-    
-    # Calculate lens width (approximate)
-    # Distance from inner to outer eye
-    if left_eye_inner and left_eye_outer:
-        left_lens_pixels = math.sqrt((left_eye_outer[0] - left_eye_inner[0])**2 + 
-                                    (left_eye_outer[1] - left_eye_inner[1])**2)
-        left_lens_width = left_lens_pixels * pixel_to_mm
-    else:
-        left_lens_width = None
-    
-    if right_eye_inner and right_eye_outer:
-        right_lens_pixels = math.sqrt((right_eye_outer[0] - right_eye_inner[0])**2 + 
-                                     (right_eye_outer[1] - right_eye_inner[1])**2)
-        right_lens_width = right_lens_pixels * pixel_to_mm
-    else:
-        right_lens_width = None
+    Args:
+        landmarks: (N, 468, 3) array of landmarks. Coordinates are normalized
+            when image_sizes is given, otherwise they are already in pixels.
+        image_sizes: Optional (N, 2) array of per-face (width, height), or a
+            single (width, height) shared by every face
+        
+    Returns:
+        Dictionary mapping each measurement name to a float64 column of
+        shape (N,) in millimeters, rounded to 0.1mm; NaN where a measurement
+        could not be extracted
     
-    # Use average of left and right if both are available
-    if left_lens_width and right_lens_width:
-        lens_width = (left_lens_width + right_lens_width) / 2
-    else:
-        lens_width = left_lens_width or right_lens_width
-    
-    # Calculate lens height (approximate)
-    # Distance from eyebrow to cheek
-    left_eyebrow = landmarks.get(LEFT_EYEBROW)
-    left_cheek = landmarks.get(LEFT_CHEEK)
-    right_eyebrow = landmarks.get(RIGHT_EYEBROW)
-    right_cheek = landmarks.get(RIGHT_CHEEK)
-    
-    if left_eyebrow and left_cheek:
-        left_height_pixels = math.sqrt((left_cheek[0] - left_eyebrow[0])**2 + 
-                                      (left_cheek[1] - left_eyebrow[1])**2)
-        left_lens_height = left_height_pixels * pixel_to_mm * 0.7  # Scale factor for lens height
-    else:
-        left_lens_height = None
-    
-    if right_eyebrow and right_cheek:
-        right_height_pixels = math.sqrt((right_cheek[0] - right_eyebrow[0])**2 + 
-                                       (right_cheek[1] - right_eyebrow[1])**2)
-        right_lens_height = right_height_pixels * pixel_to_mm * 0.7  # Scale factor for lens height
-    else:
-        right_lens_height = None
+    Raises:
+        ValueError: If the input shapes are invalid
+    """
+    points = np.asarray(landmarks)
+    if points.ndim != 3 or points.shape[-1] < 2:
+        raise ValueError('landmarks must have shape (N, num_landmarks, 3)')
+    if points.shape[1] <= MEASUREMENT_PAIRS.max():
+        raise ValueError(f'landmarks must contain at least {MEASUREMENT_PAIRS.max() + 1} points per face')
+    
+    scale = None
+    if image_sizes is not None:
+        sizes = np.asarray(image_sizes, dtype=np.float64)
+        if sizes.shape not in ((2,), (len(points), 2)):
+            raise ValueError('image_sizes must have shape (2,) or (N, 2)')
+        scale = np.broadcast_to(sizes, (len(points), 2))
+    
+    measurements = compute_measurement_arrays(points, scale=scale)
+    return {name: np.round(measurements[name], 1) for name in MEASUREMENT_NAMES}
+
+def measurement_rows(columns):
+    """
+    Convert columnar batch measurements into per-face dictionaries.
     
-    # Use average of left and right if both are available
-    if left_lens_height and right_lens_height:
-        lens_height = (left_lens_height + right_lens_height) / 2
-    else:
-        lens_height = left_lens_height or right_lens_height
-    
-    # Calculate total frame width
-    # Usually PD + 2 * lens width + bridge width
-    if pupillary_distance and lens_width and bridge_width:
-        frame_width = pupillary_distance + lens_width + bridge_width
-    else:
-        # Alternative calculation from temple to temple
-        if left_temple and right_temple:
-            frame_pixels = math.sqrt((right_temple[0] - left_temple[0])**2 + 
-                                    (right_temple[1] - left_temple[1])**2)
-            frame_width = frame_pixels * pixel_to_mm * 0.9  # Scale factor for frame width
+    Args:
+        columns: Result of extract_measurements_batch
+        
+    Returns:
+        List of measurement dictionaries in the extract_measurements format;
+        faces whose measurements could not be extracted map to {}
+    """
+    face_widths = columns['face_width']
+    rows = []
+    for idx in range(len(face_widths)):
+        if math.isnan(face_widths[idx]):
+            rows.append({})
         else:
-            frame_width = None
-    
-    # Calculate face height
-    forehead = landmarks.get(FOREHEAD_CENTER)
-    chin = landmarks.get(CHIN_BOTTOM)
-    
-    if forehead and chin:
-        face_height_pixels = math.sqrt((chin[0] - forehead[0])**2 + 
-                                      (chin[1] - forehead[1])**2)
-        face_height = face_height_pixels * pixel_to_mm
-    else:
-        face_height = None
-    
-    # Calculate face width (temple to temple)
-    if left_temple and right_temple:
-        face_width = face_width_pixels * pixel_to_mm
-    else:
-        face_width = None
-    
-    return {
-        'pupillary_distance': round(pupillary_distance, 1) if pupillary_distance else None,
-        'bridge_width': round(bridge_width, 1) if bridge_width else None,
-        'temple_length': round(temple_length, 1) if temple_length else None,
-        'lens_width': round(lens_width, 1) if lens_width else None,
-        'lens_height': round(lens_height, 1) if lens_height else None,
-        'frame_width': round(frame_width, 1) if frame_width else None,
-        'face_width': round(face_width, 1) if face_width else None,
-        'face_height': round(face_height, 1) if face_height else None
-    }
+            rows.append({name: _round_measurement(columns[name][idx]) for name in MEASUREMENT_NAMES})
+    return rows
 
 # Alternative implementation using dlib for measurement extraction
 def extract_measurements_dlib(face, image):
@@ -350,15 +910,13 @@ def extract_measurements_dlib(face, image):
     Returns:
         Dictionary with measurements
     """
-    # Check if shape predictor model file exists
-    model_path = "shape_predictor_68_face_landmarks.dat"
-    if not os.path.exists(model_path):
+    # Run the shared shape predictor (loaded once per process)
+    try:
+        landmarks = predict_shape(image, face)
+    except FileNotFoundError:
         # In real application, download or give instructions to download
         return {"error": "Shape predictor model file not found"}
     
-    predictor = dlib.shape_predictor(model_path)
-    landmarks = predictor(image, face)
-    
     # Example: Calculate pupillary distance (distance between eye centers)
     left_eye = landmarks.part(36)  # Left eye corner
     right_eye = landmarks.part(45)  # Right eye corner
@@ -376,12 +934,19 @@ def extract_measurements_dlib(face, image):
     
     return measurements 
 
-def detect_face_from_array(image_array):
+def detect_face_from_array(image_array, is_rgb=False, session_id=None, face_box=None):
     """
     Detect face in an image array.
     
     Args:
         image_array: Numpy array containing the image
+        is_rgb: True if the array is already in RGB order, in which case
+            no color conversion is performed
+        session_id: Optional live scan session id. Frames of a session are
+            tracked across calls instead of being detected from scratch.
+        face_box: Optional (x, y, width, height, ...) face box in pixels
+            already found in the image, e.g. by the frame gate; large
+            images then mesh its region without running the face detector
         
     Returns:
         Tuple (face_detected, face_data)
@@ -391,48 +956,20 @@ def detect_face_from_array(image_array):
     if image_array is None:
         return False, None
     
-    # Make sure image is in RGB
-    if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-        if isinstance(image_array[0, 0, 0], np.uint8):
-            # Likely a BGR image from OpenCV
-            image_rgb = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-        else:
-            # Assume it's already RGB
-            image_rgb = image_array
-    else:
-        # Unsupported format
-        return False, None
-    
-    # Process with MediaPipe
-    results = face_mesh.process(image_rgb)
-    
-    if not results.multi_face_landmarks:
+    # Unsupported format
+    if len(image_array.shape) != 3 or image_array.shape[2] != 3:
         return False, None
     
     # Get image dimensions
     height, width = image_array.shape[:2]
     
-    # Extract face landmarks
-    face_landmarks = results.multi_face_landmarks[0]
-    landmarks = {}
+    # Large still images: find the face on a small copy and mesh only the
+    # face region. Live sessions keep full frames for tracking.
+    if (session_id is None and _get_setting('COARSE_TO_FINE_DETECTION', True)
+            and max(height, width) > _get_setting('COARSE_TO_FINE_MIN_SIDE', 1280)):
+        return _detect_face_coarse_to_fine(image_array, is_rgb=is_rgb, face_box=face_box)
     
-    for idx, landmark in enumerate(face_landmarks.landmark):
-        # Convert normalized coordinates to pixel coordinates
-        x = int(landmark.x * width)
-        y = int(landmark.y * height)
-        z = landmark.z
-        landmarks[idx] = (x, y, z)
+    # Make sure image is in RGB (BGR images come from OpenCV)
+    image_rgb = _to_rgb(image_array, is_rgb)
     
-    # Calculate face orientation from landmarks
-    orientation = calculate_face_orientation(landmarks)
-    
-    # Calculate face center
-    face_center = calculate_face_center(landmarks)
-    
-    return True, {
-        'landmarks': landmarks,
-        'image_width': width,
-        'image_height': height,
-        'orientation': orientation,
-        'face_center': face_center
-    } 
\ No newline at end of file
+    return _process_face_mesh(image_rgb, width, height, session_id=session_id)
@@ -0,0 +1,128 @@
+"""
+Face Mesh Pool
+
+This module provides a bounded pool of MediaPipe FaceMesh instances.
+A FaceMesh graph must not be used by two threads at the same time, so each
+request checks out its own instance and returns it when done. Instances are
+created lazily up to the configured size and reused afterwards.
+"""
+
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class FaceMeshPool:
+    """Bounded pool of FaceMesh instances with checkout/return semantics."""
+    
+    def __init__(self, factory, size=1, timeout=None):
+        """
+        Create a pool.
+        
+        Args:
+            factory: Callable that creates a new FaceMesh instance
+            size: Maximum number of instances the pool will create
+            timeout: Default number of seconds to wait for a free instance
+                (None waits forever)
+        """
+        if size < 1:
+            raise ValueError('Face mesh pool size must be at least 1')
+        
+        self.size = size
+        self.timeout = timeout
+        self._factory = factory
+        # LIFO so the most recently used (warm) instance is handed out first
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def created(self):
+        """Number of instances created so far."""
+        return self._created
+    
+    @property
+    def available(self):
+        """Number of idle instances ready for checkout."""
+        return self._idle.qsize()
+    
+    def checkout(self, timeout=None):
+        """
+        Check out a FaceMesh instance, creating one if the pool is not full.
+        
+        Args:
+            timeout: Seconds to wait for a free instance, defaults to the
+                pool timeout
+        
+        Returns:
+            A FaceMesh instance that must be passed back to checkin()
+        
+        Raises:
+            TimeoutError: If no instance became available in time
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        
+        if can_create:
+            try:
+                logger.debug(f"Creating FaceMesh instance {self._created}/{self.size}")
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f'No FaceMesh instance available after {timeout} seconds')
+    
+    def checkin(self, face_mesh):
+        """
+        Return a checked out instance to the pool.
+        
+        Args:
+            face_mesh: Instance previously returned by checkout()
+        """
+        self._idle.put(face_mesh)
+    
+    @contextmanager
+    def acquire(self, timeout=None):
+        """
+        Context manager that checks out an instance and always returns it.
+        
+        Args:
+            timeout: Seconds to wait for a free instance
+        """
+        face_mesh = self.checkout(timeout)
+        try:
+            yield face_mesh
+        finally:
+            self.checkin(face_mesh)
+    
+    def close(self):
+        """Close all idle instances and reset the pool."""
+        while True:
+            try:
+                face_mesh = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            
+            with self._lock:
+                self._created -= 1
+            
+            try:
+                face_mesh.close()
+            except Exception as e:
+                logger.warning(f"Failed to close FaceMesh instance: {str(e)}")
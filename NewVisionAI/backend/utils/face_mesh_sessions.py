@@ -0,0 +1,199 @@
+"""
+Face Mesh Sessions
+
+This module keeps one tracking-mode FaceMesh instance per live scan session
+(Socket.IO sid). In tracking mode MediaPipe reuses the landmarks from the
+previous frame instead of running full detection on every frame. A
+session's instance is created on its first frame and released explicitly on
+disconnect or after being idle for too long. The number of sessions is
+capped: when the cap is reached the least recently used idle session is
+evicted, and if every session is busy the frame is processed without
+tracking (the caller falls back to the shared pool).
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class _Session:
+    """FaceMesh instance bound to a single session."""
+    
+    __slots__ = ('face_mesh', 'lock', 'last_used')
+    
+    def __init__(self, face_mesh):
+        self.face_mesh = face_mesh
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+class FaceMeshSessions:
+    """Registry of per-session tracking FaceMesh instances."""
+    
+    def __init__(self, factory, idle_timeout=60, max_sessions=0):
+        """
+        Create a registry.
+        
+        Args:
+            factory: Callable that creates a new tracking FaceMesh instance
+            idle_timeout: Seconds after which an unused session is released
+            max_sessions: Maximum number of sessions (0 for no limit)
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._factory = factory
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._last_reap = time.monotonic()
+    
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+    
+    def __len__(self):
+        return len(self._sessions)
+    
+    def _is_full(self):
+        return bool(self.max_sessions) and len(self._sessions) >= self.max_sessions
+    
+    def _least_recently_used(self):
+        """Get the id of the least recently used session not processing a frame, if any."""
+        idle = [(session.last_used, session_id) for session_id, session in self._sessions.items()
+                if not session.lock.locked()]
+        return min(idle)[1] if idle else None
+    
+    def _get_session(self, session_id):
+        """
+        Get a session, creating its FaceMesh instance if needed.
+        
+        Returns:
+            The session, or None if the registry is full and every session
+            is processing a frame
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                return session
+            if self._is_full() and self._least_recently_used() is None:
+                return None
+        
+        # Build the graph outside the lock, it takes a while
+        logger.debug(f"Creating tracking FaceMesh for session {session_id}")
+        face_mesh = self._factory()
+        
+        evicted_id = evicted = None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and self._is_full():
+                evicted_id = self._least_recently_used()
+                if evicted_id is not None:
+                    evicted = self._sessions.pop(evicted_id)
+            if session is None and not self._is_full():
+                session = _Session(face_mesh)
+                self._sessions[session_id] = session
+                face_mesh = None
+            if session is not None:
+                session.last_used = time.monotonic()
+        
+        # Another frame of the session created it first, or the registry
+        # filled up meanwhile
+        if face_mesh is not None:
+            self._close(session_id, face_mesh)
+        if evicted is not None:
+            logger.info(f"Evicted tracking FaceMesh of session {evicted_id}")
+            with evicted.lock:
+                self._close(evicted_id, evicted.face_mesh)
+        return session
+    
+    @staticmethod
+    def _close(session_id, face_mesh):
+        try:
+            face_mesh.close()
+        except Exception as e:
+            logger.warning(f"Failed to close FaceMesh for session {session_id}: {str(e)}")
+    
+    @contextmanager
+    def acquire(self, session_id):
+        """
+        Context manager giving exclusive use of a session's FaceMesh.
+        
+        The instance is created on first use. Frames of the same session are
+        processed one at a time so the tracking state stays consistent.
+        Yields None if the registry is full and every session is busy; the
+        caller then processes the frame without tracking.
+        
+        Args:
+            session_id: Socket.IO session id
+        """
+        self.reap_idle()
+        
+        while True:
+            session = self._get_session(session_id)
+            if session is None:
+                yield None
+                return
+            with session.lock:
+                # The session may have been released while we were waiting
+                if self._sessions.get(session_id) is not session:
+                    continue
+                session.last_used = time.monotonic()
+                yield session.face_mesh
+                return
+    
+    def release(self, session_id):
+        """
+        Release the FaceMesh instance of a session.
+        
+        Args:
+            session_id: Socket.IO session id
+        
+        Returns:
+            True if a session was released
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        
+        if session is None:
+            return False
+        
+        # Wait for a frame that is still being processed
+        with session.lock:
+            self._close(session_id, session.face_mesh)
+        
+        return True
+    
+    def reap_idle(self, force=False):
+        """
+        Release sessions that have been idle longer than the idle timeout.
+        
+        Runs at most once per idle timeout period unless forced.
+        
+        Args:
+            force: Check all sessions regardless of when the last check ran
+        
+        Returns:
+            Number of sessions released
+        """
+        now = time.monotonic()
+        if not force and now - self._last_reap < self.idle_timeout:
+            return 0
+        self._last_reap = now
+        
+        with self._lock:
+            idle = [session_id for session_id, session in self._sessions.items()
+                    if now - session.last_used > self.idle_timeout and not session.lock.locked()]
+        
+        released = sum(1 for session_id in idle if self.release(session_id))
+        if released:
+            logger.info(f"Released {released} idle face mesh sessions")
+        return released
+    
+    def close(self):
+        """Release every session."""
+        with self._lock:
+            session_ids = list(self._sessions)
+        
+        for session_id in session_ids:
+            self.release(session_id)
@@ -0,0 +1,189 @@
+"""
+Frame Gate
+
+This module rejects frames that have no usable face before they reach
+Face Mesh. The checks run on a small grayscale copy of the frame and go
+from cheapest to most expensive: blur (variance of the Laplacian), exposure
+(mean brightness) and finally the lightweight MediaPipe face detector.
+The face box the detector found is returned with the verdict, scaled to
+the full frame, so the detection pipeline can mesh the face region without
+running the detector again. Counters record how many frames each check
+rejected.
+"""
+
+import logging
+import threading
+import cv2
+from flask import current_app
+
+from utils.face_detection import detect_face_boxes
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rejection reasons
+REJECT_BLUR = 'blurred'
+REJECT_EXPOSURE = 'bad_exposure'
+REJECT_NO_FACE = 'no_face'
+
+# Default thresholds
+DEFAULT_GATE_SETTINGS = {
+    'FRAME_GATE_ENABLED': True,
+    'FRAME_GATE_MAX_SIDE': 320,
+    'FRAME_GATE_MIN_SHARPNESS': 50.0,
+    'FRAME_GATE_MIN_BRIGHTNESS': 40.0,
+    'FRAME_GATE_MAX_BRIGHTNESS': 220.0,
+    'FRAME_GATE_DETECTOR': True,
+    'FRAME_GATE_MIN_FACE_FRACTION': 0.05
+}
+
+# Per-worker gate, created on first use
+_frame_gate = None
+_frame_gate_lock = threading.Lock()
+
+class FrameGate:
+    """Fast pre-filter that rejects frames without a usable face."""
+    
+    def __init__(self, max_side=320, min_sharpness=50.0, min_brightness=40.0,
+                 max_brightness=220.0, use_detector=True, min_face_fraction=0.05):
+        """
+        Create a gate.
+        
+        Args:
+            max_side: Longest side of the copy the checks run on
+            min_sharpness: Minimum variance of the Laplacian (blur check)
+            min_brightness: Minimum mean brightness (0-255)
+            max_brightness: Maximum mean brightness (0-255)
+            use_detector: Run the lightweight face detector as the last check
+            min_face_fraction: Minimum face box width as a fraction of the
+                frame width
+        """
+        self.max_side = max_side
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.use_detector = use_detector
+        self.min_face_fraction = min_face_fraction
+        
+        self._lock = threading.Lock()
+        self._counters = {}
+        self.reset_stats()
+    
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+    
+    def check(self, frame, is_rgb=False):
+        """
+        Check whether a frame is worth running Face Mesh on.
+        
+        Args:
+            frame: Image as numpy array (BGR unless is_rgb is set)
+            is_rgb: True if the frame is in RGB order
+        
+        Returns:
+            Tuple (accepted, reason, face_box); reason is None for accepted
+            frames, face_box is the (x, y, width, height, score) box of the
+            face in full frame pixels, or None if the detector didn't run
+        """
+        self._count('checked')
+        
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.max_side / max(height, width))
+        if scale < 1:
+            small = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        
+        if small.ndim == 3:
+            gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY if is_rgb else cv2.COLOR_BGR2GRAY)
+        else:
+            gray = small
+        
+        # Exposure check: too dark or too bright
+        brightness = float(gray.mean())
+        if not self.min_brightness <= brightness <= self.max_brightness:
+            return self._reject(REJECT_EXPOSURE)
+        
+        # Blur check: variance of the Laplacian
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if sharpness < self.min_sharpness:
+            return self._reject(REJECT_BLUR)
+        
+        # Face presence check with the lightweight detector. Faces that are
+        # out of frame, too small or turned too far are usually not found.
+        face_box = None
+        if self.use_detector and small.ndim == 3:
+            boxes = detect_face_boxes(small, is_rgb=is_rgb, max_side=self.max_side)
+            min_width = self.min_face_fraction * small.shape[1]
+            faces = [box for box in boxes if box[2] >= min_width]
+            if not faces:
+                return self._reject(REJECT_NO_FACE)
+            
+            # Boxes are sorted by score; scale the best one to the full frame
+            x, y, box_width, box_height, score = faces[0]
+            face_box = (int(x / scale), int(y / scale), int(box_width / scale),
+                        int(box_height / scale), score)
+        
+        self._count('accepted')
+        return True, None, face_box
+    
+    def _reject(self, reason):
+        self._count(reason)
+        return False, reason, None
+    
+    def stats(self):
+        """
+        Get the gate counters.
+        
+        Returns:
+            Dictionary with checked, accepted and per-reason rejected counts
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats['rejected'] = stats['checked'] - stats['accepted']
+        return stats
+    
+    def reset_stats(self):
+        """Reset the gate counters."""
+        with self._lock:
+            self._counters = {
+                'checked': 0,
+                'accepted': 0,
+                REJECT_BLUR: 0,
+                REJECT_EXPOSURE: 0,
+                REJECT_NO_FACE: 0
+            }
+
+def _gate_settings():
+    """Get the gate settings from the app config, falling back to defaults."""
+    config = current_app.config if current_app else {}
+    return {name: config.get(name, default) for name, default in DEFAULT_GATE_SETTINGS.items()}
+
+def get_frame_gate():
+    """
+    Get the worker's frame gate, creating it on first use.
+    
+    Returns:
+        FrameGate instance, or None if FRAME_GATE_ENABLED is off
+    """
+    global _frame_gate
+    
+    settings = _gate_settings()
+    if not settings['FRAME_GATE_ENABLED']:
+        return None
+    
+    if _frame_gate is None:
+        with _frame_gate_lock:
+            if _frame_gate is None:
+                _frame_gate = FrameGate(
+                    max_side=settings['FRAME_GATE_MAX_SIDE'],
+                    min_sharpness=settings['FRAME_GATE_MIN_SHARPNESS'],
+                    min_brightness=settings['FRAME_GATE_MIN_BRIGHTNESS'],
+                    max_brightness=settings['FRAME_GATE_MAX_BRIGHTNESS'],
+                    use_detector=settings['FRAME_GATE_DETECTOR'],
+                    min_face_fraction=settings['FRAME_GATE_MIN_FACE_FRACTION']
+                )
+    
+    return _frame_gate
@@ -0,0 +1,151 @@
+"""
+Frame Mailbox
+
+This module keeps live scanning latency bounded when a client sends frames
+faster than they can be processed. Each session has a single-slot mailbox:
+a new frame replaces the pending one instead of queueing behind it, so at
+most one frame waits while another is being processed and stale frames are
+dropped. Dropped frames are counted so the client can lower its capture
+rate.
+"""
+
+import threading
+from flask import current_app
+
+# Per-worker registry, created on first use
+_frame_mailboxes = None
+_frame_mailboxes_lock = threading.Lock()
+
+class FrameMailbox:
+    """Single-slot, latest-frame-wins mailbox for one live scan session."""
+    
+    def __init__(self):
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self._pending = None
+        self._busy = False
+        self._lock = threading.Lock()
+    
+    def put(self, frame):
+        """
+        Deliver a frame to the session.
+        
+        If no frame of the session is being processed the caller becomes
+        the consumer and must process the frame, then keep calling take()
+        until it returns None. Otherwise the frame replaces the pending one.
+        
+        Args:
+            frame: Frame message
+        
+        Returns:
+            True if the caller should process the frame now
+        """
+        with self._lock:
+            self.received += 1
+            if not self._busy:
+                self._busy = True
+                self.processed += 1
+                return True
+            
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = frame
+            return False
+    
+    def take(self):
+        """
+        Take the newest pending frame (consumer side).
+        
+        Returns:
+            The pending frame, or None if there is none; the caller then
+            stops being the consumer
+        """
+        with self._lock:
+            frame, self._pending = self._pending, None
+            if frame is None:
+                self._busy = False
+            else:
+                self.processed += 1
+            return frame
+    
+    def abandon(self):
+        """Stop consuming after an error, dropping the pending frame."""
+        with self._lock:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = None
+            self._busy = False
+    
+    def stats(self):
+        """
+        Get the session's frame counters.
+        
+        Returns:
+            Dictionary with received, processed and dropped frame counts
+        """
+        with self._lock:
+            return {
+                'received': self.received,
+                'processed': self.processed,
+                'dropped': self.dropped
+            }
+
+class FrameMailboxes:
+    """Registry of frame mailboxes keyed by live scan session id."""
+    
+    def __init__(self):
+        self._mailboxes = {}
+        self._lock = threading.Lock()
+    
+    def get(self, session_id):
+        """
+        Get the mailbox of a session, creating it if needed.
+        
+        Args:
+            session_id: Socket.IO session id
+        
+        Returns:
+            FrameMailbox for the session
+        """
+        with self._lock:
+            mailbox = self._mailboxes.get(session_id)
+            if mailbox is None:
+                mailbox = self._mailboxes[session_id] = FrameMailbox()
+            return mailbox
+    
+    def release(self, session_id):
+        """
+        Forget the mailbox of a session.
+        
+        Args:
+            session_id: Socket.IO session id
+        """
+        with self._lock:
+            self._mailboxes.pop(session_id, None)
+
+def get_frame_mailboxes():
+    """
+    Get the worker's frame mailbox registry.
+    
+    Returns:
+        FrameMailboxes instance, or None if LIVE_SCAN_LATEST_FRAME_ONLY is
+        off and every frame is processed in arrival order
+    """
+    global _frame_mailboxes
+    
+    if current_app:
+        enabled = current_app.config.get('LIVE_SCAN_LATEST_FRAME_ONLY', True)
+    else:
+        # Fallback for testing or non-Flask environments
+        enabled = True
+    
+    if not enabled:
+        return None
+    
+    if _frame_mailboxes is None:
+        with _frame_mailboxes_lock:
+            if _frame_mailboxes is None:
+                _frame_mailboxes = FrameMailboxes()
+    
+    return _frame_mailboxes
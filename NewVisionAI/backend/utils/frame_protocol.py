@@ -0,0 +1,153 @@
+"""
+Binary Frame Protocol
+
+This module decodes live scan frames sent as Socket.IO binary attachments.
+A frame message is a dictionary whose 'frame' entry holds the raw bytes and
+whose other entries form a small header:
+
+- Encoded images: {'frame': <JPEG/PNG/WebP bytes>, 'format': 'jpeg'}
+  The format is optional; it is sniffed from the magic bytes.
+- Raw pixels: {'frame': <pixel bytes>, 'format': 'rgba', 'width': 640,
+  'height': 480}
+  Supported pixel formats are gray, rgb, bgr, rgba and bgra, one byte per
+  channel, rows packed without padding (canvas getImageData layout).
+
+Buffers are wrapped with np.frombuffer without copying; the only copies
+made are the JPEG/PNG/WebP decode or the conversion to BGR.
+"""
+
+import cv2
+import numpy as np
+
+from utils.error_handlers import ValidationError
+
+# Encoded image formats and their magic bytes
+ENCODED_FORMATS = {
+    'jpeg': (b'\xFF\xD8\xFF',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'webp': (b'RIFF',)
+}
+
+# Raw pixel formats: channel count and conversion to BGR (None = already BGR)
+PIXEL_FORMATS = {
+    'gray': (1, cv2.COLOR_GRAY2BGR),
+    'rgb': (3, cv2.COLOR_RGB2BGR),
+    'bgr': (3, None),
+    'rgba': (4, cv2.COLOR_RGBA2BGR),
+    'bgra': (4, cv2.COLOR_BGRA2BGR)
+}
+
+# Format aliases accepted in the header
+FORMAT_ALIASES = {
+    'jpg': 'jpeg',
+    'image/jpeg': 'jpeg',
+    'image/jpg': 'jpeg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+    'grey': 'gray'
+}
+
+# Default largest accepted frame side in pixels
+MAX_FRAME_SIDE = 4000
+
+def is_binary_frame(frame):
+    """Check whether a frame payload is a binary attachment."""
+    return isinstance(frame, (bytes, bytearray, memoryview))
+
+def sniff_format(buffer):
+    """
+    Detect an encoded image format from its magic bytes.
+    
+    Args:
+        buffer: Encoded image bytes
+    
+    Returns:
+        'jpeg', 'png' or 'webp', or None if the format is not recognized
+    """
+    header = bytes(buffer[:12])
+    for name, signatures in ENCODED_FORMATS.items():
+        if any(header.startswith(signature) for signature in signatures):
+            if name == 'webp' and header[8:12] != b'WEBP':
+                continue
+            return name
+    return None
+
+def _header_int(data, name):
+    """Read a positive integer header field."""
+    try:
+        value = int(data[name])
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError(f'Raw frames need an integer {name}')
+    if value <= 0:
+        raise ValidationError(f'Invalid frame {name}')
+    return value
+
+def decode_raw_frame(buffer, pixel_format, width, height):
+    """
+    Wrap a raw pixel buffer as an image without copying it.
+    
+    Args:
+        buffer: Pixel bytes
+        pixel_format: One of PIXEL_FORMATS
+        width: Frame width in pixels
+        height: Frame height in pixels
+    
+    Returns:
+        Image as numpy array (BGR format); a read-only view of the buffer
+        for bgr frames
+    
+    Raises:
+        ValidationError: If the buffer does not match the header
+    """
+    channels, conversion = PIXEL_FORMATS[pixel_format]
+    pixels = np.frombuffer(buffer, dtype=np.uint8)
+    if pixels.size != width * height * channels:
+        raise ValidationError(
+            f'Frame buffer has {pixels.size} bytes, expected {width * height * channels} '
+            f'for {width}x{height} {pixel_format}')
+    
+    frame = pixels.reshape(height, width, channels)
+    if conversion is None:
+        return frame
+    return cv2.cvtColor(frame, conversion)
+
+def decode_binary_frame(data, max_side=MAX_FRAME_SIDE):
+    """
+    Decode a binary frame message.
+    
+    Args:
+        data: Message dictionary with the frame bytes under 'frame' and the
+            header fields described in the module docstring
+        max_side: Largest accepted frame width or height in pixels, checked
+            before decoding
+    
+    Returns:
+        Image as numpy array (BGR format)
+    
+    Raises:
+        ValidationError: If the header is invalid, the frame is too large or
+            it can't be decoded
+    """
+    buffer = data['frame']
+    if len(buffer) == 0:
+        raise ValidationError('Empty frame')
+    
+    frame_format = str(data.get('format') or '').lower()
+    frame_format = FORMAT_ALIASES.get(frame_format, frame_format)
+    
+    if frame_format in PIXEL_FORMATS:
+        width = _header_int(data, 'width')
+        height = _header_int(data, 'height')
+        if max_side and (width > max_side or height > max_side):
+            raise ValidationError('Image dimensions too large')
+        return decode_raw_frame(buffer, frame_format, width, height)
+    
+    # Encoded image: trust the magic bytes rather than the declared format
+    detected = sniff_format(buffer)
+    if detected is None or (frame_format and frame_format != detected):
+        raise ValidationError('Invalid image format. Only JPEG, PNG and WebP are allowed')
+    
+    # Imported here, image_decode builds on this module
+    from utils.image_decode import decode_image
+    
+    return decode_image(buffer, max_side=max_side).image
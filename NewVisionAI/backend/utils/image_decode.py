@@ -0,0 +1,220 @@
+"""
+Image Decoding
+
+This module decodes the JPEG, PNG and WebP images sent to the API, either as
+raw bytes or as base64 data URLs. Consumers that only need a small image,
+such as the face shape classifier with its 224x224 input, pass a target
+side: the dimensions are read from the image header and the image is
+decoded directly at 1/2, 1/4 or 1/8 scale (JPEG decoding skips the detail
+altogether) as long as its shorter side stays at or above the target.
+Images are decoded straight to RGB when the consumer wants RGB and the
+OpenCV build supports it.
+
+Every endpoint passes its own largest accepted side. It is checked against
+the header dimensions before imdecode allocates the bitmap; for data URLs
+the header is read from the leading base64 characters, before the whole
+payload is decoded.
+"""
+
+import base64
+import binascii
+
+import cv2
+import numpy as np
+
+from utils.error_handlers import ValidationError
+from utils.frame_protocol import sniff_format, FORMAT_ALIASES
+from utils.image_header import parse_dimensions, check_dimensions
+from utils.timing import span
+
+# imdecode flags by decode scale
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# Decoding to RGB directly needs OpenCV 4.10 or later
+IMREAD_COLOR_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+# Leading base64 characters of a data URL decoded to check the image header
+# (a multiple of 4; headers further in are checked after the full decode)
+HEADER_PEEK_CHARS = 4096
+
+class DecodedImage:
+    """An image decoded by decode_image()."""
+    
+    def __init__(self, image, image_format, width, height, scale, is_rgb):
+        self.image = image
+        self.format = image_format
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.is_rgb = is_rgb
+    
+    @property
+    def decoded_width(self):
+        return self.image.shape[1]
+    
+    @property
+    def decoded_height(self):
+        return self.image.shape[0]
+    
+    def to_dict(self):
+        """Describe the image for API responses."""
+        return {
+            'format': self.format,
+            'width': self.width,
+            'height': self.height,
+            'decoded_width': self.decoded_width,
+            'decoded_height': self.decoded_height,
+            'scale': self.scale
+        }
+
+def choose_scale(width, height, target_side):
+    """
+    Pick the largest decode scale keeping an image's shorter side at or above a target.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        target_side: Smallest acceptable shorter side in pixels, or None for
+            full resolution
+    
+    Returns:
+        Scale denominator: 1, 2, 4 or 8
+    """
+    if not target_side:
+        return 1
+    
+    for scale in (8, 4, 2):
+        if min(width, height) // scale >= target_side:
+            return scale
+    return 1
+
+def _imdecode_flags(scale, rgb):
+    """Get the imdecode flags of a scale, and whether they decode to RGB."""
+    flags = REDUCED_COLOR_FLAGS[scale]
+    if rgb and IMREAD_COLOR_RGB is not None:
+        return (flags & ~cv2.IMREAD_COLOR) | IMREAD_COLOR_RGB, True
+    return flags, False
+
+def decode_image(buffer, target_side=None, rgb=False, max_side=None,
+                 allowed_formats=('jpeg', 'png', 'webp')):
+    """
+    Decode an encoded image.
+    
+    Args:
+        buffer: Encoded image bytes
+        target_side: Optional shorter side the consumer needs; the image is
+            decoded at a reduced scale that still provides it
+        rgb: Return the image in RGB rather than BGR channel order
+        max_side: Optional largest accepted width or height in pixels,
+            checked from the header before decoding
+        allowed_formats: Accepted image formats
+    
+    Returns:
+        DecodedImage with the image and its original dimensions
+    
+    Raises:
+        ValidationError: If the buffer is not an allowed image, is too large
+            or can't be decoded
+    """
+    image_format = sniff_format(buffer)
+    if image_format is None or image_format not in allowed_formats:
+        raise ValidationError('Invalid image format. Only JPEG, PNG and WebP are allowed')
+    
+    dimensions = parse_dimensions(buffer, image_format)
+    if dimensions is None:
+        raise ValidationError('Invalid image data')
+    check_dimensions(dimensions, max_side)
+    width, height = dimensions
+    
+    scale = choose_scale(width, height, target_side)
+    flags, is_rgb = _imdecode_flags(scale, rgb)
+    with span('imdecode'):
+        image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), flags)
+    if image is None or image.size == 0:
+        raise ValidationError('Invalid image data')
+    
+    if rgb and not is_rgb:
+        with span('color_conversion'):
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    
+    return DecodedImage(image, image_format, width, height, scale, rgb)
+
+def split_data_url(data_url):
+    """
+    Split a base64 image data URL.
+    
+    Args:
+        data_url: 'data:image/<type>;base64,<data>' string
+    
+    Returns:
+        Tuple (declared MIME type, base64 data)
+    
+    Raises:
+        ValidationError: If the string is not a base64 image data URL
+    """
+    if not isinstance(data_url, str) or not data_url.startswith('data:image'):
+        raise ValidationError('Invalid image format. Must be a base64 encoded image.')
+    
+    header, _, encoded_data = data_url.partition(',')
+    return header[len('data:'):].split(';')[0].lower(), encoded_data
+
+def _peek_dimensions(encoded_data):
+    """Read the image dimensions from the leading base64 characters, if they hold them."""
+    try:
+        header = base64.b64decode(encoded_data[:HEADER_PEEK_CHARS])
+    except (binascii.Error, ValueError):
+        # E.g. line breaks shifted the padding; checked after the full decode
+        return None
+    
+    image_format = sniff_format(header)
+    if image_format is None:
+        return None
+    return parse_dimensions(header, image_format)
+
+def decode_data_url(data_url, target_side=None, rgb=False, max_side=None,
+                    allowed_formats=('jpeg', 'png', 'webp')):
+    """
+    Decode a base64 image data URL.
+    
+    Args:
+        data_url: 'data:image/<type>;base64,<data>' string
+        target_side: See decode_image()
+        rgb: See decode_image()
+        max_side: See decode_image()
+        allowed_formats: Accepted image formats; the declared type must
+            match the content
+    
+    Returns:
+        DecodedImage with the image and its original dimensions
+    
+    Raises:
+        ValidationError: If the data URL is invalid, the image is too large
+            or it can't be decoded
+    """
+    mime_type, encoded_data = split_data_url(data_url)
+    declared = FORMAT_ALIASES.get(mime_type, mime_type)
+    if declared not in allowed_formats:
+        raise ValidationError('Invalid image format. Only JPEG, PNG and WebP are allowed')
+    
+    # Reject oversized images before decoding the whole payload
+    if max_side:
+        dimensions = _peek_dimensions(encoded_data)
+        if dimensions is not None:
+            check_dimensions(dimensions, max_side)
+    
+    try:
+        with span('base64_decode'):
+            buffer = base64.b64decode(encoded_data)
+    except (binascii.Error, ValueError):
+        raise ValidationError('Invalid base64 image data')
+    
+    decoded = decode_image(buffer, target_side=target_side, rgb=rgb, max_side=max_side,
+                           allowed_formats=allowed_formats)
+    if decoded.format != declared:
+        raise ValidationError('Image content does not match its content type')
+    return decoded
@@ -0,0 +1,134 @@
+"""
+Image Header Parsing
+
+This module reads the pixel dimensions of JPEG, PNG and WebP images from
+their headers without decoding them, so oversized images (including
+decompression bombs, small files declaring huge bitmaps) can be rejected
+before any pixel memory is allocated. Parsers take the leading bytes of the
+file and report when more bytes are needed, so they can run on a stream.
+"""
+
+import struct
+
+from utils.error_handlers import ValidationError
+
+# JPEG start-of-frame markers carrying the image dimensions (every SOFn
+# except DHT, JPG and DAC, which share the range)
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# JPEG markers without a length field
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+
+# Bytes of header scanned for the JPEG frame header before giving up (EXIF
+# thumbnails and ICC profiles can push it well past the first kilobytes)
+MAX_HEADER_BYTES = 256 * 1024
+
+def _jpeg_dimensions(header):
+    offset = 2
+    while True:
+        # Skip fill bytes before the marker
+        while offset < len(header) and header[offset] == 0xFF:
+            offset += 1
+        if offset >= len(header):
+            return None
+        if header[offset - 1] != 0xFF:
+            raise ValidationError('Invalid JPEG header')
+        
+        marker = header[offset]
+        offset += 1
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            raise ValidationError('Invalid JPEG header')
+        
+        if offset + 2 > len(header):
+            return None
+        length = struct.unpack('>H', header[offset:offset + 2])[0]
+        if length < 2:
+            raise ValidationError('Invalid JPEG header')
+        
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 7 > len(header):
+                return None
+            height, width = struct.unpack('>HH', header[offset + 3:offset + 7])
+            return width, height
+        
+        offset += length
+
+def _png_dimensions(header):
+    if len(header) < 24:
+        return None
+    if header[12:16] != b'IHDR':
+        raise ValidationError('Invalid PNG header')
+    return struct.unpack('>II', header[16:24])
+
+def _webp_dimensions(header):
+    if len(header) < 30:
+        return None
+    
+    chunk = header[12:16]
+    if chunk == b'VP8 ':
+        # Lossy: key frame start code, then 14-bit width and height
+        if header[23:26] != b'\x9d\x01\x2a':
+            raise ValidationError('Invalid WebP header')
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        # Lossless: signature byte, then 14-bit width - 1 and height - 1
+        if header[20] != 0x2F:
+            raise ValidationError('Invalid WebP header')
+        bits = int.from_bytes(header[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        # Extended: 24-bit canvas width - 1 and height - 1
+        width = int.from_bytes(header[24:27], 'little') + 1
+        height = int.from_bytes(header[27:30], 'little') + 1
+        return width, height
+    
+    raise ValidationError('Invalid WebP header')
+
+# Dimension parsers by image format (as returned by frame_protocol.sniff_format)
+_PARSERS = {
+    'jpeg': _jpeg_dimensions,
+    'png': _png_dimensions,
+    'webp': _webp_dimensions
+}
+
+def parse_dimensions(header, image_format):
+    """
+    Read the dimensions of an image from its leading bytes.
+    
+    Args:
+        header: Leading bytes of the image (the whole file works as well)
+        image_format: 'jpeg', 'png' or 'webp'
+    
+    Returns:
+        Tuple (width, height), or None if more bytes are needed
+    
+    Raises:
+        ValidationError: If the header is malformed or the dimensions are
+            not found within MAX_HEADER_BYTES
+    """
+    header = bytes(header[:MAX_HEADER_BYTES])
+    dimensions = _PARSERS[image_format](header)
+    if dimensions is None and len(header) >= MAX_HEADER_BYTES:
+        raise ValidationError('Image dimensions not found in header')
+    if dimensions is not None and (dimensions[0] <= 0 or dimensions[1] <= 0):
+        raise ValidationError('Invalid image dimensions')
+    return dimensions
+
+def check_dimensions(dimensions, max_side):
+    """
+    Reject images larger than a limit in either dimension.
+    
+    Args:
+        dimensions: Tuple (width, height)
+        max_side: Largest accepted width or height in pixels, or None for
+            no limit
+    
+    Raises:
+        ValidationError: If the image is too large
+    """
+    if max_side and (dimensions[0] > max_side or dimensions[1] > max_side):
+        raise ValidationError('Image dimensions too large')
@@ -0,0 +1,184 @@
+"""
+Scan Job Queue
+
+This module processes uploaded face scans in background worker processes
+with Celery, so web workers only receive the upload and return. A job runs
+face detection, stores the measurements and optionally analyzes them; its
+state is kept in a ScanJob row, queryable by scan ID, and every step is
+pushed to the scan's owner as processing_update events (workers need
+SOCKETIO_MESSAGE_QUEUE to reach clients connected to the web processes).
+
+Run a worker with:
+    celery -A celery_worker.celery worker --loglevel=info
+
+With JOB_QUEUE_EAGER jobs run inline in the calling process, which is
+what tests use.
+"""
+
+import logging
+from celery import Celery
+from flask import has_app_context
+
+from models import ScanJob
+from config.database import db
+from utils.error_handlers import ValidationError
+from utils.progress_events import emit_progress, emit_progress_error
+from utils.scan_processing import process_scan, analyze_measurement_record
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Celery application, configured by init_job_queue()
+celery = Celery('newvision')
+
+# Flask app tasks run in, set by init_job_queue()
+_flask_app = None
+
+class JobQueueUnavailable(Exception):
+    """Raised when a job can't be handed to the broker."""
+    pass
+
+class AppContextTask(celery.Task):
+    """Task running inside the Flask app context (config, database, Socket.IO)."""
+    
+    def __call__(self, *args, **kwargs):
+        # Eager jobs started from a request already have the app context
+        if has_app_context() or _flask_app is None:
+            return self.run(*args, **kwargs)
+        
+        with _flask_app.app_context():
+            return self.run(*args, **kwargs)
+
+def init_job_queue(app):
+    """
+    Configure the job queue from an app's config.
+    
+    Args:
+        app: Flask application
+    """
+    global _flask_app
+    
+    _flask_app = app
+    celery.conf.update(
+        broker_url=app.config.get('CELERY_BROKER_URL'),
+        result_backend=app.config.get('CELERY_RESULT_BACKEND'),
+        # Job state lives in ScanJob rows, Celery results are not needed
+        task_ignore_result=True,
+        task_always_eager=app.config.get('JOB_QUEUE_EAGER', False),
+        task_default_queue=app.config.get('JOB_QUEUE_NAME', 'scans'),
+        # Scan jobs are long and CPU-bound: take one at a time and only
+        # acknowledge once finished so a crashed worker's job is redelivered
+        task_acks_late=True,
+        worker_prefetch_multiplier=1
+    )
+
+def job_status(job):
+    """
+    Summarize the state of a scan job.
+    
+    Args:
+        job: ScanJob record
+    
+    Returns:
+        Dictionary suitable for a JSON response
+    """
+    return {
+        'scan_id': job.scan_id,
+        'state': job.state,
+        'step': job.step,
+        'analyze': job.analyze,
+        'measurement_id': job.measurement_id,
+        'analysis_id': job.analysis_id,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None
+    }
+
+def enqueue_scan_job(user_id, scan_id, analyze=False):
+    """
+    Queue the processing of an uploaded face scan.
+    
+    Args:
+        user_id: Owner of the scan
+        scan_id: Scan identifier
+        analyze: Also analyze the measurements (face shape, recommendations)
+    
+    Returns:
+        ScanJob record (already finished in eager mode)
+    
+    Raises:
+        JobQueueUnavailable: If the broker can't be reached
+    """
+    job = ScanJob(scan_id=scan_id, user_id=user_id, analyze=analyze,
+                  state=ScanJob.QUEUED, step='queued')
+    db.session.add(job)
+    db.session.commit()
+    
+    try:
+        result = process_scan_job.apply_async(args=(scan_id,))
+    except Exception as e:
+        job.state = ScanJob.FAILED
+        job.error = 'Job queue unavailable'
+        db.session.commit()
+        raise JobQueueUnavailable(str(e)) from e
+    
+    job.task_id = result.id
+    db.session.commit()
+    return job
+
+def _fail_job(job, error):
+    """Record a job failure and report it to the scan's owner."""
+    job.state = ScanJob.FAILED
+    job.error = error
+    db.session.commit()
+    emit_progress_error(job.user_id, job.scan_id, error)
+
+@celery.task(name='scans.process', base=AppContextTask)
+def process_scan_job(scan_id):
+    """
+    Process a queued face scan.
+    
+    Args:
+        scan_id: Scan identifier of a ScanJob
+    """
+    job = ScanJob.query.filter_by(scan_id=scan_id).first()
+    if job is None:
+        logger.warning(f"No job for scan {scan_id}")
+        return
+    
+    # A redelivered job may have finished before its worker went away
+    if job.finished:
+        return
+    
+    job.state = ScanJob.PROCESSING
+    job.error = None
+    db.session.commit()
+    
+    def on_step(status, **fields):
+        job.step = status
+        if status == 'processing_complete':
+            job.measurement_id = fields.get('measurement_id')
+            if not job.analyze:
+                job.state = ScanJob.COMPLETED
+        db.session.commit()
+    
+    try:
+        measurement, _ = process_scan(job.user_id, scan_id, on_step=on_step)
+        
+        if job.analyze:
+            face_analysis = analyze_measurement_record(measurement)
+            job.analysis_id = face_analysis.id
+            job.step = 'analysis_complete'
+            job.state = ScanJob.COMPLETED
+            db.session.commit()
+            
+            emit_progress(job.user_id, scan_id, 'analysis_complete',
+                          analysis_id=face_analysis.id,
+                          face_shape=face_analysis.face_shape)
+    except ValidationError as e:
+        db.session.rollback()
+        _fail_job(job, e.message)
+    except Exception as e:
+        logger.error(f"Error processing scan job {scan_id}: {str(e)}")
+        db.session.rollback()
+        _fail_job(job, 'Error processing face scan')
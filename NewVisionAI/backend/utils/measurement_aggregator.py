@@ -0,0 +1,220 @@
+"""
+Measurement Aggregator
+
+This module combines the per-frame measurements of a live scan into a robust
+running estimate. Each measurement is estimated with the median of a sliding
+window of frames. Its spread is the larger of the scaled median absolute
+deviation and the sample standard deviation, never below the measurement
+resolution: the MAD alone drops to zero as soon as more than half of the
+(0.1mm rounded) readings are equal, however far apart the rest are. Once the
+standard error of every estimate is below the tolerance the scan has
+converged and no more frames are needed.
+"""
+
+import math
+import threading
+from collections import deque
+
+import numpy as np
+from flask import current_app
+
+from utils.face_detection import MEASUREMENT_NAMES
+
+# Scale factor turning the median absolute deviation into a standard deviation
+MAD_TO_STD = 1.4826
+
+# Resolution of the measurements in mm (they are rounded to 0.1mm); the
+# smallest spread an estimate is given
+MEASUREMENT_RESOLUTION_MM = 0.1
+
+# Standard error of the median relative to the standard error of the mean
+MEDIAN_EFFICIENCY = math.sqrt(math.pi / 2)
+
+# Default convergence settings
+DEFAULT_CONVERGENCE_SETTINGS = {
+    'SCAN_CONVERGENCE_ENABLED': True,
+    'SCAN_CONVERGENCE_WINDOW': 15,
+    'SCAN_CONVERGENCE_MIN_FRAMES': 5,
+    'SCAN_CONVERGENCE_TOLERANCE_MM': 0.5
+}
+
+# Per-worker registry, created on first use
+_measurement_sessions = None
+_measurement_sessions_lock = threading.Lock()
+
+class MeasurementAggregator:
+    """Robust running estimate of the measurements of one live scan."""
+    
+    def __init__(self, window=15, min_frames=5, tolerance=0.5):
+        """
+        Create an aggregator.
+        
+        Args:
+            window: Number of most recent frames the estimate is based on
+            min_frames: Minimum number of frames before convergence
+            tolerance: Maximum standard error (mm) of every estimate for the
+                scan to count as converged
+        """
+        self.min_frames = min_frames
+        self.tolerance = tolerance
+        self.frames = 0
+        self.converged = False
+        self._samples = deque(maxlen=window)
+    
+    def add(self, measurements):
+        """
+        Add the measurements of one frame.
+        
+        Args:
+            measurements: Dictionary from extract_measurements
+        
+        Returns:
+            True if the estimate has converged
+        """
+        if not measurements:
+            return self.converged
+        
+        self._samples.append([
+            np.nan if measurements.get(name) is None else measurements[name]
+            for name in MEASUREMENT_NAMES
+        ])
+        self.frames += 1
+        
+        if not self.converged:
+            self.converged = self._check_convergence()
+        return self.converged
+    
+    def _statistics(self):
+        """Compute median, standard deviation and standard error per measurement."""
+        samples = np.array(self._samples, dtype=np.float64)
+        counts = np.sum(~np.isnan(samples), axis=0)
+        median = np.full(samples.shape[1], np.nan)
+        std = np.full(samples.shape[1], np.nan)
+        
+        # Only measurements seen at least once (avoids all-NaN slices)
+        present = counts > 0
+        if present.any():
+            values = samples[:, present]
+            median[present] = np.nanmedian(values, axis=0)
+            mad = np.nanmedian(np.abs(values - median[present]), axis=0)
+            std[present] = np.maximum(MAD_TO_STD * mad, MEASUREMENT_RESOLUTION_MM)
+        
+        # The sample standard deviation keeps a spread-out minority visible
+        # (an outlier only delays convergence, the median ignores it)
+        spread = counts > 1
+        if spread.any():
+            std[spread] = np.maximum(std[spread], np.nanstd(samples[:, spread], axis=0, ddof=1))
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stderr = MEDIAN_EFFICIENCY * std / np.sqrt(counts)
+        return counts, median, std, stderr
+    
+    def _check_convergence(self):
+        if len(self._samples) < self.min_frames:
+            return False
+        
+        counts, _, _, stderr = self._statistics()
+        present = counts > 0
+        if not present.any():
+            return False
+        
+        return bool(np.all(counts[present] >= self.min_frames)
+                    and np.all(stderr[present] <= self.tolerance))
+    
+    def estimate(self):
+        """
+        Get the current estimate.
+        
+        Returns:
+            Dictionary with 'measurements' (median per measurement),
+            'variance' (robust variance per measurement, mm^2), 'frames'
+            and 'converged'
+        """
+        if not self._samples:
+            return {
+                'measurements': {},
+                'variance': {},
+                'frames': self.frames,
+                'converged': self.converged
+            }
+        
+        _, median, std, _ = self._statistics()
+        return {
+            'measurements': {
+                name: None if np.isnan(median[i]) else round(float(median[i]), 1)
+                for i, name in enumerate(MEASUREMENT_NAMES)
+            },
+            'variance': {
+                name: None if np.isnan(std[i]) else round(float(std[i] ** 2), 3)
+                for i, name in enumerate(MEASUREMENT_NAMES)
+            },
+            'frames': self.frames,
+            'converged': self.converged
+        }
+
+class MeasurementSessions:
+    """Registry of measurement aggregators keyed by live scan session id."""
+    
+    def __init__(self, window=15, min_frames=5, tolerance=0.5):
+        self.window = window
+        self.min_frames = min_frames
+        self.tolerance = tolerance
+        self._sessions = {}
+        self._lock = threading.Lock()
+    
+    def get(self, session_id):
+        """
+        Get the aggregator for a session, creating it if needed.
+        
+        Args:
+            session_id: Socket.IO session id
+        
+        Returns:
+            MeasurementAggregator for the session
+        """
+        with self._lock:
+            aggregator = self._sessions.get(session_id)
+            if aggregator is None:
+                aggregator = MeasurementAggregator(self.window, self.min_frames, self.tolerance)
+                self._sessions[session_id] = aggregator
+            return aggregator
+    
+    def is_converged(self, session_id):
+        """Check whether a session's scan has already converged."""
+        aggregator = self._sessions.get(session_id)
+        return aggregator is not None and aggregator.converged
+    
+    def release(self, session_id):
+        """
+        Forget a session, e.g. on disconnect or to start a new scan.
+        
+        Args:
+            session_id: Socket.IO session id
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+def get_measurement_sessions():
+    """
+    Get the worker's measurement session registry.
+    
+    Returns:
+        MeasurementSessions instance, or None if SCAN_CONVERGENCE_ENABLED is off
+    """
+    global _measurement_sessions
+    
+    config = current_app.config if current_app else {}
+    settings = {name: config.get(name, default) for name, default in DEFAULT_CONVERGENCE_SETTINGS.items()}
+    if not settings['SCAN_CONVERGENCE_ENABLED']:
+        return None
+    
+    if _measurement_sessions is None:
+        with _measurement_sessions_lock:
+            if _measurement_sessions is None:
+                _measurement_sessions = MeasurementSessions(
+                    window=settings['SCAN_CONVERGENCE_WINDOW'],
+                    min_frames=settings['SCAN_CONVERGENCE_MIN_FRAMES'],
+                    tolerance=settings['SCAN_CONVERGENCE_TOLERANCE_MM']
+                )
+    
+    return _measurement_sessions
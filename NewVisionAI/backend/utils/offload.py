@@ -0,0 +1,70 @@
+"""
+Blocking Work Offload
+
+This module moves CPU-bound work (image decoding, MediaPipe, OpenCV) out of
+eventlet green threads. A green thread that runs MediaPipe directly holds
+the hub until it finishes, stalling every other socket connection and HTTP
+request of the worker. Under eventlet the work runs in eventlet's native
+thread pool (eventlet.tpool) and only the calling green thread waits; with
+any other async mode it simply runs inline.
+
+The Flask app and request contexts are carried into the native thread, so
+config lookups, request.sid and stage timing keep working there.
+"""
+
+import logging
+import threading
+import contextvars
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Whether the native thread pool is used, set by init_offload()
+_use_tpool = False
+_tpool_lock = threading.Lock()
+
+def init_offload(async_mode, enabled=True, threads=None):
+    """
+    Configure offloading for the Socket.IO async mode in use.
+    
+    Args:
+        async_mode: Socket.IO async mode ('eventlet', 'threading', ...)
+        enabled: Offload to native threads when running under eventlet
+        threads: Optional size of eventlet's native thread pool
+    """
+    global _use_tpool
+    
+    with _tpool_lock:
+        _use_tpool = enabled and async_mode == 'eventlet'
+        if _use_tpool and threads:
+            from eventlet import tpool
+            tpool.set_num_threads(threads)
+    
+    if _use_tpool:
+        logger.info("Offloading CPU-bound scan work to eventlet's native thread pool")
+
+def run_blocking(func, *args, **kwargs):
+    """
+    Run a CPU-bound call without blocking the event loop.
+    
+    Args:
+        func: Callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+    
+    Returns:
+        Result of func; exceptions are re-raised in the caller
+    """
+    if not _use_tpool:
+        return func(*args, **kwargs)
+    
+    from eventlet import tpool
+    
+    # Run in a copy of the caller's context so current_app, request and g
+    # resolve in the native thread as well
+    context = contextvars.copy_context()
+    return tpool.execute(context.run, func, *args, **kwargs)
+
+def offload_enabled():
+    """Check whether calls are offloaded to native threads."""
+    return _use_tpool
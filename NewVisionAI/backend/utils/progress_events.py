@@ -0,0 +1,231 @@
+"""
+Scan Progress Events
+
+This module coalesces the processing_update events of a scan. Processing a
+scan reports several steps (processing_started, face_detected,
+measurements_extracted, processing_complete) within a few hundred
+milliseconds; instead of one Socket.IO message per step, the updates of a
+scan are collected for a short window and sent as a single message.
+Terminal updates (completion or failure) are sent immediately together
+with anything still pending, so the client never waits on the window for
+the result.
+
+A coalesced message is still a processing_update event whose status and
+fields are those of the latest step. It adds:
+
+- protocol: PROTOCOL_VERSION
+- updates: the statuses of every step in the message, oldest first
+
+Clients that react to each status on its own would miss the earlier steps
+of a message, so coalescing is opt-in: with PROGRESS_EVENTS_PROTOCOL = 1,
+the default, every update is emitted on its own in the original format.
+"""
+
+import time
+import logging
+import threading
+from flask import current_app
+
+from utils.socket_events import emit_event
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Version of the coalesced processing_update format
+PROTOCOL_VERSION = 2
+
+# Statuses ending a scan's processing; they flush the scan's updates at once
+TERMINAL_STATUSES = frozenset({
+    'processing_complete',
+    'face_detection_failed',
+    'analysis_complete'
+})
+
+# Per-worker batcher, created on first use
+_progress_batcher = None
+_progress_batcher_lock = threading.Lock()
+
+class ProgressBatcher:
+    """Collects the progress updates of each scan and emits them in batches."""
+    
+    def __init__(self, emit, flush_interval=0.25, start_task=None, sleep=time.sleep):
+        """
+        Initialize the batcher.
+        
+        Args:
+            emit: Callable emit(event, data, room=...) sending one message
+            flush_interval: Seconds an update may wait for others before it
+                is sent
+            start_task: Callable starting the background flusher, e.g. the
+                Socket.IO server's start_background_task (defaults to a
+                daemon thread)
+            sleep: Sleep function matching start_task
+        """
+        self.flush_interval = flush_interval
+        self._emit = emit
+        self._start_task = start_task or self._start_thread
+        self._sleep = sleep
+        self._pending = {}
+        self._flusher_running = False
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _start_thread(target):
+        thread = threading.Thread(target=target, name='progress-flusher', daemon=True)
+        thread.start()
+        return thread
+    
+    def update(self, room, scan_id, status, **fields):
+        """
+        Add a progress update of a scan.
+        
+        Args:
+            room: Room the scan's updates are sent to
+            scan_id: Scan identifier
+            status: Processing step, e.g. 'face_detected'
+            **fields: Additional fields of the step, e.g. measurements
+        """
+        key = (room, scan_id)
+        with self._lock:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = {
+                    'deadline': time.monotonic() + self.flush_interval,
+                    'message': {'protocol': PROTOCOL_VERSION, 'scan_id': scan_id, 'updates': []}
+                }
+            message = batch['message']
+            message.update(fields)
+            message['status'] = status
+            message['updates'].append(status)
+            
+            if status in TERMINAL_STATUSES:
+                del self._pending[key]
+            else:
+                message = None
+                start_flusher = not self._flusher_running
+                self._flusher_running = True
+        
+        if message is not None:
+            self._send(room, message)
+        elif start_flusher:
+            self._start_task(self._run_flusher)
+    
+    def flush(self, room=None, scan_id=None):
+        """
+        Send pending updates now.
+        
+        Args:
+            room: Only flush this room's scans
+            scan_id: Only flush this scan
+        """
+        with self._lock:
+            keys = [
+                key for key in self._pending
+                if (room is None or key[0] == room) and (scan_id is None or key[1] == scan_id)
+            ]
+            batches = [(key[0], self._pending.pop(key)['message']) for key in keys]
+        
+        for batch_room, message in batches:
+            self._send(batch_room, message)
+    
+    def pending(self):
+        """Get the number of scans with unsent updates."""
+        with self._lock:
+            return len(self._pending)
+    
+    def _send(self, room, message):
+        try:
+            self._emit('processing_update', message, room=room)
+        except Exception as e:
+            logger.error(f"Error emitting progress of scan {message.get('scan_id')}: {str(e)}")
+    
+    def _run_flusher(self):
+        """Send batches whose window has passed until none are pending."""
+        while True:
+            self._sleep(self.flush_interval / 2)
+            
+            now = time.monotonic()
+            with self._lock:
+                expired = [key for key, batch in self._pending.items() if batch['deadline'] <= now]
+                batches = [(key[0], self._pending.pop(key)['message']) for key in expired]
+                done = not self._pending
+                if done:
+                    self._flusher_running = False
+            
+            for room, message in batches:
+                self._send(room, message)
+            
+            if done:
+                return
+
+def get_progress_batcher():
+    """
+    Get the worker's progress batcher.
+    
+    Returns:
+        ProgressBatcher instance, or None if PROGRESS_EVENTS_PROTOCOL is 1
+        and updates are emitted one by one
+    """
+    global _progress_batcher
+    
+    if current_app:
+        protocol = current_app.config.get('PROGRESS_EVENTS_PROTOCOL', 1)
+        flush_interval = current_app.config.get('PROGRESS_FLUSH_INTERVAL', 0.25)
+        socketio = current_app.extensions.get('socketio')
+    else:
+        # Fallback for testing or non-Flask environments
+        protocol = 1
+        flush_interval = 0.25
+        socketio = None
+    
+    if protocol < PROTOCOL_VERSION or flush_interval <= 0:
+        return None
+    
+    if _progress_batcher is None:
+        with _progress_batcher_lock:
+            if _progress_batcher is None:
+                if socketio is not None:
+                    # Flush from the web server's own green/native threads
+                    _progress_batcher = ProgressBatcher(
+                        socketio.emit, flush_interval,
+                        start_task=socketio.start_background_task, sleep=socketio.sleep)
+                else:
+                    _progress_batcher = ProgressBatcher(emit_event, flush_interval)
+    
+    return _progress_batcher
+
+def emit_progress(user_id, scan_id, status, **fields):
+    """
+    Report a processing step of a scan to its user.
+    
+    Args:
+        user_id: Owner of the scan; updates go to the room f"user_{user_id}"
+        scan_id: Scan identifier
+        status: Processing step, e.g. 'face_detected'
+        **fields: Additional fields of the step, e.g. measurements
+    """
+    room = f"user_{user_id}"
+    batcher = get_progress_batcher()
+    if batcher is None:
+        emit_event('processing_update', {'status': status, 'scan_id': scan_id, **fields}, room=room)
+        return
+    
+    batcher.update(room, scan_id, status, **fields)
+
+def emit_progress_error(user_id, scan_id, error):
+    """
+    Report that processing a scan failed.
+    
+    Pending updates of the scan are sent first so the error arrives last.
+    
+    Args:
+        user_id: Owner of the scan
+        scan_id: Scan identifier, or None if unknown
+        error: Error message
+    """
+    room = f"user_{user_id}"
+    batcher = get_progress_batcher()
+    if batcher is not None and scan_id is not None:
+        batcher.flush(room, scan_id)
+    
+    emit_event('processing_error', {'error': error, 'scan_id': scan_id}, room=room)
@@ -0,0 +1,360 @@
+"""
+Result Cache
+
+This module caches detection and face shape results of decoded images so
+re-submitted images (retries, double clicks, endpoints called back to back,
+near-identical webcam frames) don't run inference again. Entries are keyed
+by the scope they belong to (a user or a socket session, so one user is
+never served another user's results), the kind of result, the detection
+method and a hash of the image, and evicted least recently used first when
+the entry or memory limit is reached, or once their time to live has passed.
+
+One-shot API calls key images by an exact content hash (SHA-256). Frames of
+a session are keyed by a perceptual hash instead: a lookup that misses
+exactly falls back to the closest of the session's most recent hashes
+within a small Hamming distance, so consecutive, nearly identical frames
+still hit.
+"""
+
+import sys
+import hashlib
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from flask import current_app
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Result kinds
+KIND_DETECTION = 'detection'
+KIND_FACE_SHAPE = 'face_shape'
+KIND_FRAME = 'frame'
+KIND_MULTI_FACE = 'multi_face'
+
+# Default cache settings
+DEFAULT_CACHE_SETTINGS = {
+    'RESULT_CACHE_ENABLED': True,
+    'RESULT_CACHE_MAX_ENTRIES': 256,
+    'RESULT_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+    'RESULT_CACHE_TTL': 300,
+    'RESULT_CACHE_HASH_SIZE': 16,
+    'RESULT_CACHE_MAX_DISTANCE': 8,
+    'RESULT_CACHE_NEAREST_CANDIDATES': 4
+}
+
+# Per-worker cache, created on first use
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def perceptual_hash(image, is_rgb=False, hash_size=16):
+    """
+    Compute a difference hash (dHash) of an image.
+    
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail
+    and every bit records whether a pixel is brighter than its right
+    neighbour, so re-encoded or slightly noisy copies of the same image get
+    the same hash.
+    
+    Args:
+        image: Image as numpy array (BGR unless is_rgb is set)
+        is_rgb: True if the image is in RGB order
+        hash_size: Number of rows (and bits per row) of the hash
+    
+    Returns:
+        Hash as an integer of hash_size * hash_size bits
+    """
+    if image.ndim == 3:
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY if is_rgb else cv2.COLOR_BGR2GRAY)
+    else:
+        gray = image
+    
+    thumbnail = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = thumbnail[:, 1:] > thumbnail[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def content_hash(image):
+    """
+    Compute an exact hash of an image's pixels.
+    
+    Args:
+        image: Image as numpy array
+    
+    Returns:
+        SHA-256 hex digest of the pixel data
+    """
+    return hashlib.sha256(np.ascontiguousarray(image).data).hexdigest()
+
+def estimate_size(value):
+    """
+    Estimate the memory used by a cached value.
+    
+    Args:
+        value: Cached value (nested dicts, lists, tuples and numpy arrays)
+    
+    Returns:
+        Approximate size in bytes
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Thread-safe LRU cache with entry, memory and time to live limits."""
+    
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=300, hash_size=16,
+                 max_distance=8, nearest_candidates=4):
+        """
+        Create a cache.
+        
+        Args:
+            max_entries: Maximum number of entries
+            max_bytes: Maximum estimated memory of all entries
+            ttl: Seconds an entry stays valid (0 or None to never expire)
+            hash_size: Size of the perceptual hash used for image keys
+            max_distance: Maximum number of differing hash bits for a lookup
+                to match a cached image (0 for exact matches only)
+            nearest_candidates: Number of a scope's most recent perceptual
+                hashes compared on an inexact lookup
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.nearest_candidates = nearest_candidates
+        
+        self._entries = OrderedDict()
+        # Most recent perceptual hash keys by key prefix, for inexact lookups
+        self._recent = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {}
+        self.reset_stats()
+    
+    def key(self, image, kind, method='mediapipe', is_rgb=False, scope=None, exact=False):
+        """
+        Build the cache key of an image.
+        
+        Args:
+            image: Decoded image as numpy array (BGR unless is_rgb is set)
+            kind: Kind of result, e.g. KIND_DETECTION
+            method: Detection method the result was computed with
+            is_rgb: True if the image is in RGB order
+            scope: User or session the result belongs to; only keys of the
+                same scope match each other
+            exact: Key the image by its exact content hash rather than its
+                perceptual hash, so only identical images match
+        
+        Returns:
+            Hashable cache key
+        """
+        if exact:
+            image_hash = content_hash(image)
+        else:
+            image_hash = perceptual_hash(image, is_rgb, self.hash_size)
+        
+        # Dimensions are part of the key: results are in pixel coordinates
+        return (scope, kind, method, image.shape[:2], image_hash)
+    
+    def get(self, key):
+        """
+        Look up an entry.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._is_fuzzy(key):
+                key = self._nearest(key)
+                entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            
+            value, size, expires = entry
+            if expires is not None and time.monotonic() > expires:
+                self._remove(key)
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self._touch(key)
+            self._counters['hits'] += 1
+            return value
+    
+    def put(self, key, value):
+        """
+        Store an entry, evicting least recently used entries if needed.
+        
+        Args:
+            key: Cache key
+            value: Value to store (None values are not cached)
+        """
+        if value is None:
+            return
+        
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires)
+            self._bytes += size
+            self._touch(key)
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+    
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for a key, computing and storing it on a miss.
+        
+        Args:
+            key: Cache key
+            compute: Callable producing the value
+        
+        Returns:
+            Cached or computed value
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+    
+    def _is_fuzzy(self, key):
+        """Check whether a key may match a cached key inexactly (scoped perceptual hashes)."""
+        return bool(self.max_distance) and key[0] is not None and isinstance(key[-1], int)
+    
+    def _touch(self, key):
+        """Record a key as the most recent of its prefix, for inexact lookups."""
+        if not self._is_fuzzy(key):
+            return
+        recent = self._recent.setdefault(key[:-1], OrderedDict())
+        recent[key] = None
+        recent.move_to_end(key)
+        if len(recent) > self.nearest_candidates:
+            recent.popitem(last=False)
+    
+    def _nearest(self, key):
+        """Find the recent key of the same prefix with the closest image hash within max_distance."""
+        prefix, image_hash = key[:-1], key[-1]
+        best_key, best_distance = None, self.max_distance + 1
+        for candidate in self._recent.get(prefix, ()):
+            distance = bin(candidate[-1] ^ image_hash).count('1')
+            if distance < best_distance:
+                best_key, best_distance = candidate, distance
+        return best_key
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        
+        recent = self._recent.get(key[:-1])
+        if recent is not None:
+            recent.pop(key, None)
+            if not recent:
+                del self._recent[key[:-1]]
+    
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._recent.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        """
+        Get the cache counters.
+        
+        Returns:
+            Dictionary with hits, misses, hit rate, evictions, entries and bytes
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+    
+    def reset_stats(self):
+        """Reset the cache counters."""
+        with self._lock:
+            self._counters = {
+                'hits': 0,
+                'misses': 0,
+                'expired': 0,
+                'evictions': 0
+            }
+
+def get_result_cache():
+    """
+    Get the worker's result cache, creating it on first use.
+    
+    Returns:
+        ResultCache instance, or None if RESULT_CACHE_ENABLED is off
+    """
+    global _result_cache
+    
+    config = current_app.config if current_app else {}
+    settings = {name: config.get(name, default) for name, default in DEFAULT_CACHE_SETTINGS.items()}
+    if not settings['RESULT_CACHE_ENABLED']:
+        return None
+    
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    max_entries=settings['RESULT_CACHE_MAX_ENTRIES'],
+                    max_bytes=settings['RESULT_CACHE_MAX_BYTES'],
+                    ttl=settings['RESULT_CACHE_TTL'],
+                    hash_size=settings['RESULT_CACHE_HASH_SIZE'],
+                    max_distance=settings['RESULT_CACHE_MAX_DISTANCE'],
+                    nearest_candidates=settings['RESULT_CACHE_NEAREST_CANDIDATES']
+                )
+    
+    return _result_cache
+
+def cached_result(image, kind, compute, method='mediapipe', is_rgb=False, scope=None,
+                  exact=False):
+    """
+    Get a result for an image from the cache, computing it on a miss.
+    
+    Args:
+        image: Decoded image as numpy array (BGR unless is_rgb is set)
+        kind: Kind of result, e.g. KIND_DETECTION
+        compute: Callable producing the result
+        method: Detection method the result is computed with
+        is_rgb: True if the image is in RGB order
+        scope: User or session the result belongs to (see ResultCache.key)
+        exact: Match identical images only (see ResultCache.key)
+    
+    Returns:
+        Cached or computed result
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return compute()
+    
+    return cache.get_or_compute(cache.key(image, kind, method, is_rgb, scope, exact), compute)
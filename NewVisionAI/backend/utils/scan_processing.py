@@ -0,0 +1,332 @@
+"""
+Face Scan Processing
+
+This module runs the processing steps of an uploaded face scan: face
+detection and measurement extraction, storing the measurements, and face
+analysis. The steps are shared by the synchronous face scanner routes and
+the background scan jobs; progress is reported to the scan's owner over
+Socket.IO as processing_update events.
+"""
+
+import os
+import json
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from flask import current_app
+
+from models import Measurement, FaceAnalysis, Scan, ScanJob
+from config.database import db
+from utils.face_detection import load_image, extract_measurements_batch, measurement_rows
+from utils.detection_executor import submit_detection, wait_for_detection
+from utils.timing import span
+from utils.offload import run_blocking
+from utils.progress_events import emit_progress
+from utils.scan_store import get_scan_store
+from utils.error_handlers import ValidationError
+from utils.face_analysis import analyze_face
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def scan_path(scan_id):
+    """
+    Get the path of an uploaded face scan.
+    
+    Args:
+        scan_id: Scan identifier
+    
+    Returns:
+        Local path of the scan file in the scan store, or in the flat
+        upload directory for scans stored before the scan store
+    """
+    store = get_scan_store()
+    scan = store.get(scan_id)
+    if scan is not None:
+        return store.local_path(scan)
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'face_scans', scan_id)
+
+def _new_measurement(user_id, scan_id, measurements):
+    """Build the measurement record of a processed scan."""
+    return Measurement(
+        user_id=user_id,
+        pupillary_distance=measurements.get('pupillary_distance'),
+        temple_length=measurements.get('temple_length'),
+        bridge_width=measurements.get('bridge_width'),
+        lens_width=measurements.get('lens_width'),
+        lens_height=measurements.get('lens_height'),
+        frame_width=measurements.get('frame_width'),
+        face_width=measurements.get('face_width'),
+        face_height=measurements.get('face_height'),
+        scan_data_url=scan_id,
+        notes='Processed from face scan'
+    )
+
+def process_scan(user_id, scan_id, on_step=None):
+    """
+    Detect the face of an uploaded scan and store its measurements.
+    
+    Args:
+        user_id: Owner of the scan
+        scan_id: Scan identifier
+        on_step: Optional callback on_step(status, **fields) called with
+            every processing_update before it is sent, e.g. to record a
+            job's progress
+    
+    Returns:
+        Tuple of (Measurement record, measurements dictionary)
+    
+    Raises:
+        ValidationError: If the image is invalid or no face is detected
+    """
+    def report(status, **fields):
+        if on_step is not None:
+            on_step(status, **fields)
+        emit_progress(user_id, scan_id, status, **fields)
+    
+    report('processing_started')
+    
+    # Duplicate uploads share their stored content and its detection result
+    scan = get_scan_store().get(scan_id)
+    content = scan.content if scan is not None else None
+    detection = content.detection_result_dict if content is not None else None
+    
+    if detection is not None:
+        face_detected, measurements = detection['face_detected'], detection['measurements']
+    else:
+        # Detect face and extract measurements (decoded once, then run in a
+        # detection worker process when the executor is enabled). The fuzzy
+        # in-memory result cache is not consulted: its hits may come from
+        # another user's similar image, and this result is persisted; exact
+        # reuse is keyed on the content hash through ScanContent above
+        image = load_image(scan_path(scan_id))
+        if image is None:
+            raise ValidationError('Invalid face scan image')
+        
+        face_detected, face_data, measurements = wait_for_detection(submit_detection(image))
+        
+        if content is not None:
+            content.detection_result_dict = {'face_detected': face_detected, 'measurements': measurements}
+            db.session.commit()
+    
+    if not face_detected:
+        report('face_detection_failed')
+        raise ValidationError('No face detected in the image')
+    
+    report('face_detected')
+    report('measurements_extracted', measurements=measurements)
+    
+    # Create a new measurement record
+    new_measurement = _new_measurement(user_id, scan_id, measurements)
+    
+    db.session.add(new_measurement)
+    with span('db_commit'):
+        db.session.commit()
+    
+    report('processing_complete', measurement_id=new_measurement.id)
+    
+    return new_measurement, measurements
+
+def _detect_landmarks(path):
+    """
+    Decode a stored scan and detect its face without measuring it.
+    
+    Returns:
+        Tuple (decoded, landmark pixel array or None if no face was found)
+    """
+    image = load_image(path)
+    if image is None:
+        return False, None
+    
+    face_detected, face_data, _ = wait_for_detection(submit_detection(image, measure=False))
+    return True, face_data['landmark_array'] if face_detected else None
+
+def _detect_all(paths, threads):
+    """
+    Run _detect_landmarks on many scans in a thread pool.
+    
+    Returns:
+        List of _detect_landmarks results; (None, None) where detection
+        raised an error
+    """
+    with ThreadPoolExecutor(max_workers=min(threads, len(paths))) as executor:
+        # Each thread runs in its own copy of the app context
+        futures = [executor.submit(contextvars.copy_context().run, _detect_landmarks, path)
+                   for path in paths]
+        
+        detections = []
+        for path, future in zip(paths, futures):
+            try:
+                # Bounded by DETECTION_TIMEOUT like every detection wait
+                detections.append(wait_for_detection(future))
+            except Exception as e:
+                # One failing scan doesn't fail the batch
+                logger.error(f"Error detecting face in {path}: {str(e)}")
+                detections.append((None, None))
+        return detections
+
+def process_scans_batch(user_id, scan_ids):
+    """
+    Process many uploaded face scans of a user at once.
+    
+    Scans whose content was processed before reuse the stored detection
+    result. The others are decoded and detected in parallel threads (handing
+    detection to the worker processes when the detection executor is
+    enabled), their measurements are extracted in one vectorized call, and
+    every Measurement row is inserted in a single transaction.
+    
+    Args:
+        user_id: Owner of the scans
+        scan_ids: List of scan identifiers
+    
+    Returns:
+        List of per-scan result dictionaries, in the order of scan_ids, with
+        'scan_id', 'status' ('completed' or 'failed') and either
+        'measurement_id' and 'measurements' or 'error'
+    """
+    store = get_scan_store()
+    scans = {scan.scan_id: scan for scan in Scan.query.filter(Scan.scan_id.in_(scan_ids)).all()}
+    
+    results = {}
+    measurements_by_content = {}
+    pending = {}
+    for scan_id in scan_ids:
+        scan = scans.get(scan_id)
+        if scan is None or scan.user_id != user_id:
+            results[scan_id] = {'scan_id': scan_id, 'status': 'failed', 'error': 'Face scan not found'}
+            continue
+        
+        content = scan.content
+        detection = content.detection_result_dict
+        if detection is not None:
+            measurements_by_content[content.id] = detection
+        elif content.id not in pending:
+            # Identical images within the batch are detected once
+            pending[content.id] = (content, store.local_path(scan))
+    
+    if pending:
+        threads = current_app.config.get('BATCH_PROCESS_THREADS') or os.cpu_count() or 1
+        contents = list(pending.values())
+        
+        # Decoding and Face Mesh release the GIL, so threads overlap them;
+        # under eventlet the pool is driven from a native thread
+        with span('batch_detection'):
+            detections = run_blocking(_detect_all, [path for _, path in contents], threads)
+        
+        detected = [i for i, (_, points) in enumerate(detections) if points is not None]
+        rows = []
+        if detected:
+            with span('extract_measurements_batch'):
+                rows = measurement_rows(extract_measurements_batch(
+                    np.stack([detections[i][1] for i in detected])))
+        rows_by_index = dict(zip(detected, rows))
+        
+        for i, (content, _) in enumerate(contents):
+            decoded = detections[i][0]
+            if not decoded:
+                # Failures are not cached: the file may be repaired or the
+                # error transient
+                error = 'Invalid face scan image' if decoded is False else 'Error processing face scan'
+                measurements_by_content[content.id] = {'error': error}
+                continue
+            
+            detection = {'face_detected': i in rows_by_index, 'measurements': rows_by_index.get(i)}
+            content.detection_result_dict = detection
+            measurements_by_content[content.id] = detection
+    
+    new_measurements = {}
+    for scan_id in scan_ids:
+        if scan_id in results:
+            continue
+        
+        detection = measurements_by_content[scans[scan_id].content_id]
+        if 'error' in detection:
+            results[scan_id] = {'scan_id': scan_id, 'status': 'failed', 'error': detection['error']}
+        elif not detection['face_detected'] or not detection['measurements']:
+            results[scan_id] = {'scan_id': scan_id, 'status': 'failed', 'error': 'No face detected in the image'}
+        else:
+            new_measurements[scan_id] = _new_measurement(user_id, scan_id, detection['measurements'])
+    
+    # One transaction for every measurement and cached detection result
+    db.session.add_all(new_measurements.values())
+    with span('db_commit'):
+        db.session.commit()
+    
+    for scan_id, measurement in new_measurements.items():
+        results[scan_id] = {
+            'scan_id': scan_id,
+            'status': 'completed',
+            'measurement_id': measurement.id,
+            'measurements': measurements_by_content[scans[scan_id].content_id]['measurements']
+        }
+    
+    return [results[scan_id] for scan_id in scan_ids]
+
+def analyze_measurement_record(measurement, options=None):
+    """
+    Analyze a measurement and store the face shape and recommendations.
+    
+    Args:
+        measurement: Measurement record
+        options: Optional analysis parameters, e.g. skin_tone
+    
+    Returns:
+        FaceAnalysis record
+    """
+    options = options or {}
+    
+    # Convert measurement to dictionary for analysis
+    measurement_dict = {
+        'pupillary_distance': measurement.pupillary_distance,
+        'temple_length': measurement.temple_length,
+        'bridge_width': measurement.bridge_width,
+        'lens_width': measurement.lens_width,
+        'lens_height': measurement.lens_height,
+        'frame_width': measurement.frame_width,
+        'face_width': measurement.face_width,
+        'face_height': measurement.face_height
+    }
+    
+    # Analyze face to get face shape and recommendations
+    analysis_results = analyze_face(measurement_dict, options)
+    
+    # Create or update face analysis record
+    face_analysis = measurement.face_analysis or FaceAnalysis(measurement_id=measurement.id)
+    
+    face_analysis.face_shape = analysis_results.get('face_shape')
+    face_analysis.face_symmetry = analysis_results.get('face_symmetry')
+    face_analysis.skin_tone = analysis_results.get('skin_tone', options.get('skin_tone'))
+    face_analysis.recommended_styles = json.dumps(analysis_results.get('recommended_styles', []))
+    face_analysis.recommended_colors = json.dumps(analysis_results.get('recommended_colors', []))
+    face_analysis.confidence_score = analysis_results.get('confidence_score')
+    face_analysis.analysis_version = '1.0'  # Example version
+    
+    if not measurement.face_analysis:
+        db.session.add(face_analysis)
+    
+    db.session.commit()
+    return face_analysis
+
+def delete_measurement_record(measurement):
+    """
+    Delete a measurement with its face analysis and release its face scan.
+    
+    The scan's job record goes with it, and the scan is released from the
+    scan store (deleting the stored image once no scan references it)
+    unless another measurement was taken from the same scan.
+    
+    Args:
+        measurement: Measurement record
+    """
+    scan_id = measurement.scan_data_url
+    
+    ScanJob.query.filter_by(measurement_id=measurement.id).delete()
+    if measurement.face_analysis:
+        db.session.delete(measurement.face_analysis)
+    db.session.delete(measurement)
+    db.session.commit()
+    
+    if scan_id and Measurement.query.filter_by(scan_data_url=scan_id).first() is None:
+        get_scan_store().release(scan_id)
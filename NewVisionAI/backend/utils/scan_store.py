@@ -0,0 +1,241 @@
+"""
+Content-Addressed Scan Store
+
+This module stores face scan images by the SHA-256 hash of their content.
+Identical uploads are stored once: each scan ID gets a Scan index row
+pointing at a shared ScanContent row, which counts its references and keeps
+the face detection result so duplicates are not processed again.
+
+Files are written through a storage backend. The local filesystem backend
+shards them into nested subdirectories named after the leading hash digits
+(ab/cd/abcd...) so no directory grows past a few thousand entries. Other
+backends implement the ScanStorage interface and are registered in
+STORAGE_BACKENDS.
+"""
+
+import os
+import logging
+import threading
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import Scan, ScanContent
+from config.database import db
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Per-worker store, created on first use
+_scan_store = None
+_scan_store_lock = threading.Lock()
+
+class ScanStorage:
+    """Interface of scan storage backends; keys are content hashes."""
+    
+    def exists(self, key):
+        """Check whether content is stored under a key."""
+        raise NotImplementedError
+    
+    def store(self, key, source_path):
+        """
+        Store a file under a key, consuming the source file.
+        
+        Args:
+            key: Content hash
+            source_path: Local file to store; it is moved or removed
+        """
+        raise NotImplementedError
+    
+    def local_path(self, key):
+        """Get a local file path with the content of a key."""
+        raise NotImplementedError
+    
+    def delete(self, key):
+        """Delete the content of a key if it exists."""
+        raise NotImplementedError
+
+class LocalScanStorage(ScanStorage):
+    """Scan storage in a sharded local directory tree."""
+    
+    def __init__(self, root, shard_depth=2, shard_width=2):
+        """
+        Initialize the storage.
+        
+        Args:
+            root: Root directory
+            shard_depth: Number of nested shard directories
+            shard_width: Hash digits per shard directory name
+        """
+        self.root = root
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+    
+    def path(self, key):
+        """Get the sharded path of a key."""
+        shards = [key[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return os.path.join(self.root, *shards, key)
+    
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+    
+    def store(self, key, source_path):
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(source_path)
+            return
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+    
+    def local_path(self, key):
+        return self.path(key)
+    
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+# Storage backends by SCAN_STORE_BACKEND name
+STORAGE_BACKENDS = {
+    'local': LocalScanStorage
+}
+
+class ScanStore:
+    """Deduplicating store of face scans indexed by scan ID."""
+    
+    def __init__(self, storage, staging_dir):
+        """
+        Initialize the store.
+        
+        Args:
+            storage: ScanStorage backend
+            staging_dir: Local directory uploads are written to before they
+                are hashed and stored
+        """
+        self.storage = storage
+        self.staging_dir = staging_dir
+    
+    def staging_path(self, name):
+        """Get a path to write an incoming upload to."""
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return os.path.join(self.staging_dir, name)
+    
+    def add(self, user_id, scan_id, upload):
+        """
+        Store an ingested upload under a new scan ID.
+        
+        Args:
+            user_id: Owner of the scan
+            scan_id: New scan identifier
+            upload: IngestedUpload written to a staging path
+        
+        Returns:
+            Tuple (Scan record, True if the content was already stored)
+        """
+        stored = False
+        for attempt in range(2):
+            # Take the reference in SQL first: the write locks the content row
+            # (the database on SQLite) until the commit, so release() can't
+            # delete the content in between
+            duplicate = ScanContent.query.filter_by(sha256=upload.sha256).update(
+                {ScanContent.ref_count: ScanContent.ref_count + 1}) > 0
+            if duplicate:
+                content = ScanContent.query.filter_by(sha256=upload.sha256).one()
+            else:
+                content = ScanContent(sha256=upload.sha256, format=upload.format, size=upload.size,
+                                      width=upload.width, height=upload.height, ref_count=1)
+                db.session.add(content)
+            
+            scan = Scan(scan_id=scan_id, user_id=user_id, content=content)
+            db.session.add(scan)
+            try:
+                db.session.flush()
+                
+                # Move the file into the store while holding the lock; content
+                # released just before is stored again. Content is immutable,
+                # so a file left behind by a failed commit is simply reused
+                if not stored:
+                    self.storage.store(upload.sha256, upload.path)
+                    stored = True
+                db.session.commit()
+                break
+            except IntegrityError:
+                # The same content was added concurrently: retry as a duplicate
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+        
+        if duplicate:
+            logger.info(f"Scan {scan_id} reuses stored content {upload.sha256[:12]}")
+        return scan, duplicate
+    
+    def get(self, scan_id):
+        """Get the index row of a scan, or None for unknown scans."""
+        return Scan.query.filter_by(scan_id=scan_id).first()
+    
+    def local_path(self, scan):
+        """Get a local file path with the content of a scan."""
+        return self.storage.local_path(scan.content.sha256)
+    
+    def release(self, scan_id):
+        """
+        Remove a scan, deleting its content once no scan references it.
+        
+        Args:
+            scan_id: Scan identifier
+        """
+        scan = self.get(scan_id)
+        if scan is None:
+            return
+        
+        content = scan.content
+        content_id, sha256 = content.id, content.sha256
+        content.ref_count = ScanContent.ref_count - 1
+        db.session.delete(scan)
+        db.session.commit()
+        
+        # Content without references is removed with its file; the condition
+        # is checked in SQL so a concurrent duplicate upload keeps it. The
+        # file is deleted before the commit, while the delete holds the lock
+        # add() takes its reference under, so an upload can't slip in between
+        # (if the commit fails, the next upload of the content stores it again)
+        deleted = ScanContent.query.filter(ScanContent.id == content_id,
+                                           ScanContent.ref_count <= 0).delete()
+        if deleted:
+            self.storage.delete(sha256)
+        db.session.commit()
+
+def get_scan_store():
+    """
+    Get the worker's scan store.
+    
+    Returns:
+        ScanStore using the SCAN_STORE_BACKEND backend
+    """
+    global _scan_store
+    
+    if _scan_store is None:
+        if current_app:
+            backend = current_app.config.get('SCAN_STORE_BACKEND', 'local')
+            root = current_app.config.get('SCAN_STORE_ROOT') or \
+                os.path.join(current_app.config['UPLOAD_FOLDER'], 'face_scans')
+            shard_depth = current_app.config.get('SCAN_STORE_SHARD_DEPTH', 2)
+        else:
+            # Fallback for testing or non-Flask environments
+            backend = 'local'
+            root = os.path.join('uploads', 'face_scans')
+            shard_depth = 2
+        
+        with _scan_store_lock:
+            if _scan_store is None:
+                if backend == 'local':
+                    storage = LocalScanStorage(root, shard_depth=shard_depth)
+                else:
+                    storage = STORAGE_BACKENDS[backend](root)
+                _scan_store = ScanStore(storage, os.path.join(root, '.incoming'))
+    
+    return _scan_store
@@ -0,0 +1,88 @@
+"""
+Socket.IO Event Emitter
+
+This module emits Socket.IO events from anywhere in the backend: request
+handlers, the detection pipeline and background job processes. With a
+message queue configured (SOCKETIO_MESSAGE_QUEUE, e.g. a Redis URL) events
+are published to the queue and delivered by whichever web process holds
+the client's connection, so room emits work across any number of web and
+worker processes.
+
+Inside a Flask app the app's Socket.IO server is used. Processes without
+one (e.g. job workers that don't create the app) get a write-only emitter
+connected to the same queue.
+"""
+
+import os
+import logging
+import threading
+from flask import current_app
+from flask_socketio import SocketIO
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default channel name shared by the web and worker processes
+DEFAULT_CHANNEL = 'flask-socketio'
+
+# Write-only emitter for processes without a Socket.IO app, created on first use
+_emitter = None
+_emitter_lock = threading.Lock()
+
+def get_message_queue_settings():
+    """
+    Get the Socket.IO message queue URL and channel.
+    
+    Returns:
+        Tuple (message_queue, channel); message_queue is None when events
+        are only delivered within the current process
+    """
+    if current_app:
+        message_queue = current_app.config.get('SOCKETIO_MESSAGE_QUEUE')
+        channel = current_app.config.get('SOCKETIO_CHANNEL', DEFAULT_CHANNEL)
+    else:
+        # Fallback for testing or non-Flask environments
+        message_queue = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+        channel = os.getenv('SOCKETIO_CHANNEL', DEFAULT_CHANNEL)
+    
+    return message_queue, channel
+
+def get_socketio_emitter():
+    """
+    Get a write-only Socket.IO emitter connected to the message queue.
+    
+    Returns:
+        SocketIO instance usable only for emitting
+    
+    Raises:
+        RuntimeError: If no message queue is configured
+    """
+    global _emitter
+    
+    if _emitter is None:
+        message_queue, channel = get_message_queue_settings()
+        if not message_queue:
+            raise RuntimeError('SOCKETIO_MESSAGE_QUEUE must be set to emit from outside the web process')
+        
+        with _emitter_lock:
+            if _emitter is None:
+                logger.info(f"Creating Socket.IO emitter on channel {channel}")
+                _emitter = SocketIO(message_queue=message_queue, channel=channel)
+    
+    return _emitter
+
+def emit_event(event, data, room=None, namespace=None):
+    """
+    Emit a Socket.IO event to a room (or every client).
+    
+    Args:
+        event: Event name
+        data: Event payload
+        room: Optional room, e.g. f"user_{user_id}"
+        namespace: Optional namespace
+    """
+    socketio = current_app.extensions.get('socketio') if current_app else None
+    if socketio is None:
+        socketio = get_socketio_emitter()
+    
+    socketio.emit(event, data, to=room, namespace=namespace)
@@ -0,0 +1,300 @@
+"""
+Stage Timing
+
+This module times the stages of the scan pipeline (decoding, color
+conversion, Face Mesh, measurements, face shape prediction, database
+commits). A trace is started for a sampled fraction of requests and socket
+events; stages report their duration with the span() context manager or
+the timed() decorator, and finished traces are aggregated into per-route,
+per-stage histograms. While no trace is active a span costs a single global
+lookup and records nothing.
+"""
+
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from flask import g, has_app_context, current_app
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open)
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Name of the span covering the whole request or event
+TOTAL_STAGE = 'total'
+
+# Shared no-op context returned when the current request is not sampled
+_NULL_SPAN = nullcontext()
+
+# Number of traces in progress in this worker; spans skip the context lookup
+# entirely while it is zero
+_active_traces = 0
+_active_traces_lock = threading.Lock()
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+    
+    def __init__(self, bounds=BUCKET_BOUNDS_MS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def record(self, value):
+        """
+        Record one duration.
+        
+        Args:
+            value: Duration in milliseconds
+        """
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def percentile(self, p):
+        """
+        Estimate a percentile from the buckets.
+        
+        Args:
+            p: Percentile between 0 and 100
+        
+        Returns:
+            Upper bound of the bucket holding the percentile (the maximum for
+            the open last bucket), or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        
+        rank = p / 100 * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                value = min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+                return round(value, 3)
+        return round(self.max, 3)
+    
+    def to_dict(self):
+        """Summarize the histogram."""
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'min_ms': round(self.min, 3) if self.min is not None else None,
+            'max_ms': round(self.max, 3) if self.max is not None else None,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'buckets': {
+                (f'le_{bound}' if i < len(self.bounds) else 'inf'): count
+                for i, (bound, count) in enumerate(zip(self.bounds + (None,), self.buckets))
+            }
+        }
+
+class StageTimings:
+    """Per-route, per-stage latency histograms."""
+    
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def record(self, route, stages):
+        """
+        Record the stage durations of one finished trace.
+        
+        Args:
+            route: Route or event name
+            stages: List of (stage, duration_ms) tuples
+        """
+        with self._lock:
+            route_histograms = self._histograms.setdefault(route, {})
+            for stage, duration in stages:
+                histogram = route_histograms.get(stage)
+                if histogram is None:
+                    histogram = route_histograms[stage] = Histogram()
+                histogram.record(duration)
+    
+    def stats(self):
+        """
+        Get the histograms.
+        
+        Returns:
+            Dictionary mapping route to stage to histogram summary
+        """
+        with self._lock:
+            return {
+                route: {stage: histogram.to_dict() for stage, histogram in stages.items()}
+                for route, stages in self._histograms.items()
+            }
+    
+    def reset(self):
+        """Forget every recorded duration."""
+        with self._lock:
+            self._histograms = {}
+
+# Per-worker histograms
+stage_timings = StageTimings()
+
+def _sample_rate():
+    """Get the fraction of requests that are traced."""
+    if current_app:
+        return current_app.config.get('TIMING_SAMPLE_RATE', 0.0)
+    return 0.0
+
+def start_trace(route, sample_rate=None):
+    """
+    Start a trace for the current request or event if it is sampled.
+    
+    Args:
+        route: Route or event name the stages are recorded under
+        sample_rate: Fraction of calls to trace (defaults to TIMING_SAMPLE_RATE)
+    
+    Returns:
+        True if the call is traced
+    """
+    global _active_traces
+    
+    if not has_app_context():
+        return False
+    
+    rate = _sample_rate() if sample_rate is None else sample_rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return False
+    
+    g._timing_trace = {'route': route, 'start': time.perf_counter(), 'stages': []}
+    with _active_traces_lock:
+        _active_traces += 1
+    return True
+
+def finish_trace():
+    """
+    Finish the current trace and add it to the histograms.
+    
+    Returns:
+        List of (stage, duration_ms) tuples including the total, or None if
+        the current call was not traced
+    """
+    global _active_traces
+    
+    if not _active_traces or not has_app_context():
+        return None
+    
+    trace = g.pop('_timing_trace', None)
+    if trace is None:
+        return None
+    
+    with _active_traces_lock:
+        _active_traces -= 1
+    
+    stages = trace['stages']
+    stages.append((TOTAL_STAGE, (time.perf_counter() - trace['start']) * 1000))
+    stage_timings.record(trace['route'], stages)
+    return stages
+
+@contextmanager
+def _timed_span(trace, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace['stages'].append((name, (time.perf_counter() - start) * 1000))
+
+def span(name):
+    """
+    Time a stage of the current trace.
+    
+    Usage:
+        with span('imdecode'):
+            image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    
+    Args:
+        name: Stage name
+    
+    Returns:
+        Context manager; a shared no-op one when the call is not traced
+    """
+    if not _active_traces:
+        return _NULL_SPAN
+    
+    trace = g.get('_timing_trace') if has_app_context() else None
+    if trace is None:
+        return _NULL_SPAN
+    return _timed_span(trace, name)
+
+def timed(name):
+    """
+    Decorator timing every call of a function as a stage.
+    
+    Args:
+        name: Stage name
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def traced_event(name):
+    """
+    Decorator tracing a Socket.IO event handler as a route.
+    
+    Args:
+        name: Route name the handler's stages are recorded under
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_trace(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                finish_trace()
+        return wrapper
+    return decorator
+
+def server_timing_header(stages):
+    """
+    Format stage durations as a Server-Timing header value.
+    
+    Durations of repeated stages are summed.
+    
+    Args:
+        stages: List of (stage, duration_ms) tuples
+    
+    Returns:
+        Header value, e.g. "imdecode;dur=3.2, face_mesh;dur=41.7"
+    """
+    totals = {}
+    for stage, duration in stages:
+        totals[stage] = totals.get(stage, 0.0) + duration
+    return ', '.join(f'{stage};dur={duration:.1f}' for stage, duration in totals.items())
+
+def init_timing(app):
+    """
+    Trace sampled requests of an app and optionally add Server-Timing headers.
+    
+    Args:
+        app: Flask application
+    """
+    @app.before_request
+    def _start_request_trace():
+        from flask import request
+        start_trace(request.endpoint or request.path)
+    
+    @app.after_request
+    def _finish_request_trace(response):
+        stages = finish_trace()
+        if stages and app.config.get('TIMING_SERVER_TIMING_HEADER'):
+            response.headers['Server-Timing'] = server_timing_header(stages)
+        return response
@@ -0,0 +1,139 @@
+"""
+Streaming Upload Ingest
+
+This module stores an uploaded image in a single pass over its stream. The
+upload is written to storage in chunks while its magic bytes are sniffed,
+its size limit is enforced, its SHA-256 content hash is computed and its
+dimensions are read from the image header. Violations abort the copy as
+soon as they are detected and the partial file is removed, so bogus or
+oversized files are never rewound, re-read or fully written.
+"""
+
+import os
+import hashlib
+import tempfile
+
+from utils.error_handlers import ValidationError
+from utils.frame_protocol import sniff_format, FORMAT_ALIASES
+from utils.image_header import parse_dimensions, check_dimensions
+
+# Bytes read from the upload stream at a time
+CHUNK_SIZE = 64 * 1024
+
+# Bytes needed to sniff the image format
+SNIFF_BYTES = 12
+
+class IngestedUpload:
+    """An upload stored by ingest_upload()."""
+    
+    def __init__(self, path, image_format, size, sha256, width, height):
+        self.path = path
+        self.format = image_format
+        self.size = size
+        self.sha256 = sha256
+        self.width = width
+        self.height = height
+    
+    def to_dict(self):
+        """Describe the upload for API responses."""
+        return {
+            'format': self.format,
+            'size': self.size,
+            'sha256': self.sha256,
+            'width': self.width,
+            'height': self.height
+        }
+
+def ingest_upload(stream, path, max_bytes, allowed_formats=('jpeg', 'png', 'webp'),
+                  declared_type=None, max_side=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy an uploaded image to storage, validating it on the way.
+    
+    The image is written to a temporary file next to path and only moved to
+    path once it has been fully validated.
+    
+    Args:
+        stream: Readable binary stream of the upload
+        path: Destination file path
+        max_bytes: Largest accepted upload size in bytes
+        allowed_formats: Accepted image formats
+        declared_type: Optional content type claimed by the client; it must
+            match the sniffed format
+        max_side: Optional largest accepted width or height in pixels
+        chunk_size: Bytes read from the stream at a time
+    
+    Returns:
+        IngestedUpload describing the stored file
+    
+    Raises:
+        ValidationError: If the upload is not an allowed image, is too large
+            or its header is invalid
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.ingest-')
+    
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            image_format = None
+            dimensions = None
+            header = b''
+            size = 0
+            digest = hashlib.sha256()
+            
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValidationError(f'File too large. Maximum size is {max_bytes // (1024 * 1024)}MB.')
+                
+                # Sniff the format and parse the dimensions from the leading
+                # bytes, before the rest of the file is written
+                if dimensions is None:
+                    header += chunk
+                    if image_format is None and len(header) >= SNIFF_BYTES:
+                        image_format = _check_format(header, allowed_formats, declared_type)
+                    if image_format is not None:
+                        dimensions = parse_dimensions(header, image_format)
+                        if dimensions is not None:
+                            check_dimensions(dimensions, max_side)
+                            header = b''
+                
+                digest.update(chunk)
+                out.write(chunk)
+        
+        if size == 0:
+            raise ValidationError('Empty file')
+        if image_format is None:
+            image_format = _check_format(header, allowed_formats, declared_type)
+        if dimensions is None:
+            dimensions = parse_dimensions(header, image_format)
+            if dimensions is None:
+                raise ValidationError('Invalid image data')
+            check_dimensions(dimensions, max_side)
+        
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    return IngestedUpload(path, image_format, size, digest.hexdigest(), *dimensions)
+
+def _check_format(header, allowed_formats, declared_type):
+    """Sniff the image format and check it against the allowed and declared ones."""
+    image_format = sniff_format(header)
+    if image_format is None or image_format not in allowed_formats:
+        raise ValidationError('Invalid file type. Only JPEG, PNG and WebP images are allowed.')
+    
+    if declared_type:
+        declared = declared_type.lower()
+        declared = FORMAT_ALIASES.get(declared, declared)
+        if declared != image_format:
+            raise ValidationError('File content does not match its content type')
+    
+    return image_format
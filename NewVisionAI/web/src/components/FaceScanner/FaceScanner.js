@@ -171,14 +171,25 @@ const FaceScanner = ({ onScanComplete }) => {
       // Draw video frame on canvas
       context.drawImage(video, 0, 0, canvas.width, canvas.height);
       
-      // Get image data as base64
-      const imageData = canvas.toDataURL('image/jpeg');
-      
-      // Send to server via socket
-      socket.emit('scan_face', {
-        frame: imageData,
-        method: 'mediapipe' // Default to mediapipe method
-      });
+      // Encode the frame as JPEG and send the bytes as a binary attachment
+      canvas.toBlob(async (blob) => {
+        // Runs after captureImage returned, outside its try/catch
+        try {
+          if (!blob) {
+            throw new Error('Canvas produced no image');
+          }
+          
+          socket.emit('scan_face', {
+            frame: await blob.arrayBuffer(),
+            format: 'jpeg',
+            method: 'mediapipe' // Default to mediapipe method
+          });
+        } catch (err) {
+          console.error('Error capturing image:', err);
+          setError('Failed to capture image. Please try again.');
+          setIsProcessing(false);
+        }
+      }, 'image/jpeg');
     } catch (err) {
       console.error('Error capturing image:', err);
       setError('Failed to capture image. Please try again.');
@@ -200,9 +211,10 @@ const FaceScanner = ({ onScanComplete }) => {
         const reader = new FileReader();
         
         reader.onload = (e) => {
-          // Send to server via socket
+          // Send the file bytes to the server as a binary attachment
           socket.emit('scan_face', {
             frame: e.target.result,
+            format: file.type,
             method: 'mediapipe' // Default to mediapipe method
           });
         };
@@ -212,7 +224,7 @@ const FaceScanner = ({ onScanComplete }) => {
           setIsProcessing(false);
         };
         
-        reader.readAsDataURL(file);
+        reader.readAsArrayBuffer(file);
       } catch (err) {
         console.error('Error handling file upload:', err);
         setError('Failed to process the image file. Please try another file.');
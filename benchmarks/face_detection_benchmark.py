@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Face Detection Benchmark
+------------------------
+
+Measures the latency and throughput of the face scanning pipeline on
+deterministic synthetic inputs, so results are comparable across commits.
+
+Stages:
+- decode: load_image on an encoded JPEG
+- detect_face: MediaPipe detection on a decoded frame
+- process_frame: the live scan path (frame gate, detection, measurements)
+- extract_measurements: measurements from ready-made landmarks
+- extract_measurements_batch: vectorized measurements for a batch of faces
+- analyze_face: face shape and recommendations from measurements
+
+Every stage is run at each image size and concurrency level. Results are
+written as JSON with per-stage latency percentiles (ms) and frames/sec.
+
+Usage:
+python benchmarks/face_detection_benchmark.py --output results.json
+python benchmarks/face_detection_benchmark.py --compare baseline.json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Make the backend and the root face scanner importable
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'NewVisionAI', 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+
+# Defaults
+DEFAULT_SIZES = ['640x480', '1280x720', '1920x1080']
+DEFAULT_CONCURRENCY = [1, 4]
+DEFAULT_ITERATIONS = 50
+DEFAULT_WARMUP = 5
+DEFAULT_BATCH_SIZE = 64
+
+# Number of distinct synthetic inputs cycled through per stage
+NUM_FIXTURES = 8
+
+# Percentiles reported for every stage
+PERCENTILES = (50, 90, 99)
+
+def parse_size(size):
+    """Parse a 'WIDTHxHEIGHT' string."""
+    width, height = size.lower().split('x')
+    return int(width), int(height)
+
+def build_stages(width, height, batch_size):
+    """
+    Build the benchmark stages for an image size.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        batch_size: Number of faces per extract_measurements_batch call
+    
+    Returns:
+        Dictionary mapping stage name to a callable taking the iteration
+        number and returning True if it produced a result (e.g. found a face)
+    """
+    from utils.face_detection import (
+        load_image,
+        detect_face_from_array,
+        extract_measurements,
+        extract_measurements_batch
+    )
+    from utils.face_analysis import analyze_face
+    from synthetic_faces import (
+        synthetic_face_image,
+        synthetic_face_data,
+        synthetic_landmarks,
+        encode_image
+    )
+    
+    images = [synthetic_face_image(width, height, seed) for seed in range(NUM_FIXTURES)]
+    encoded = [encode_image(image) for image in images]
+    face_data = [synthetic_face_data(width, height, seed) for seed in range(NUM_FIXTURES)]
+    measurements = [extract_measurements(data) for data in face_data]
+    batch = synthetic_landmarks(batch_size, width, height, seed=0, normalized=True)
+    
+    def decode(i):
+        return load_image(encoded[i % NUM_FIXTURES]) is not None
+    
+    def detect_face(i):
+        face_detected, _ = detect_face_from_array(images[i % NUM_FIXTURES])
+        return face_detected
+    
+    def measure(i):
+        return bool(extract_measurements(face_data[i % NUM_FIXTURES]))
+    
+    def measure_batch(i):
+        columns = extract_measurements_batch(batch, image_sizes=(width, height))
+        return bool(np.isfinite(columns['pupillary_distance']).any())
+    
+    def analyze(i):
+        return analyze_face(measurements[i % NUM_FIXTURES]).get('face_shape') is not None
+    
+    stages = {
+        'decode': decode,
+        'detect_face': detect_face,
+        'extract_measurements': measure,
+        'extract_measurements_batch': measure_batch,
+        'analyze_face': analyze
+    }
+    
+    # The root face scanner needs the database models; skip it if unavailable
+    try:
+        from face_scanner import process_frame
+    except ImportError as e:
+        print(f"Warning: process_frame not benchmarked: {e}", file=sys.stderr)
+    else:
+        def scan(i):
+            return process_frame(images[i % NUM_FIXTURES]) is not None
+        stages['process_frame'] = scan
+    
+    return stages
+
+def summarize(latencies, wall_time, successes, items_per_call=1):
+    """
+    Summarize the latencies of one stage run.
+    
+    Args:
+        latencies: Per-call latencies in seconds
+        wall_time: Total wall clock time of the run in seconds
+        successes: Number of calls that produced a result
+        items_per_call: Frames (or faces) processed per call
+    
+    Returns:
+        Dictionary with latency percentiles (ms), mean, throughput and
+        success rate
+    """
+    latencies_ms = np.asarray(latencies) * 1000
+    summary = {
+        f'p{p}_ms': round(float(np.percentile(latencies_ms, p)), 3) for p in PERCENTILES
+    }
+    summary.update({
+        'mean_ms': round(float(latencies_ms.mean()), 3),
+        'min_ms': round(float(latencies_ms.min()), 3),
+        'max_ms': round(float(latencies_ms.max()), 3),
+        'calls': len(latencies),
+        'fps': round(len(latencies) * items_per_call / wall_time, 2) if wall_time > 0 else None,
+        'success_rate': round(successes / len(latencies), 3)
+    })
+    return summary
+
+def run_stage(func, iterations, concurrency, warmup):
+    """
+    Run a stage and time every call.
+    
+    Args:
+        func: Stage callable taking the iteration number
+        iterations: Number of timed calls
+        concurrency: Number of threads issuing calls
+        warmup: Number of untimed calls made first (model loading, caches)
+    
+    Returns:
+        Tuple (latencies, wall_time, successes)
+    """
+    for i in range(warmup):
+        func(i)
+    
+    def timed(i):
+        start = time.perf_counter()
+        result = func(i)
+        return time.perf_counter() - start, bool(result)
+    
+    start = time.perf_counter()
+    if concurrency <= 1:
+        results = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, range(iterations)))
+    wall_time = time.perf_counter() - start
+    
+    latencies = [latency for latency, _ in results]
+    successes = sum(1 for _, ok in results if ok)
+    return latencies, wall_time, successes
+
+def environment_info():
+    """Collect information identifying the benchmarked build and machine."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__
+    }
+
+def run_benchmark(sizes, concurrency_levels, iterations, warmup, batch_size, stage_names=None):
+    """
+    Run every stage at every image size and concurrency level.
+    
+    Args:
+        sizes: List of 'WIDTHxHEIGHT' strings
+        concurrency_levels: List of thread counts
+        iterations: Number of timed calls per run
+        warmup: Number of untimed calls per run
+        batch_size: Number of faces per extract_measurements_batch call
+        stage_names: Optional list of stages to run (defaults to all)
+    
+    Returns:
+        Dictionary with environment info, settings and results
+    """
+    results = []
+    for size in sizes:
+        width, height = parse_size(size)
+        stages = build_stages(width, height, batch_size)
+        
+        for name, func in stages.items():
+            if stage_names and name not in stage_names:
+                continue
+            items_per_call = batch_size if name == 'extract_measurements_batch' else 1
+            
+            for concurrency in concurrency_levels:
+                latencies, wall_time, successes = run_stage(func, iterations, concurrency, warmup)
+                summary = summarize(latencies, wall_time, successes, items_per_call)
+                results.append({
+                    'stage': name,
+                    'size': size,
+                    'concurrency': concurrency,
+                    **summary
+                })
+                print(f"{name:28s} {size:>10s} x{concurrency:<3d} "
+                      f"p50 {summary['p50_ms']:9.3f} ms  p99 {summary['p99_ms']:9.3f} ms  "
+                      f"{summary['fps']:10.2f} fps", file=sys.stderr)
+    
+    return {
+        'environment': environment_info(),
+        'settings': {
+            'sizes': sizes,
+            'concurrency': concurrency_levels,
+            'iterations': iterations,
+            'warmup': warmup,
+            'batch_size': batch_size
+        },
+        'results': results
+    }
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compare two benchmark result files.
+    
+    Args:
+        baseline: Baseline result dictionary
+        current: Current result dictionary
+        threshold: Relative p50 slowdown that counts as a regression
+    
+    Returns:
+        List of regressions as dictionaries
+    """
+    def key(result):
+        return (result['stage'], result['size'], result['concurrency'])
+    
+    baseline_results = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        previous = baseline_results.get(key(result))
+        if previous is None or not previous['p50_ms']:
+            continue
+        change = result['p50_ms'] / previous['p50_ms'] - 1
+        print(f"{result['stage']:28s} {result['size']:>10s} x{result['concurrency']:<3d} "
+              f"p50 {previous['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms ({change:+.1%})")
+        if change > threshold:
+            regressions.append({
+                'stage': result['stage'],
+                'size': result['size'],
+                'concurrency': result['concurrency'],
+                'baseline_p50_ms': previous['p50_ms'],
+                'p50_ms': result['p50_ms'],
+                'change': round(change, 3)
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the face scanning pipeline')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help='Image sizes as WIDTHxHEIGHT')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Concurrency levels (threads)')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help='Timed calls per stage, size and concurrency level')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP,
+                        help='Untimed calls before each run')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Faces per extract_measurements_batch call')
+    parser.add_argument('--stages', nargs='+', help='Only run these stages')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative p50 slowdown reported as a regression')
+    args = parser.parse_args()
+    
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        if regressions:
+            print(json.dumps({'regressions': regressions}, indent=2))
+            sys.exit(1)
+        return
+    
+    report = run_benchmark(args.sizes, args.concurrency, args.iterations,
+                           args.warmup, args.batch_size, args.stages)
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Synthetic Face Fixtures
+
+This module generates deterministic face-like inputs for the benchmarks so
+they run without any image files. Images are drawn with OpenCV (head, hair,
+eyes, eyebrows, nose and mouth on a gradient background) and landmark
+arrays place the measured MediaPipe landmarks at plausible positions, so the
+pure-math stages can be timed without running a detector.
+"""
+
+import math
+import cv2
+import numpy as np
+
+# Landmark indices used by the measurements (MediaPipe Face Mesh topology)
+from utils.face_detection import (
+    NUM_LANDMARKS,
+    LEFT_EYE_OUTER,
+    LEFT_EYE_INNER,
+    RIGHT_EYE_INNER,
+    RIGHT_EYE_OUTER,
+    NOSE_TIP,
+    CHIN_BOTTOM,
+    LEFT_TEMPLE,
+    RIGHT_TEMPLE,
+    LEFT_CHEEK,
+    RIGHT_CHEEK,
+    LEFT_EYEBROW,
+    RIGHT_EYEBROW,
+    TOP_SKULL,
+    FOREHEAD_CENTER
+)
+
+# Key landmark positions relative to the face box, as (x, y) in [0, 1]
+KEY_LANDMARKS = {
+    LEFT_TEMPLE: (0.08, 0.30),
+    RIGHT_TEMPLE: (0.92, 0.30),
+    LEFT_EYE_OUTER: (0.14, 0.42),
+    LEFT_EYE_INNER: (0.31, 0.42),
+    RIGHT_EYE_INNER: (0.69, 0.42),
+    RIGHT_EYE_OUTER: (0.86, 0.42),
+    LEFT_EYEBROW: (0.25, 0.34),
+    RIGHT_EYEBROW: (0.75, 0.34),
+    LEFT_CHEEK: (0.25, 0.56),
+    RIGHT_CHEEK: (0.75, 0.56),
+    NOSE_TIP: (0.50, 0.60),
+    CHIN_BOTTOM: (0.50, 0.90),
+    TOP_SKULL: (0.50, 0.02),
+    FOREHEAD_CENTER: (0.50, 0.25)
+}
+
+# Skin, hair and background colors (BGR)
+SKIN_TONES = [(150, 180, 225), (120, 160, 210), (90, 130, 180), (60, 90, 140)]
+HAIR_COLORS = [(20, 20, 25), (30, 50, 80), (60, 90, 130), (140, 140, 150)]
+
+def face_box(width, height):
+    """
+    Get the face box used for an image size.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+    
+    Returns:
+        Tuple (x, y, w, h) of the face box in pixels
+    """
+    face_height = 0.6 * height
+    face_width = min(0.75 * face_height, 0.8 * width)
+    return ((width - face_width) / 2, 0.2 * height, face_width, face_height)
+
+def synthetic_face_image(width=640, height=480, seed=0):
+    """
+    Draw a deterministic face-like image.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        seed: Seed selecting colors, jitter and noise
+    
+    Returns:
+        BGR image as a (height, width, 3) uint8 array
+    """
+    rng = np.random.default_rng(seed)
+    skin = SKIN_TONES[seed % len(SKIN_TONES)]
+    hair = HAIR_COLORS[seed % len(HAIR_COLORS)]
+    
+    # Vertical gradient background
+    shade = np.linspace(200, 120, height, dtype=np.float32)[:, np.newaxis, np.newaxis]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[...] = shade * np.array([1.0, 0.95, 0.9], dtype=np.float32)
+    
+    x, y, w, h = face_box(width, height)
+    x += rng.uniform(-0.02, 0.02) * width
+    y += rng.uniform(-0.02, 0.02) * height
+    
+    def point(px, py):
+        return (int(round(x + px * w)), int(round(y + py * h)))
+    
+    def size(sx, sy):
+        return (max(1, int(round(sx * w))), max(1, int(round(sy * h))))
+    
+    thickness = max(1, int(round(w / 60)))
+    
+    # Hair, neck and head
+    cv2.ellipse(image, point(0.5, 0.42), size(0.58, 0.58), 0, 180, 360, hair, -1, cv2.LINE_AA)
+    cv2.rectangle(image, point(0.35, 0.85), point(0.65, 1.3), skin, -1)
+    cv2.ellipse(image, point(0.5, 0.5), size(0.46, 0.5), 0, 0, 360, skin, -1, cv2.LINE_AA)
+    
+    # Eyes with iris and pupil, eyebrows
+    for side in (-1, 1):
+        cx = 0.5 + side * 0.225
+        cv2.ellipse(image, point(cx, 0.42), size(0.085, 0.04), 0, 0, 360, (245, 245, 245), -1, cv2.LINE_AA)
+        cv2.circle(image, point(cx, 0.42), size(0.035, 0)[0], (70, 60, 50), -1, cv2.LINE_AA)
+        cv2.circle(image, point(cx, 0.42), size(0.015, 0)[0], (10, 10, 10), -1, cv2.LINE_AA)
+        cv2.ellipse(image, point(cx, 0.35), size(0.1, 0.03), 0, 200, 340, hair, thickness * 2, cv2.LINE_AA)
+    
+    # Nose and mouth
+    shadow = tuple(int(c * 0.75) for c in skin)
+    cv2.line(image, point(0.5, 0.45), point(0.47, 0.6), shadow, thickness, cv2.LINE_AA)
+    cv2.ellipse(image, point(0.5, 0.6), size(0.06, 0.02), 0, 0, 180, shadow, thickness, cv2.LINE_AA)
+    cv2.ellipse(image, point(0.5, 0.75), size(0.14, 0.05), 0, 10, 170, (80, 80, 170), thickness * 2, cv2.LINE_AA)
+    
+    # Sensor noise and a little blur, like a webcam frame
+    noise = rng.normal(0, 4, image.shape)
+    image = np.clip(image + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(image, (3, 3), 0)
+
+def encode_image(image, extension='.jpg', quality=90):
+    """
+    Encode an image to bytes.
+    
+    Args:
+        image: BGR image as numpy array
+        extension: Image format extension ('.jpg', '.png' or '.webp')
+        quality: JPEG/WebP quality
+    
+    Returns:
+        Encoded image bytes
+    """
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if extension == '.jpg' else []
+    if extension == '.webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    ok, buffer = cv2.imencode(extension, image, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {extension}")
+    return buffer.tobytes()
+
+def synthetic_landmarks(count=1, width=640, height=480, seed=0, normalized=False):
+    """
+    Generate deterministic (count, 468, 3) landmark arrays.
+    
+    The measured landmarks sit at plausible positions in the face box; the
+    remaining ones are spread over the face oval. Each face gets a small
+    random offset, scale and per-landmark jitter.
+    
+    Args:
+        count: Number of faces
+        width: Image width in pixels
+        height: Image height in pixels
+        seed: Random seed
+        normalized: Return coordinates normalized to [0, 1] instead of pixels
+    
+    Returns:
+        float32 array of shape (count, 468, 3)
+    """
+    rng = np.random.default_rng(seed)
+    
+    # Template in face box coordinates: the face oval, then the key landmarks
+    angles = np.linspace(0, 2 * math.pi, NUM_LANDMARKS, endpoint=False)
+    radii = np.sqrt(np.linspace(0.05, 1.0, NUM_LANDMARKS))
+    template = np.zeros((NUM_LANDMARKS, 3), dtype=np.float64)
+    template[:, 0] = 0.5 + 0.45 * radii * np.cos(angles * 7)
+    template[:, 1] = 0.5 + 0.48 * radii * np.sin(angles * 7)
+    for idx, (px, py) in KEY_LANDMARKS.items():
+        template[idx, :2] = (px, py)
+    
+    x, y, w, h = face_box(width, height)
+    scales = rng.uniform(0.9, 1.1, (count, 1, 1))
+    offsets = rng.uniform(-0.03, 0.03, (count, 1, 2))
+    jitter = rng.normal(0, 0.004, (count, NUM_LANDMARKS, 2))
+    
+    points = np.empty((count, NUM_LANDMARKS, 3), dtype=np.float64)
+    face_xy = (template[np.newaxis, :, :2] - 0.5) * scales + 0.5 + offsets + jitter
+    points[..., 0] = x + face_xy[..., 0] * w
+    points[..., 1] = y + face_xy[..., 1] * h
+    points[..., 2] = rng.normal(0, 0.01 * w, (count, NUM_LANDMARKS))
+    
+    if normalized:
+        points[..., 0] /= width
+        points[..., 1] /= height
+        points[..., 2] /= width
+    
+    return points.astype(np.float32)
+
+def synthetic_face_data(width=640, height=480, seed=0):
+    """
+    Build face data (as returned by detect_face) from synthetic landmarks.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        seed: Random seed
+    
+    Returns:
+        Dictionary with face landmark data
+    """
+    from utils.face_detection import _build_face_data
+    
+    points = synthetic_landmarks(1, width, height, seed)[0]
+    return _build_face_data(points, width, height)
@@ -1,28 +1,39 @@
 import cv2
 import numpy as np
-from utils.face_detection import detect_face, extract_measurements, detect_face_dlib, extract_measurements_dlib
+from utils.face_detection import (
+    detect_face_from_array,
+    detect_faces_from_array,
+    extract_measurements,
+    detect_face_dlib,
+    extract_measurements_dlib
+)
+from utils.detection_executor import submit_detection, wait_for_detection
+from utils.frame_gate import get_frame_gate
 from models import User, Measurement, db
 
-def process_frame_mediapipe(frame):
+def process_frame_mediapipe(frame, session_id=None, face_box=None):
     """
     Process a frame using MediaPipe face detection.
     
     Args:
         frame: Image as numpy array
+        session_id: Optional live scan session id; frames of a session are
+            tracked across calls instead of being detected from scratch
+        face_box: Optional face box the frame gate found in the frame
         
     Returns:
         Dictionary of measurements or None if no face detected
     """
-    # Save frame to temporary file since detect_face requires a file path
-    temp_path = "temp_frame.jpg"
-    cv2.imwrite(temp_path, frame)
-    
-    # Detect face using MediaPipe
-    face_detected, face_data = detect_face(temp_path)
+    if session_id is not None:
+        # The session's tracking state lives in this process, so run inline
+        face_detected, face_data = detect_face_from_array(frame, session_id=session_id)
+        measurements = extract_measurements(face_data) if face_detected else None
+    else:
+        # Detect face and extract measurements using MediaPipe, in a detection
+        # worker process when the executor is enabled
+        face_detected, face_data, measurements = wait_for_detection(submit_detection(frame, face_box=face_box))
     
     if face_detected:
-        # Extract measurements from face data
-        measurements = extract_measurements(face_data)
         return measurements
     
     return None
@@ -47,21 +58,82 @@ def process_frame_dlib(frame):
     
     return None
 
-def process_frame(frame, method="mediapipe"):
+def process_frame_dlib_multi(frame):
+    """
+    Process every face in a frame using dlib face detection.
+    
+    Args:
+        frame: Image as numpy array
+        
+    Returns:
+        List of per-face dictionaries with index, bounding box and measurements
+    """
+    # Detect faces using dlib, indexed left to right
+    faces = sorted(detect_face_dlib(frame), key=lambda face: face.left())
+    
+    return [
+        {
+            'index': index,
+            'bounding_box': {
+                'x': face.left(),
+                'y': face.top(),
+                'width': face.width(),
+                'height': face.height()
+            },
+            'measurements': extract_measurements_dlib(face, frame)
+        }
+        for index, face in enumerate(faces)
+    ]
+
+def process_frame_multi(frame, method="mediapipe"):
+    """
+    Process a frame and return measurements for every detected face.
+    
+    Args:
+        frame: Image as numpy array
+        method: Detection method - "mediapipe" or "dlib"
+        
+    Returns:
+        List of per-face dictionaries with index, bounding box and
+        measurements; empty if no face was detected
+    """
+    # Reject blurred, badly exposed or face-less frames before the mesh runs
+    gate = get_frame_gate()
+    if gate is not None:
+        accepted, _, _ = gate.check(frame)
+        if not accepted:
+            return []
+    
+    if method.lower() == "dlib":
+        return process_frame_dlib_multi(frame)
+    else:
+        return detect_faces_from_array(frame)
+
+def process_frame(frame, method="mediapipe", session_id=None):
     """
     Process a frame to detect faces and extract measurements.
     
     Args:
         frame: Image as numpy array
         method: Detection method - "mediapipe" or "dlib"
+        session_id: Optional live scan session id (MediaPipe only)
         
     Returns:
         Dictionary of measurements or None if no face detected
     """
+    # Reject blurred, badly exposed or face-less frames before the mesh runs;
+    # the face box the gate found spares the pipeline a second detection
+    face_box = None
+    gate = get_frame_gate()
+    if gate is not None:
+        accepted, _, face_box = gate.check(frame)
+        if not accepted:
+            return None
+    
     if method.lower() == "dlib":
         return process_frame_dlib(frame)
     else:
-        return process_frame_mediapipe(frame)
+        return process_frame_mediapipe(frame, session_id=session_id, face_box=face_box)
 
 def save_measurements(user_id, measurements):
     """
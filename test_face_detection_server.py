@@ -32,6 +32,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Import face detection modules
 try:
     from face_scanner import process_frame, process_frame_mediapipe, process_frame_dlib
+    from utils.dlib_models import preload_dlib_models
     
     # Set flag that modules were successfully imported
     FACE_MODULES_AVAILABLE = True
@@ -221,5 +222,9 @@ if __name__ == '__main__':
     logger.info(f"Face detection modules available: {FACE_MODULES_AVAILABLE}")
     logger.info(f"Upload folder: {UPLOAD_FOLDER}")
     
+    # Load dlib models once up front so /compare-methods doesn't reload them
+    if FACE_MODULES_AVAILABLE:
+        preload_dlib_models()
+    
     # Run the app on port 5050 to avoid conflicts with the main app
     app.run(host='0.0.0.0', port=5050, debug=True) 
\ No newline at end of file
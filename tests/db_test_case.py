@@ -0,0 +1,48 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from flask import Flask
+from config.database import db
+from models import User
+
+class DatabaseTestCase(unittest.TestCase):
+    """Test case with a Flask app, an in-memory database, a user and a temporary upload directory"""
+
+    # App config entries of the test case
+    config = {}
+
+    def setUp(self):
+        """Set up the app, its database and a user"""
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+        self.app = Flask(__name__)
+        self.app.config.update({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'UPLOAD_FOLDER': self.root
+        })
+        self.app.config.update(self.config)
+        db.init_app(self.app)
+        self.init_app(self.app)
+
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.user = User(email='test@example.com', username='test')
+        db.session.add(self.user)
+        db.session.commit()
+
+    def init_app(self, app):
+        """Set up extensions of the app before its context is pushed."""
+        pass
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
@@ -0,0 +1,36 @@
+import unittest
+import os
+import sys
+import types
+from unittest import mock
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+import utils.detection_executor as detection_executor
+import utils.face_detection as face_detection
+
+class DetectionExecutorTest(unittest.TestCase):
+    def test_worker_settings_take_precedence(self):
+        """Test that settings given to a worker override its environment"""
+        with mock.patch.dict(os.environ, {'FACE_CROP_RESOLUTION': '999'}), \
+                mock.patch.dict(face_detection._settings, clear=True):
+            detection_executor._init_worker({'FACE_CROP_RESOLUTION': 384})
+            
+            self.assertEqual(face_detection._get_setting('FACE_CROP_RESOLUTION', 512), 384)
+            self.assertEqual(face_detection._get_setting('FACE_MESH_POOL_SIZE', 0), 1)
+
+    def test_not_started_from_app_main(self):
+        """Test that no workers are spawned when app.py runs as __main__"""
+        main = types.ModuleType('__main__')
+        main.__file__ = detection_executor.APP_MODULE_PATH
+        
+        with mock.patch.dict(sys.modules, {'__main__': main}), \
+                mock.patch.dict(os.environ, {'DETECTION_WORKERS': '2'}), \
+                mock.patch.object(detection_executor, '_skipped_for_main', False), \
+                mock.patch.object(detection_executor, 'DetectionExecutor') as executor:
+            self.assertIsNone(detection_executor.get_detection_executor())
+            executor.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
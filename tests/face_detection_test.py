@@ -0,0 +1,154 @@
+import unittest
+import os
+import sys
+import threading
+import numpy as np
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.face_detection import (
+    LandmarkView,
+    MEASUREMENT_NAMES,
+    LEFT_TEMPLE,
+    RIGHT_TEMPLE,
+    extract_measurements,
+    extract_measurements_batch,
+    measurement_rows
+)
+from utils.face_mesh_pool import FaceMeshPool
+
+class ExtractMeasurementsTest(unittest.TestCase):
+    def setUp(self):
+        """Set up deterministic landmark data"""
+        rng = np.random.default_rng(42)
+        self.points = rng.uniform(100, 900, (468, 3)).astype(np.float32)
+
+    def test_array_and_dict_forms_match(self):
+        """Test that the array path and the legacy dict path agree"""
+        from_array = extract_measurements({
+            'landmarks': LandmarkView(self.points),
+            'landmark_array': self.points
+        })
+        legacy = {idx: tuple(float(v) for v in point) for idx, point in enumerate(self.points)}
+        from_dict = extract_measurements({'landmarks': legacy})
+
+        self.assertEqual(set(from_array), set(MEASUREMENT_NAMES))
+        for name in MEASUREMENT_NAMES:
+            self.assertAlmostEqual(from_array[name], from_dict[name], places=1)
+
+    def test_face_width_is_reference(self):
+        """Test that face width is the reference width used for scaling"""
+        measurements = extract_measurements({'landmarks': LandmarkView(self.points)})
+        self.assertEqual(measurements['face_width'], 140.0)
+
+    def test_missing_temples(self):
+        """Test that measurements cannot be extracted without temples"""
+        legacy = {idx: tuple(point) for idx, point in enumerate(self.points)
+                  if idx not in (LEFT_TEMPLE, RIGHT_TEMPLE)}
+        self.assertEqual(extract_measurements({'landmarks': legacy}), {})
+
+    def test_too_few_landmarks(self):
+        """Test that arrays missing landmarks past the temples are rejected"""
+        points = self.points[:RIGHT_TEMPLE + 1]
+        self.assertEqual(extract_measurements({'landmarks': LandmarkView(points), 'landmark_array': points}), {})
+
+    def test_landmark_view(self):
+        """Test that the lazy view exposes the legacy tuple format"""
+        view = LandmarkView(self.points)
+        self.assertEqual(len(view), 468)
+        x, y, z = view[LEFT_TEMPLE]
+        self.assertIsInstance(x, int)
+        self.assertEqual(x, int(self.points[LEFT_TEMPLE, 0]))
+        self.assertIsNone(view.get(468))
+
+class ExtractMeasurementsBatchTest(unittest.TestCase):
+    def test_batch_matches_single(self):
+        """Test that batch extraction matches per-face extraction"""
+        rng = np.random.default_rng(7)
+        normalized = rng.uniform(0.1, 0.9, (5, 468, 3)).astype(np.float32)
+        sizes = np.array([(640, 480), (1280, 720), (800, 800), (320, 240), (1920, 1080)])
+
+        rows = measurement_rows(extract_measurements_batch(normalized, sizes))
+
+        for face, (width, height), row in zip(normalized, sizes, rows):
+            points = face * np.array([width, height, 1], dtype=np.float32)
+            single = extract_measurements({'landmarks': LandmarkView(points), 'landmark_array': points})
+            for name in MEASUREMENT_NAMES:
+                self.assertAlmostEqual(row[name], single[name], places=1)
+
+    def test_degenerate_face(self):
+        """Test that faces without a usable face width come back empty"""
+        points = np.zeros((2, 468, 3), dtype=np.float32)
+        points[1] = np.random.default_rng(1).uniform(0, 500, (468, 3))
+        columns = extract_measurements_batch(points)
+        self.assertTrue(np.isnan(columns['pupillary_distance'][0]))
+        self.assertEqual(measurement_rows(columns)[0], {})
+        self.assertEqual(measurement_rows(columns)[1]['face_width'], 140.0)
+
+    def test_invalid_shape(self):
+        """Test that invalid landmark shapes are rejected"""
+        with self.assertRaises(ValueError):
+            extract_measurements_batch(np.zeros((468, 3)))
+
+class FaceMeshPoolTest(unittest.TestCase):
+    def setUp(self):
+        """Set up a pool of two stub instances"""
+        self.created = []
+        self.pool = FaceMeshPool(self.factory, size=2, timeout=0.05)
+
+    def factory(self):
+        instance = object()
+        self.created.append(instance)
+        return instance
+
+    def test_size_is_bounded(self):
+        """Test that the pool never creates more instances than its size"""
+        first = self.pool.checkout()
+        second = self.pool.checkout()
+        self.assertIsNot(first, second)
+
+        with self.assertRaises(TimeoutError):
+            self.pool.checkout()
+        self.assertEqual(self.pool.created, 2)
+
+        self.pool.checkin(second)
+        self.assertIs(self.pool.checkout(), second)
+        self.assertEqual(len(self.created), 2)
+
+    def test_concurrent_checkouts_share_instances(self):
+        """Test that concurrent threads reuse instances instead of creating more"""
+        in_use = []
+        lock = threading.Lock()
+        peak = [0]
+
+        def work():
+            for _ in range(20):
+                with self.pool.acquire(timeout=5) as instance:
+                    with lock:
+                        in_use.append(instance)
+                        peak[0] = max(peak[0], len(in_use))
+                    with lock:
+                        in_use.remove(instance)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(len(self.created), 2)
+        self.assertLessEqual(peak[0], 2)
+        self.assertEqual(self.pool.available, self.pool.created)
+
+    def test_checkout_times_out(self):
+        """Test that a checkout waits the pool timeout for a free instance"""
+        pool = FaceMeshPool(self.factory, size=1, timeout=0.05)
+        with pool.acquire():
+            with self.assertRaises(TimeoutError) as context:
+                pool.checkout()
+        self.assertIn('0.05 seconds', str(context.exception))
+        self.assertIsNotNone(pool.checkout())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+import threading
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.face_mesh_sessions import FaceMeshSessions
+
+class StubFaceMesh:
+    """Stand-in for a tracking FaceMesh instance"""
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FaceMeshSessionsTest(unittest.TestCase):
+    def test_created_on_first_frame(self):
+        """Test that a session's FaceMesh is created when its first frame is processed"""
+        sessions = FaceMeshSessions(StubFaceMesh)
+        self.assertNotIn('a', sessions)
+        
+        with sessions.acquire('a') as face_mesh:
+            self.assertIsInstance(face_mesh, StubFaceMesh)
+        with sessions.acquire('a') as again:
+            self.assertIs(again, face_mesh)
+        
+        self.assertTrue(sessions.release('a'))
+        self.assertTrue(face_mesh.closed)
+
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used session is evicted at the limit"""
+        sessions = FaceMeshSessions(StubFaceMesh, max_sessions=2)
+        meshes = {}
+        for session_id in ('a', 'b', 'a', 'c'):
+            with sessions.acquire(session_id) as face_mesh:
+                meshes.setdefault(session_id, face_mesh)
+        
+        self.assertEqual(len(sessions), 2)
+        self.assertNotIn('b', sessions)
+        self.assertTrue(meshes['b'].closed)
+        self.assertFalse(meshes['a'].closed)
+
+    def test_busy_sessions_not_evicted(self):
+        """Test that a frame gets no session while every session is processing"""
+        created = []
+        def factory():
+            created.append(StubFaceMesh())
+            return created[-1]
+        sessions = FaceMeshSessions(factory, max_sessions=1)
+        
+        entered, done = threading.Event(), threading.Event()
+        def process():
+            with sessions.acquire('a'):
+                entered.set()
+                done.wait(5)
+        thread = threading.Thread(target=process)
+        thread.start()
+        entered.wait(5)
+        
+        with sessions.acquire('b') as face_mesh:
+            self.assertIsNone(face_mesh)
+        self.assertEqual(len(created), 1)
+        self.assertIn('a', sessions)
+        
+        done.set()
+        thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import sys
+from unittest import mock
+import numpy as np
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+import utils.face_detection as face_detection
+from utils.frame_gate import FrameGate, REJECT_BLUR, REJECT_EXPOSURE, REJECT_NO_FACE
+
+def make_frame(low=40, high=200, shape=(480, 640, 3)):
+    """Create a sharp, evenly exposed checkerboard frame"""
+    rows, cols = np.indices(shape[:2])
+    pattern = ((rows // 8 + cols // 8) % 2).astype(bool)
+    frame = np.where(pattern, high, low).astype(np.uint8)
+    return np.repeat(frame[:, :, None], shape[2], axis=2)
+
+class FrameGateTest(unittest.TestCase):
+    def test_sharp_frame_accepted(self):
+        """Test that a sharp, well exposed frame passes without the detector"""
+        gate = FrameGate(use_detector=False)
+        
+        self.assertEqual(gate.check(make_frame()), (True, None, None))
+        self.assertEqual(gate.stats()['accepted'], 1)
+
+    def test_blurred_frame_rejected(self):
+        """Test that a frame without detail fails the blur check"""
+        gate = FrameGate(use_detector=False)
+        frame = np.full((480, 640, 3), 128, np.uint8)
+        
+        self.assertEqual(gate.check(frame), (False, REJECT_BLUR, None))
+        self.assertEqual(gate.stats()[REJECT_BLUR], 1)
+
+    def test_bad_exposure_rejected(self):
+        """Test that too dark and too bright frames fail the exposure check"""
+        gate = FrameGate(use_detector=False)
+        
+        self.assertEqual(gate.check(make_frame(0, 30))[1], REJECT_EXPOSURE)
+        self.assertEqual(gate.check(make_frame(230, 255))[1], REJECT_EXPOSURE)
+        self.assertEqual(gate.stats()[REJECT_EXPOSURE], 2)
+        self.assertEqual(gate.stats()['rejected'], 2)
+
+    def test_face_box_scaled_to_frame(self):
+        """Test that the detector's face box is returned in full frame pixels"""
+        gate = FrameGate(max_side=320)
+        frame = make_frame(shape=(1280, 1920, 3))
+        
+        with mock.patch('utils.frame_gate.detect_face_boxes', return_value=[(100, 50, 60, 80, 0.9)]):
+            self.assertEqual(gate.check(frame), (True, None, (600, 300, 360, 480, 0.9)))
+        with mock.patch('utils.frame_gate.detect_face_boxes', return_value=[(100, 50, 5, 8, 0.9)]):
+            self.assertEqual(gate.check(frame), (False, REJECT_NO_FACE, None))
+
+    def test_pipeline_reuses_face_box(self):
+        """Test that large frames mesh the gate's face region without detecting again"""
+        frame = make_frame(shape=(1440, 1920, 3))
+        points = np.zeros((468, 3), np.float32)
+        
+        with mock.patch.object(face_detection, 'detect_face_boxes') as detect_face_boxes, \
+                mock.patch.object(face_detection, '_mesh_face_region', return_value=points) as mesh:
+            face_detected, _ = face_detection.detect_face_from_array(
+                frame, face_box=(600, 300, 360, 480, 0.9))
+        
+        self.assertTrue(face_detected)
+        detect_face_boxes.assert_not_called()
+        region = mesh.call_args[0][1]
+        self.assertLessEqual(region[0], 600)
+        self.assertGreaterEqual(region[2], 960)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import os
+import sys
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.frame_mailbox import FrameMailbox
+
+class FrameMailboxTest(unittest.TestCase):
+    def test_latest_frame_wins(self):
+        """Test that only the newest pending frame is kept"""
+        mailbox = FrameMailbox()
+        
+        self.assertTrue(mailbox.put('frame-1'))
+        self.assertFalse(mailbox.put('frame-2'))
+        self.assertFalse(mailbox.put('frame-3'))
+        
+        self.assertEqual(mailbox.take(), 'frame-3')
+        self.assertIsNone(mailbox.take())
+        self.assertEqual(mailbox.stats(), {'received': 3, 'processed': 2, 'dropped': 1})
+
+    def test_consumer_released(self):
+        """Test that a new consumer is chosen once the mailbox is drained or abandoned"""
+        mailbox = FrameMailbox()
+        mailbox.put('frame-1')
+        self.assertIsNone(mailbox.take())
+        self.assertTrue(mailbox.put('frame-2'))
+        
+        mailbox.put('frame-3')
+        mailbox.abandon()
+        self.assertTrue(mailbox.put('frame-4'))
+        self.assertEqual(mailbox.dropped, 1)
+
+if __name__ == '__main__':
+    unittest.main()
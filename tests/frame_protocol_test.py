@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+import numpy as np
+import cv2
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.frame_protocol import decode_binary_frame
+from utils.error_handlers import ValidationError
+
+class BinaryFrameTest(unittest.TestCase):
+    def setUp(self):
+        """Create a small BGR test frame"""
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+
+    def test_encoded_frame(self):
+        """Test that JPEG bytes are sniffed and decoded"""
+        encoded = cv2.imencode('.jpg', self.frame)[1].tobytes()
+        decoded = decode_binary_frame({'frame': encoded})
+        
+        self.assertEqual(decoded.shape, self.frame.shape)
+
+    def test_raw_frames(self):
+        """Test that raw pixel buffers are decoded to BGR"""
+        rgba = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGBA).tobytes()
+        decoded = decode_binary_frame({'frame': rgba, 'format': 'rgba', 'width': 64, 'height': 48})
+        np.testing.assert_array_equal(decoded, self.frame)
+        
+        decoded = decode_binary_frame({'frame': self.frame.tobytes(), 'format': 'bgr', 'width': 64, 'height': 48})
+        np.testing.assert_array_equal(decoded, self.frame)
+
+    def test_invalid_frames(self):
+        """Test that mismatched headers and unknown formats are rejected"""
+        with self.assertRaises(ValidationError):
+            decode_binary_frame({'frame': self.frame.tobytes(), 'format': 'rgba', 'width': 64, 'height': 48})
+        with self.assertRaises(ValidationError):
+            decode_binary_frame({'frame': b'GIF89a not supported'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import base64
+import struct
+import zlib
+from unittest import mock
+import numpy as np
+import cv2
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+import utils.image_decode as image_decode
+from utils.image_decode import decode_image, decode_data_url, choose_scale
+from utils.error_handlers import ValidationError
+
+class ImageDecodeTest(unittest.TestCase):
+    def setUp(self):
+        """Create a BGR test image"""
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 255, (960, 1280, 3), dtype=np.uint8)
+        self.png = cv2.imencode('.png', self.image)[1].tobytes()
+
+    def test_choose_scale(self):
+        """Test that the scale keeps the shorter side at or above the target"""
+        self.assertEqual(choose_scale(1280, 960, None), 1)
+        self.assertEqual(choose_scale(1280, 960, 224), 4)
+        self.assertEqual(choose_scale(1280, 960, 100), 8)
+        self.assertEqual(choose_scale(400, 300, 224), 1)
+
+    def test_full_resolution(self):
+        """Test that images are decoded unchanged by default"""
+        decoded = decode_image(self.png)
+
+        np.testing.assert_array_equal(decoded.image, self.image)
+        self.assertEqual((decoded.format, decoded.width, decoded.height, decoded.scale), ('png', 1280, 960, 1))
+
+    def test_reduced_rgb(self):
+        """Test reduced-scale decoding straight to RGB"""
+        encoded = cv2.imencode('.jpg', self.image)[1].tobytes()
+        decoded = decode_image(encoded, target_side=224, rgb=True)
+        reference = cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_REDUCED_COLOR_4)
+
+        self.assertEqual(decoded.scale, 4)
+        self.assertEqual((decoded.width, decoded.height), (1280, 960))
+        self.assertEqual((decoded.decoded_width, decoded.decoded_height), (320, 240))
+        np.testing.assert_array_equal(decoded.image, reference[:, :, ::-1])
+
+    def test_data_url(self):
+        """Test data URL decoding and validation"""
+        data_url = 'data:image/png;base64,' + base64.b64encode(self.png).decode()
+        np.testing.assert_array_equal(decode_data_url(data_url).image, self.image)
+
+        with self.assertRaises(ValidationError):
+            decode_data_url(base64.b64encode(self.png).decode())
+        with self.assertRaises(ValidationError):
+            decode_data_url('data:image/jpeg;base64,' + base64.b64encode(self.png).decode())
+        with self.assertRaises(ValidationError):
+            decode_data_url('data:image/gif;base64,R0lGODlh')
+
+    def test_oversized_rejected_before_decode(self):
+        """Test that images over the side limit are rejected from their header"""
+        # A tiny PNG declaring a 50000x50000 bitmap (decompression bomb)
+        ihdr = struct.pack('>IIBBBBB', 50000, 50000, 8, 2, 0, 0, 0)
+        bomb = (b'\x89PNG\r\n\x1a\n' + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr +
+                struct.pack('>I', zlib.crc32(b'IHDR' + ihdr)))
+
+        with mock.patch.object(image_decode.cv2, 'imdecode') as imdecode:
+            with self.assertRaises(ValidationError) as context:
+                decode_image(bomb, max_side=4000)
+            self.assertEqual(context.exception.message, 'Image dimensions too large')
+            with self.assertRaises(ValidationError):
+                decode_image(self.png, max_side=1000)
+            imdecode.assert_not_called()
+
+        self.assertEqual(decode_image(self.png, max_side=1280).width, 1280)
+
+    def test_data_url_checked_before_base64_decode(self):
+        """Test that the data URL header is checked from its leading characters"""
+        data_url = 'data:image/png;base64,' + base64.b64encode(self.png).decode()
+
+        with mock.patch.object(image_decode.base64, 'b64decode', wraps=base64.b64decode) as b64decode:
+            with self.assertRaises(ValidationError):
+                decode_data_url(data_url, max_side=1000)
+            self.assertEqual(b64decode.call_count, 1)
+            self.assertLessEqual(len(b64decode.call_args[0][0]), image_decode.HEADER_PEEK_CHARS)
+
+if __name__ == '__main__':
+    unittest.main()
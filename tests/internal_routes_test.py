@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+
+# Add backend and tests directories to path to allow imports
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(TESTS_DIR), 'NewVisionAI', 'backend'))
+sys.path.append(TESTS_DIR)
+
+from flask_jwt_extended import JWTManager, create_access_token
+from config.database import db
+from models import User
+from utils.error_handlers import setup_error_handlers
+from api.internal import internal
+from db_test_case import DatabaseTestCase
+
+class InternalRoutesTest(DatabaseTestCase):
+    config = {
+        'JWT_SECRET_KEY': 'internal-routes-test-secret-key-0123456789'
+    }
+    
+    def init_app(self, app):
+        JWTManager(app)
+        setup_error_handlers(app)
+        app.register_blueprint(internal)
+    
+    def setUp(self):
+        """Set up an admin and a regular user with access tokens"""
+        super().setUp()
+        admin = User(email='admin@example.com', username='admin', is_admin=True)
+        db.session.add(admin)
+        db.session.commit()
+        
+        self.client = self.app.test_client()
+        self.admin_headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        self.user_headers = {'Authorization': f'Bearer {create_access_token(identity=str(self.user.id))}'}
+    
+    def assert_admin_only(self, url):
+        self.assertEqual(self.client.get(url).status_code, 401)
+        
+        response = self.client.get(url, headers=self.user_headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.get_json()['message'], 'Admin access required')
+        
+        self.assertEqual(self.client.get(url, headers=self.admin_headers).status_code, 200)
+    
+    def test_timings_admin_only(self):
+        """Test that timing histograms are only served to admins"""
+        self.assert_admin_only('/api/internal/timings')
+    
+    def test_frame_gate_admin_only(self):
+        """Test that frame gate counters are only served to admins"""
+        self.assert_admin_only('/api/internal/frame-gate')
+    
+    def test_result_cache_admin_only(self):
+        """Test that result cache counters are only served to admins"""
+        self.assert_admin_only('/api/internal/result-cache')
+
+if __name__ == '__main__':
+    unittest.main()
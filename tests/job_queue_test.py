@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+from unittest import mock
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from config.database import db
+from models import Measurement, ScanJob
+from utils.error_handlers import ValidationError
+from utils.job_queue import init_job_queue, enqueue_scan_job
+from api.face_scanner import face_scanner
+from flask_jwt_extended import JWTManager, create_access_token
+
+# Add tests directory to path to import the shared test case
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_test_case import DatabaseTestCase
+
+class ScanJobQueueTest(DatabaseTestCase):
+    config = {
+        'JOB_QUEUE_EAGER': True,
+        'PROGRESS_EVENTS_PROTOCOL': 1,
+        'SOCKETIO_MESSAGE_QUEUE': None,
+        'JWT_SECRET_KEY': 'test-secret-key-of-at-least-32-bytes'
+    }
+    
+    def init_app(self, app):
+        init_job_queue(app)
+        JWTManager(app)
+        app.register_blueprint(face_scanner)
+    
+    def setUp(self):
+        """Set up an app running jobs eagerly against an in-memory database"""
+        super().setUp()
+        
+        # Socket.IO progress events are not under test
+        patcher = mock.patch('utils.job_queue.emit_progress_error')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_job_completes(self):
+        """Test that a queued scan is processed and its job completed"""
+        def process_scan(user_id, scan_id, on_step=None):
+            measurement = Measurement(user_id=user_id, pupillary_distance=63.0, scan_data_url=scan_id)
+            db.session.add(measurement)
+            db.session.commit()
+            on_step('processing_complete', measurement_id=measurement.id)
+            return measurement, {'pupillary_distance': 63.0}
+        
+        with mock.patch('utils.job_queue.process_scan', side_effect=process_scan):
+            job = enqueue_scan_job(self.user.id, 'abc123.jpg')
+        
+        job = ScanJob.query.filter_by(scan_id='abc123.jpg').first()
+        self.assertEqual(job.state, ScanJob.COMPLETED)
+        self.assertEqual(job.step, 'processing_complete')
+        self.assertIsNotNone(job.measurement_id)
+        self.assertIsNotNone(job.task_id)
+    
+    def test_job_failure_recorded(self):
+        """Test that a scan without a face fails its job"""
+        with mock.patch('utils.job_queue.process_scan',
+                        side_effect=ValidationError('No face detected in the image')):
+            enqueue_scan_job(self.user.id, 'def456.jpg')
+        
+        job = ScanJob.query.filter_by(scan_id='def456.jpg').first()
+        self.assertEqual(job.state, ScanJob.FAILED)
+        self.assertEqual(job.error, 'No face detected in the image')
+        self.assertTrue(job.finished)
+    
+    def test_process_route_reuses_job_measurement(self):
+        """Test that processing a scan its job already processed stores no second measurement"""
+        measurement = Measurement(user_id=self.user.id, pupillary_distance=63.0, scan_data_url='abc123.jpg')
+        db.session.add(measurement)
+        db.session.commit()
+        db.session.add(ScanJob(scan_id='abc123.jpg', user_id=self.user.id, state=ScanJob.COMPLETED,
+                               measurement_id=measurement.id))
+        db.session.add(ScanJob(scan_id='def456.jpg', user_id=self.user.id, state=ScanJob.QUEUED))
+        db.session.commit()
+        
+        # Scans stored before the scan store are read from the upload directory
+        os.makedirs(os.path.join(self.root, 'face_scans'))
+        for scan_id in ('abc123.jpg', 'def456.jpg'):
+            open(os.path.join(self.root, 'face_scans', scan_id), 'wb').close()
+        
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(self.user.id))}'}
+        client = self.app.test_client()
+        with mock.patch('api.face_scanner.process_scan') as process_scan:
+            response = client.get('/api/face-scanner/process/abc123.jpg', headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['measurement_id'], measurement.id)
+            
+            response = client.get('/api/face-scanner/process/def456.jpg', headers=headers)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.get_json()['status'], 'processing')
+            process_scan.assert_not_called()
+        
+        self.assertEqual(Measurement.query.count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
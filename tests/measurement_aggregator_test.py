@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.measurement_aggregator import MeasurementAggregator, MeasurementSessions
+
+def make_measurements(pd, noise=0.0, rng=None):
+    """Build a measurement dictionary around a pupillary distance"""
+    jitter = rng.normal(0, noise) if rng is not None else 0.0
+    return {
+        'pupillary_distance': round(pd + jitter, 1),
+        'bridge_width': round(pd + jitter, 1),
+        'temple_length': None,
+        'lens_width': 50.0,
+        'lens_height': 40.0,
+        'frame_width': 140.0,
+        'face_width': 140.0,
+        'face_height': 120.0
+    }
+
+class MeasurementAggregatorTest(unittest.TestCase):
+    def test_converges_on_stable_measurements(self):
+        """Test that stable frames converge after the minimum frame count"""
+        aggregator = MeasurementAggregator(window=10, min_frames=5, tolerance=0.5)
+        results = [aggregator.add(make_measurements(63.0)) for _ in range(5)]
+        
+        self.assertEqual(results, [False, False, False, False, True])
+        estimate = aggregator.estimate()
+        self.assertTrue(estimate['converged'])
+        self.assertEqual(estimate['measurements']['pupillary_distance'], 63.0)
+        self.assertIsNone(estimate['measurements']['temple_length'])
+
+    def test_noisy_measurements_do_not_converge(self):
+        """Test that noisy frames keep the scan open"""
+        rng = np.random.default_rng(3)
+        aggregator = MeasurementAggregator(window=10, min_frames=5, tolerance=0.5)
+        for _ in range(10):
+            aggregator.add(make_measurements(63.0, noise=5.0, rng=rng))
+        
+        self.assertFalse(aggregator.converged)
+        self.assertGreater(aggregator.estimate()['variance']['pupillary_distance'], 1.0)
+
+    def test_spread_out_minority_does_not_converge(self):
+        """Test that a window whose majority agrees but whose other frames spread widely stays open"""
+        aggregator = MeasurementAggregator(window=10, min_frames=5, tolerance=0.5)
+        for pd in (60.0, 60.0, 60.0, 64.0, 56.0):
+            aggregator.add(make_measurements(pd))
+        
+        estimate = aggregator.estimate()
+        self.assertFalse(estimate['converged'])
+        self.assertGreater(estimate['variance']['pupillary_distance'], 1.0)
+
+    def test_median_ignores_outliers(self):
+        """Test that a single outlier frame does not move the estimate"""
+        aggregator = MeasurementAggregator(window=10, min_frames=3, tolerance=0.5)
+        for pd in (63.0, 63.0, 90.0, 63.0, 63.0):
+            aggregator.add(make_measurements(pd))
+        
+        self.assertEqual(aggregator.estimate()['measurements']['pupillary_distance'], 63.0)
+
+    def test_sessions_release(self):
+        """Test that releasing a session starts a new scan"""
+        sessions = MeasurementSessions(window=5, min_frames=1, tolerance=0.5)
+        sessions.get('sid').add(make_measurements(63.0))
+        self.assertTrue(sessions.is_converged('sid'))
+        
+        sessions.release('sid')
+        self.assertFalse(sessions.is_converged('sid'))
+
+if __name__ == '__main__':
+    unittest.main()
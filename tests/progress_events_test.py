@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+import time
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.progress_events import ProgressBatcher, PROTOCOL_VERSION
+
+class ProgressBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.emit = lambda event, data, room=None: self.sent.append((event, data, room))
+    
+    def test_terminal_update_flushes_batch(self):
+        """Test that a scan's updates are sent as one message on completion"""
+        batcher = ProgressBatcher(self.emit, flush_interval=60)
+        
+        batcher.update('user_1', 'scan1', 'processing_started')
+        batcher.update('user_1', 'scan1', 'face_detected')
+        batcher.update('user_1', 'scan1', 'measurements_extracted', measurements={'pupillary_distance': 64.0})
+        self.assertEqual(self.sent, [])
+        
+        batcher.update('user_1', 'scan1', 'processing_complete', measurement_id=7)
+        self.assertEqual(len(self.sent), 1)
+        event, data, room = self.sent[0]
+        self.assertEqual((event, room), ('processing_update', 'user_1'))
+        self.assertEqual(data['protocol'], PROTOCOL_VERSION)
+        self.assertEqual(data['status'], 'processing_complete')
+        self.assertEqual(data['measurement_id'], 7)
+        self.assertEqual(data['measurements'], {'pupillary_distance': 64.0})
+        self.assertEqual(data['updates'], ['processing_started', 'face_detected',
+                                           'measurements_extracted', 'processing_complete'])
+        self.assertEqual(batcher.pending(), 0)
+    
+    def test_interval_flush(self):
+        """Test that pending updates are sent once the flush interval passes"""
+        batcher = ProgressBatcher(self.emit, flush_interval=0.02)
+        batcher.update('user_1', 'scan1', 'upload_complete')
+        batcher.update('user_2', 'scan2', 'processing_started')
+        
+        deadline = time.monotonic() + 2
+        while len(self.sent) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(sorted(room for _, _, room in self.sent), ['user_1', 'user_2'])
+        self.assertEqual(batcher.pending(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.result_cache import ResultCache, KIND_DETECTION, KIND_FACE_SHAPE
+
+def make_image(seed):
+    """Create a deterministic smooth test image"""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (31, 31), 0)
+
+class ResultCacheTest(unittest.TestCase):
+    def test_reencoded_image_hits(self):
+        """Test that a re-encoded copy of an image hits the cache"""
+        cache = ResultCache(max_distance=8)
+        image = make_image(0)
+        cache.put(cache.key(image, KIND_DETECTION, scope='sid'), (True, {}, {'pupillary_distance': 63.0}))
+        
+        _, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        copy = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        
+        self.assertIsNotNone(cache.get(cache.key(copy, KIND_DETECTION, scope='sid')))
+        self.assertIsNone(cache.get(cache.key(make_image(1), KIND_DETECTION, scope='sid')))
+        self.assertIsNone(cache.get(cache.key(image, KIND_FACE_SHAPE, scope='sid')))
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_scopes_are_isolated(self):
+        """Test that a user or session is never served another one's results"""
+        cache = ResultCache(max_distance=8)
+        image = make_image(0)
+        cache.put(cache.key(image, KIND_DETECTION, scope='user-1'), 'a')
+        cache.put(cache.key(image, KIND_DETECTION, scope='user-1', exact=True), 'b')
+        
+        self.assertIsNone(cache.get(cache.key(image, KIND_DETECTION, scope='user-2')))
+        self.assertIsNone(cache.get(cache.key(image, KIND_DETECTION, scope='user-2', exact=True)))
+        self.assertEqual(cache.get(cache.key(image, KIND_DETECTION, scope='user-1', exact=True)), 'b')
+
+    def test_exact_keys_match_identical_images_only(self):
+        """Test that content hash keys don't match re-encoded copies"""
+        cache = ResultCache(max_distance=8)
+        image = make_image(0)
+        cache.put(cache.key(image, KIND_DETECTION, scope='user-1', exact=True), 'a')
+        
+        _, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        copy = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        
+        self.assertEqual(cache.get(cache.key(image.copy(), KIND_DETECTION, scope='user-1', exact=True)), 'a')
+        self.assertIsNone(cache.get(cache.key(copy, KIND_DETECTION, scope='user-1', exact=True)))
+
+    def test_nearest_compares_recent_frames_only(self):
+        """Test that inexact lookups only compare the scope's most recent frames"""
+        cache = ResultCache(max_distance=8, nearest_candidates=2)
+        image = make_image(0)
+        cache.put(cache.key(image, KIND_DETECTION, scope='sid'), 'a')
+        for seed in (1, 2):
+            cache.put(cache.key(make_image(seed), KIND_DETECTION, scope='sid'), seed)
+        
+        _, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        copy = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        
+        # Still cached, but no longer among the two most recent frames
+        self.assertIsNone(cache.get(cache.key(copy, KIND_DETECTION, scope='sid')))
+        self.assertEqual(cache.get(cache.key(image, KIND_DETECTION, scope='sid')), 'a')
+        self.assertEqual(cache.get(cache.key(copy, KIND_DETECTION, scope='sid')), 'a')
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResultCache(max_entries=2)
+        keys = [cache.key(make_image(seed), KIND_DETECTION) for seed in range(3)]
+        cache.put(keys[0], 'a')
+        cache.put(keys[1], 'b')
+        cache.get(keys[0])
+        cache.put(keys[2], 'c')
+        
+        self.assertEqual(cache.get(keys[0]), 'a')
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their time to live"""
+        cache = ResultCache(ttl=0.01)
+        key = cache.key(make_image(0), KIND_DETECTION)
+        cache.put(key, 'a')
+        time.sleep(0.02)
+        
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import io
+import sys
+from concurrent.futures import Future
+from unittest import mock
+import cv2
+import numpy as np
+
+# Add backend and benchmarks directories to path to allow imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'NewVisionAI', 'backend'))
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+
+from config.database import db
+from models import Measurement, ScanContent
+from synthetic_faces import synthetic_landmarks
+from utils.scan_store import LocalScanStorage, ScanStore
+from utils.scan_processing import process_scans_batch, delete_measurement_record
+from utils.upload_ingest import ingest_upload
+
+# Add tests directory to path to import the shared test case
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_test_case import DatabaseTestCase
+
+class BatchScanProcessingTest(DatabaseTestCase):
+    def setUp(self):
+        """Set up stored scans with an in-memory database"""
+        super().setUp()
+        
+        self.store = ScanStore(LocalScanStorage(self.root), os.path.join(self.root, '.incoming'))
+        patcher = mock.patch('utils.scan_processing.get_scan_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def add_scan(self, scan_id, value):
+        ok, buffer = cv2.imencode('.png', np.full((48, 64, 3), value, np.uint8))
+        data = buffer.tobytes()
+        upload = ingest_upload(io.BytesIO(data), self.store.staging_path(scan_id), len(data))
+        self.store.add(self.user.id, scan_id, upload)
+    
+    def test_batch_detects_each_content_once(self):
+        """Test that a batch measures every scan and reuses duplicate detections"""
+        self.add_scan('a.png', 10)
+        self.add_scan('b.png', 10)
+        self.add_scan('c.png', 255)
+        landmarks = synthetic_landmarks(1, 640, 480, normalized=False)[0]
+        
+        def submit_detection(image, is_rgb=False, measure=True):
+            future = Future()
+            if image.mean() > 200:
+                future.set_result((False, None, None))
+            else:
+                future.set_result((True, {'landmark_array': landmarks}, None))
+            return future
+        
+        with mock.patch('utils.scan_processing.submit_detection', side_effect=submit_detection) as submit:
+            results = process_scans_batch(self.user.id, ['a.png', 'b.png', 'c.png', 'missing.png'])
+            self.assertEqual(submit.call_count, 2)
+            
+            # Processed content is not detected again
+            process_scans_batch(self.user.id, ['a.png'])
+            self.assertEqual(submit.call_count, 2)
+        
+        self.assertEqual([result['status'] for result in results],
+                         ['completed', 'completed', 'failed', 'failed'])
+        self.assertEqual(results[0]['measurements'], results[1]['measurements'])
+        self.assertAlmostEqual(results[0]['measurements']['face_width'], 140.0)
+        self.assertEqual(results[3]['error'], 'Face scan not found')
+        self.assertEqual(Measurement.query.count(), 3)
+    
+    def test_delete_releases_scan_with_last_measurement(self):
+        """Test that a scan is released once no measurement was taken from it"""
+        self.add_scan('a.png', 10)
+        path = self.store.local_path(self.store.get('a.png'))
+        measurements = [Measurement(user_id=self.user.id, scan_data_url='a.png') for _ in range(2)]
+        for measurement in measurements:
+            db.session.add(measurement)
+        db.session.commit()
+        
+        delete_measurement_record(measurements[0])
+        self.assertIsNotNone(self.store.get('a.png'))
+        self.assertTrue(os.path.exists(path))
+        
+        delete_measurement_record(measurements[1])
+        self.assertIsNone(self.store.get('a.png'))
+        self.assertEqual(ScanContent.query.count(), 0)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(Measurement.query.count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import os
+import io
+import sys
+import cv2
+import numpy as np
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from models import ScanContent
+from utils.scan_store import LocalScanStorage, ScanStore
+from utils.upload_ingest import ingest_upload
+
+# Add tests directory to path to import the shared test case
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_test_case import DatabaseTestCase
+
+class ScanStoreTest(DatabaseTestCase):
+    def setUp(self):
+        """Set up a store in a temporary directory with an in-memory database"""
+        super().setUp()
+        
+        self.store = ScanStore(LocalScanStorage(self.root), os.path.join(self.root, '.incoming'))
+        ok, buffer = cv2.imencode('.png', np.zeros((48, 64, 3), np.uint8))
+        self.data = buffer.tobytes()
+    
+    def add(self, scan_id):
+        upload = ingest_upload(io.BytesIO(self.data), self.store.staging_path(scan_id), len(self.data))
+        return self.store.add(self.user.id, scan_id, upload)
+    
+    def test_duplicates_share_content(self):
+        """Test that identical uploads are stored once in a sharded path"""
+        first, duplicate_first = self.add('a1.png')
+        second, duplicate_second = self.add('b2.png')
+        
+        self.assertFalse(duplicate_first)
+        self.assertTrue(duplicate_second)
+        self.assertEqual(first.content_id, second.content_id)
+        self.assertEqual(ScanContent.query.one().ref_count, 2)
+        
+        path = self.store.local_path(second)
+        sha256 = first.content.sha256
+        self.assertEqual(path, os.path.join(self.root, sha256[:2], sha256[2:4], sha256))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(os.listdir(os.path.join(self.root, '.incoming')), [])
+    
+    def test_release_deletes_unreferenced_content(self):
+        """Test that content is deleted with its last scan"""
+        scan, _ = self.add('a1.png')
+        self.add('b2.png')
+        path = self.store.local_path(scan)
+        
+        self.store.release('a1.png')
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ScanContent.query.one().ref_count, 1)
+        
+        self.store.release('b2.png')
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(ScanContent.query.first())
+    
+    def test_add_restores_missing_content_file(self):
+        """Test that an upload stores the file again when a release removed it"""
+        scan, _ = self.add('a1.png')
+        path = self.store.local_path(scan)
+        
+        # A release whose commit failed after deleting the file
+        os.remove(path)
+        
+        _, duplicate = self.add('b2.png')
+        self.assertTrue(duplicate)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(ScanContent.query.one().ref_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
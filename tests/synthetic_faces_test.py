@@ -0,0 +1,29 @@
+import unittest
+import os
+import sys
+import numpy as np
+
+# Add backend and benchmarks directories to path to allow imports
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'NewVisionAI', 'backend'))
+sys.path.append(os.path.join(ROOT_DIR, 'benchmarks'))
+
+from synthetic_faces import synthetic_face_image, synthetic_landmarks, synthetic_face_data
+from utils.face_detection import extract_measurements
+
+class SyntheticFacesTest(unittest.TestCase):
+    def test_fixtures_are_deterministic(self):
+        """Test that the same seed always produces the same inputs"""
+        np.testing.assert_array_equal(synthetic_face_image(320, 240, 3), synthetic_face_image(320, 240, 3))
+        np.testing.assert_array_equal(synthetic_landmarks(4, seed=1), synthetic_landmarks(4, seed=1))
+        self.assertEqual(synthetic_landmarks(4).shape, (4, 468, 3))
+
+    def test_landmarks_give_plausible_measurements(self):
+        """Test that synthetic landmarks produce measurements in normal ranges"""
+        measurements = extract_measurements(synthetic_face_data(1280, 720, seed=2))
+        
+        self.assertTrue(55 <= measurements['pupillary_distance'] <= 75)
+        self.assertTrue(120 <= measurements['face_height'] <= 180)
+
+if __name__ == '__main__':
+    unittest.main()
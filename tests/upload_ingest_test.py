@@ -0,0 +1,60 @@
+import unittest
+import os
+import io
+import sys
+import tempfile
+import cv2
+import numpy as np
+
+# Add backend directory to path to allow imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'NewVisionAI', 'backend'))
+
+from utils.error_handlers import ValidationError
+from utils.image_header import parse_dimensions
+from utils.upload_ingest import ingest_upload
+
+def encode(extension, width=320, height=240):
+    """Encode a blank test image"""
+    ok, buffer = cv2.imencode(extension, np.full((height, width, 3), 128, np.uint8))
+    return buffer.tobytes()
+
+class UploadIngestTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'scan.jpg')
+    
+    def test_header_dimensions(self):
+        """Test that dimensions are read from JPEG, PNG and WebP headers"""
+        for extension, image_format in (('.jpg', 'jpeg'), ('.png', 'png'), ('.webp', 'webp')):
+            data = encode(extension, 321, 123)
+            self.assertEqual(parse_dimensions(data, image_format), (321, 123))
+            self.assertIsNone(parse_dimensions(data[:10], image_format))
+    
+    def test_ingest_in_small_chunks(self):
+        """Test that a streamed upload is stored, hashed and measured"""
+        data = encode('.jpg')
+        upload = ingest_upload(io.BytesIO(data), self.path, 1024 * 1024,
+                               declared_type='image/jpeg', chunk_size=7)
+        
+        self.assertEqual((upload.format, upload.width, upload.height), ('jpeg', 320, 240))
+        self.assertEqual(upload.size, len(data))
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(len(upload.sha256), 64)
+    
+    def test_violations_abort(self):
+        """Test that oversized, mislabeled and bogus uploads leave no file"""
+        data = encode('.png')
+        cases = [
+            dict(stream=io.BytesIO(data), max_bytes=len(data) - 1),
+            dict(stream=io.BytesIO(data), max_bytes=len(data), declared_type='image/jpeg'),
+            dict(stream=io.BytesIO(b'not an image at all'), max_bytes=len(data)),
+            dict(stream=io.BytesIO(data), max_bytes=len(data), max_side=100)
+        ]
+        for case in cases:
+            with self.assertRaises(ValidationError):
+                ingest_upload(path=self.path, chunk_size=64, **case)
+            self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == '__main__':
+    unittest.main()